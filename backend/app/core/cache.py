@@ -0,0 +1,492 @@
+"""
+Shared cache with pluggable backends
+
+Backends (selected with CACHE_BACKEND):
+- memory: per-process LRU, for a single worker or per-worker hot data
+- sqlite: one file shared by every worker on the host
+- redis:  any server speaking the Redis protocol, shared across hosts
+
+All backends support per-entry TTLs, tag-based invalidation and hit/miss
+counters. Values are pickled by the shared backends, so only cache data the
+application produced itself.
+"""
+
+import pickle
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+_MISSING = object()
+
+class CacheStats:
+    """Hit/miss counters for one cache instance (per process)"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def record(self, field: str, count: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + count)
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class Cache(ABC):
+    """Cache interface; backends implement the underscore primitives"""
+
+    backend = "base"
+
+    def __init__(self, default_ttl: Optional[float] = None):
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+
+    def after_fork(self):
+        """Drop connections inherited from the parent process (call in a forked worker)"""
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._get(key)
+        if value is _MISSING:
+            self.stats.record("misses")
+            return default
+        self.stats.record("hits")
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        """Store a value; ttl in seconds (None = default_ttl, 0 = no expiry)"""
+        ttl = self.default_ttl if ttl is None else ttl
+        self._set(key, value, ttl or None, tuple(tags))
+        self.stats.record("sets")
+
+    def get_or_set(self, key: str, factory: Callable[[], Any], ttl: Optional[float] = None,
+                   tags: Iterable[str] = ()) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl=ttl, tags=tags)
+        return value
+
+    def delete(self, key: str):
+        self._delete(key)
+
+    def delete_tag(self, *tags: str) -> int:
+        """Remove every entry carrying any of the tags; returns the number removed"""
+        return sum(self._delete_tag(tag) for tag in tags)
+
+    def clear(self):
+        self._clear()
+
+    def info(self) -> dict:
+        return {"backend": self.backend, **self.stats.as_dict()}
+
+    @abstractmethod
+    def _get(self, key: str) -> Any:
+        """The stored value, or _MISSING"""
+
+    @abstractmethod
+    def _set(self, key: str, value: Any, ttl: Optional[float], tags: Tuple[str, ...]):
+        """Store a value; ttl None = no expiry"""
+
+    @abstractmethod
+    def _delete(self, key: str):
+        """Remove an entry; a missing key is not an error"""
+
+    @abstractmethod
+    def _delete_tag(self, tag: str) -> int:
+        """Remove every entry carrying the tag; returns the number removed"""
+
+    @abstractmethod
+    def _clear(self):
+        """Remove every entry"""
+
+
+class MemoryCache(Cache):
+    """In-process LRU cache. Values are stored by reference - do not mutate them."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = 10000, default_ttl: Optional[float] = None):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float], Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value, ttl, tags):
+        expires_at = time.monotonic() + ttl if ttl else None
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            self.stats.record("evictions", evicted)
+
+    def _delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _delete_tag(self, tag):
+        with self._lock:
+            keys = self._tags.pop(tag, set())
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+            return len(keys)
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SQLiteCache(Cache):
+    """Cache in a local SQLite file (WAL mode) shared by all workers on one host.
+
+    The LRU bound is enforced every `trim_interval` writes, so the table may
+    briefly exceed `max_entries`.
+    """
+
+    backend = "sqlite"
+
+    # Skip rewriting the access time on reads more often than this (seconds)
+    TOUCH_RESOLUTION = 1.0
+
+    def __init__(self, path: str, max_entries: int = 10000, default_ttl: Optional[float] = None,
+                 trim_interval: int = 64):
+        super().__init__(default_ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self.trim_interval = trim_interval
+        self._writes = 0
+        self._local = threading.local()
+        # A connection of its own, closed again: a preloading master must not hold one across fork
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at);
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key);
+            """)
+        finally:
+            conn.close()
+
+    def after_fork(self):
+        # Connections opened before the fork stay with the parent; this process opens its own
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            self._delete(key)
+            return _MISSING
+        if now - accessed_at > self.TOUCH_RESOLUTION:
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def _set(self, key, value, ttl, tags):
+        now = time.time()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now + ttl if ttl else None, now),
+            )
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            conn.executemany("INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                             [(tag, key) for tag in tags])
+        self._writes += 1
+        if self._writes % self.trim_interval == 0:
+            self._trim()
+
+    def _delete(self, key):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+
+    def _delete_tag(self, tag):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            keys = [row[0] for row in conn.execute("SELECT key FROM cache_tags WHERE tag = ?", (tag,))]
+            conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys])
+            conn.executemany("DELETE FROM cache_tags WHERE key = ?", [(key,) for key in keys])
+        return len(keys)
+
+    def _clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("DELETE FROM cache_tags")
+
+    def _trim(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                         (time.time(),))
+            excess = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN "
+                    "(SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?)", (excess,)
+                )
+            conn.execute("DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)")
+        if excess > 0:
+            self.stats.record("evictions", excess)
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RedisConnection:
+    """Minimal RESP2 client connection"""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def send(self, *commands: Tuple):
+        buffer = bytearray()
+        for command in commands:
+            buffer += b"*%d\r\n" % len(command)
+            for arg in command:
+                if isinstance(arg, str):
+                    arg = arg.encode()
+                elif isinstance(arg, int):
+                    arg = str(arg).encode()
+                buffer += b"$%d\r\n%s\r\n" % (len(arg), arg)
+        self.sock.sendall(buffer)
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            return None if count < 0 else [self.read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected reply type {kind!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisCache(Cache):
+    """Cache on a Redis-protocol server with a pooled, pipelined RESP client.
+
+    Size bounds are the server's job (maxmemory + an LRU eviction policy).
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "lawdash:",
+                 default_ttl: Optional[float] = None, pool_size: int = 8, timeout: float = 5.0):
+        super().__init__(default_ttl)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._pool: "queue.LifoQueue[RedisConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    def after_fork(self):
+        # Sockets in the inherited pool are shared with the parent; start an empty pool
+        self._pool = queue.LifoQueue(maxsize=self._pool.maxsize)
+
+    def _connect(self) -> RedisConnection:
+        conn = RedisConnection(self.host, self.port, self.timeout)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        try:
+            if setup:
+                conn.send(*setup)
+                for _ in setup:
+                    conn.read_reply()
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def pipeline(self, *commands: Tuple) -> List[Any]:
+        """Send commands in one round trip and return their replies"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        reusable = False
+        try:
+            conn.send(*commands)
+            replies = []
+            for _ in commands:
+                try:
+                    replies.append(conn.read_reply())
+                except RedisError as e:
+                    # Keep reading so the connection stays in step with the server
+                    replies.append(e)
+            reusable = True
+        finally:
+            if not reusable:
+                conn.close()
+            else:
+                try:
+                    self._pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _get(self, key):
+        (payload,) = self.pipeline(("GET", self._key(key)))
+        return _MISSING if payload is None else pickle.loads(payload)
+
+    def _set(self, key, value, ttl, tags):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        command = ("SET", self._key(key), payload)
+        if ttl:
+            command += ("PX", int(ttl * 1000))
+        # Tag sets carry no expiry; members whose entry expired are harmless
+        self.pipeline(command, *[("SADD", self._tag_key(tag), key) for tag in tags])
+
+    def _delete(self, key):
+        self.pipeline(("DEL", self._key(key)))
+
+    def _delete_tag(self, tag):
+        (members,) = self.pipeline(("SMEMBERS", self._tag_key(tag)))
+        keys = [self._key(member.decode()) for member in members or []]
+        self.pipeline(("DEL", self._tag_key(tag), *keys))
+        return len(keys)
+
+    def _clear(self):
+        cursor = "0"
+        while True:
+            ((cursor, keys),) = self.pipeline(("SCAN", cursor, "MATCH", f"{self.prefix}*", "COUNT", 1000))
+            cursor = cursor.decode() if isinstance(cursor, bytes) else str(cursor)
+            if keys:
+                self.pipeline(("DEL", *keys))
+            if cursor == "0":
+                break
+
+
+def create_cache(backend: Optional[str] = None, url: Optional[str] = None) -> Cache:
+    """Build the cache backend configured in Settings"""
+    backend = backend or settings.CACHE_BACKEND
+    url = url or settings.CACHE_URL
+    if backend == "memory":
+        return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES, default_ttl=settings.CACHE_DEFAULT_TTL)
+    if backend == "sqlite":
+        return SQLiteCache(url or "cache.db", max_entries=settings.CACHE_MAX_ENTRIES,
+                           default_ttl=settings.CACHE_DEFAULT_TTL)
+    if backend == "redis":
+        return RedisCache(url or "redis://localhost:6379/0", default_ttl=settings.CACHE_DEFAULT_TTL)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+# Application-wide cache instance
+cache = create_cache()
@@ -17,6 +17,19 @@ class Settings(BaseSettings):
     HOST: str = Field(default="127.0.0.1", env="HOST")
     PORT: int = Field(default=8000, env="PORT")
     
+    # Production server (run_production.py)
+    WORKERS: int = Field(default=0, env="WORKERS")  # 0 = one worker per CPU core
+    BACKLOG: int = Field(default=2048, env="BACKLOG")
+    KEEPALIVE_TIMEOUT: int = Field(default=5, env="KEEPALIVE_TIMEOUT")  # seconds
+    GRACEFUL_TIMEOUT: int = Field(default=30, env="GRACEFUL_TIMEOUT")  # seconds
+    MAX_REQUESTS: int = Field(default=10000, env="MAX_REQUESTS")  # recycle worker after N requests, 0 = never
+    MAX_REQUESTS_JITTER: int = Field(default=1000, env="MAX_REQUESTS_JITTER")
+    PRELOAD_APP: bool = Field(default=True, env="PRELOAD_APP")
+    
+    @property
+    def worker_count(self) -> int:
+        return self.WORKERS if self.WORKERS > 0 else (os.cpu_count() or 1)
+    
     # Database - SQL Server Express Configuration
     SQL_SERVER: str = Field(default="localhost\\SQLEXPRESS", env="SQL_SERVER")
     SQL_DATABASE: str = Field(default="ImmigrationLawDB", env="SQL_DATABASE")
@@ -36,6 +49,126 @@ class Settings(BaseSettings):
     # Fallback DATABASE_URL for manual override
     DATABASE_URL: str = Field(default="", env="DATABASE_URL")
     
+    # Read replicas - comma-separated URLs serving read-only endpoints
+    READ_REPLICA_URLS: str = Field(default="", env="READ_REPLICA_URLS")
+    READ_YOUR_WRITES_SECONDS: int = Field(default=10, env="READ_YOUR_WRITES_SECONDS")
+    REPLICA_RETRY_SECONDS: int = Field(default=30, env="REPLICA_RETRY_SECONDS")
+    
+    @property
+    def read_replica_urls(self) -> list:
+        return [url.strip() for url in self.READ_REPLICA_URLS.split(",") if url.strip()]
+    
+    # Cache - memory (per worker), sqlite (shared file on one host) or redis
+    CACHE_BACKEND: str = Field(default="memory", env="CACHE_BACKEND")
+    CACHE_URL: str = Field(default="", env="CACHE_URL")  # SQLite file path or redis:// URL
+    CACHE_MAX_ENTRIES: int = Field(default=10000, env="CACHE_MAX_ENTRIES")
+    CACHE_DEFAULT_TTL: int = Field(default=300, env="CACHE_DEFAULT_TTL")  # seconds
+    
+    # Cross-worker cache invalidation - SQLite file shared by the workers (empty = this worker only)
+    INVALIDATION_BUS_PATH: str = Field(default="", env="INVALIDATION_BUS_PATH")
+    INVALIDATION_POLL_MS: int = Field(default=5, env="INVALIDATION_POLL_MS")
+    
+    # Invoice PDFs - render process pool size (0 = one per CPU core) and artifact directory
+    INVOICE_PDF_WORKERS: int = Field(default=2, env="INVOICE_PDF_WORKERS")
+    INVOICE_PDF_DIR: str = Field(default="uploads/invoices", env="INVOICE_PDF_DIR")
+    INVOICE_FIRM_NAME: str = Field(default="Immigration Law Office", env="INVOICE_FIRM_NAME")
+    
+    # Bank reconciliation - directory for the exceptions report of each import
+    RECONCILIATION_REPORT_DIR: str = Field(default="uploads/reconciliation", env="RECONCILIATION_REPORT_DIR")
+    
+    # Billing runs - seconds without a heartbeat after which a "running" run is taken to be abandoned
+    # (its executor was killed) and can be resumed
+    BILLING_RUN_LEASE_SECONDS: int = Field(default=300, env="BILLING_RUN_LEASE_SECONDS")
+    
+    # Outgoing email - SMTP relay drained by the outbox worker (empty host = this process does not send)
+    SMTP_HOST: str = Field(default="", env="SMTP_HOST")
+    SMTP_PORT: int = Field(default=25, env="SMTP_PORT")
+    SMTP_USERNAME: str = Field(default="", env="SMTP_USERNAME")
+    SMTP_PASSWORD: str = Field(default="", env="SMTP_PASSWORD")
+    SMTP_USE_TLS: bool = Field(default=False, env="SMTP_USE_TLS")  # STARTTLS
+    SMTP_FROM: str = Field(default="billing@lawfirm.com", env="SMTP_FROM")
+    SMTP_TIMEOUT: int = Field(default=30, env="SMTP_TIMEOUT")  # seconds
+    
+    # Email outbox - messages claimed per batch, idle poll interval, retries before dead-lettering
+    OUTBOX_BATCH_SIZE: int = Field(default=50, env="OUTBOX_BATCH_SIZE")
+    OUTBOX_POLL_SECONDS: float = Field(default=1.0, env="OUTBOX_POLL_SECONDS")
+    OUTBOX_MAX_ATTEMPTS: int = Field(default=8, env="OUTBOX_MAX_ATTEMPTS")
+    OUTBOX_BACKOFF_SECONDS: int = Field(default=30, env="OUTBOX_BACKOFF_SECONDS")  # doubles per attempt, capped at 1 hour
+    OUTBOX_ATTACHMENT_DIR: str = Field(default="uploads/outbox", env="OUTBOX_ATTACHMENT_DIR")  # attachments kept until delivery
+    
+    # Document access audit log - events buffered in memory, flushed by size or age; spill directory
+    # holds segment files written while the database is unreachable and replayed on the next flush
+    AUDIT_BATCH_SIZE: int = Field(default=500, env="AUDIT_BATCH_SIZE")
+    AUDIT_FLUSH_SECONDS: float = Field(default=1.0, env="AUDIT_FLUSH_SECONDS")
+    AUDIT_SPILL_DIR: str = Field(default="uploads/audit", env="AUDIT_SPILL_DIR")
+    
+    # Document previews - derivative process pool size (0 = one per CPU core) and pixel bounds
+    PREVIEW_WORKERS: int = Field(default=1, env="PREVIEW_WORKERS")
+    PREVIEW_THUMB_SIZE: int = Field(default=256, env="PREVIEW_THUMB_SIZE")
+    PREVIEW_SIZE: int = Field(default=1024, env="PREVIEW_SIZE")
+    
+    # Upload normalization - downscale camera scans to INGEST_DPI on an A4 page, strip metadata and
+    # recompress (off by default); originals are copied to INGEST_ORIGINALS_DIR when it is set
+    INGEST_NORMALIZE_IMAGES: bool = Field(default=False, env="INGEST_NORMALIZE_IMAGES")
+    INGEST_WORKERS: int = Field(default=1, env="INGEST_WORKERS")
+    INGEST_DPI: int = Field(default=200, env="INGEST_DPI")
+    INGEST_JPEG_QUALITY: int = Field(default=80, env="INGEST_JPEG_QUALITY")
+    INGEST_ORIGINALS_DIR: str = Field(default="", env="INGEST_ORIGINALS_DIR")
+    
+    # Compression tier - documents older than TIERING_AGE_DAYS or on cases in TIERING_CASE_STATUSES
+    # (comma-separated) are compressed; zstd falls back to gzip without the zstandard package
+    TIERING_AGE_DAYS: int = Field(default=365, env="TIERING_AGE_DAYS")
+    TIERING_CASE_STATUSES: str = Field(default="completed,closed", env="TIERING_CASE_STATUSES")
+    TIERING_CODEC: str = Field(default="zstd", env="TIERING_CODEC")  # zstd, gzip
+    TIERING_LEVEL: int = Field(default=10, env="TIERING_LEVEL")
+    TIERING_MIN_SAVING: float = Field(default=0.1, env="TIERING_MIN_SAVING")  # fraction; less is left raw
+    
+    # Document versions - storage key prefix of the chunk store for superseded content, and its
+    # chunking pool (0 = one per CPU core)
+    VERSION_STORE_DIR: str = Field(default="uploads/chunks", env="VERSION_STORE_DIR")
+    VERSION_WORKERS: int = Field(default=1, env="VERSION_WORKERS")
+    
+    # Resumable uploads - part files directory (local to each server unless shared), largest file and
+    # chunk accepted, open sessions per user, and hours of inactivity before a session and its part
+    # file are removed
+    UPLOAD_SESSION_DIR: str = Field(default="uploads/sessions", env="UPLOAD_SESSION_DIR")
+    UPLOAD_MAX_SIZE_MB: int = Field(default=2048, env="UPLOAD_MAX_SIZE_MB")
+    UPLOAD_CHUNK_MAX_MB: int = Field(default=64, env="UPLOAD_CHUNK_MAX_MB")
+    UPLOAD_MAX_OPEN_SESSIONS: int = Field(default=10, env="UPLOAD_MAX_OPEN_SESSIONS")
+    UPLOAD_SESSION_TTL_HOURS: int = Field(default=24, env="UPLOAD_SESSION_TTL_HOURS")
+    
+    # Document storage - "local" (files under STORAGE_LOCAL_ROOT) or "s3" (any S3-compatible service);
+    # new blobs are keyed under STORAGE_PREFIX. S3 writes are multipart uploads of S3_PART_SIZE_MB parts
+    STORAGE_BACKEND: str = Field(default="local", env="STORAGE_BACKEND")
+    STORAGE_LOCAL_ROOT: str = Field(default=".", env="STORAGE_LOCAL_ROOT")
+    STORAGE_PREFIX: str = Field(default="uploads/documents", env="STORAGE_PREFIX")
+    STORAGE_SHARD_LEVELS: int = Field(default=2, env="STORAGE_SHARD_LEVELS")  # ab/cd/<name>; 0 keeps one flat directory
+    S3_BUCKET: str = Field(default="", env="S3_BUCKET")
+    S3_ENDPOINT_URL: Optional[str] = Field(default=None, env="S3_ENDPOINT_URL")  # e.g. http://minio:9000
+    S3_REGION: Optional[str] = Field(default=None, env="S3_REGION")
+    S3_ACCESS_KEY_ID: Optional[str] = Field(default=None, env="S3_ACCESS_KEY_ID")
+    S3_SECRET_ACCESS_KEY: Optional[str] = Field(default=None, env="S3_SECRET_ACCESS_KEY")
+    S3_PART_SIZE_MB: int = Field(default=8, env="S3_PART_SIZE_MB")
+    S3_MAX_POOL_CONNECTIONS: int = Field(default=20, env="S3_MAX_POOL_CONNECTIONS")
+    
+    # Encryption at rest for confidential documents - master key (32 bytes, urlsafe base64; derived
+    # from SECRET_KEY when unset), retired keys still able to decrypt (comma-separated), chunk size
+    DOCUMENT_ENCRYPTION_KEY: Optional[str] = Field(default=None, env="DOCUMENT_ENCRYPTION_KEY")
+    DOCUMENT_ENCRYPTION_OLD_KEYS: str = Field(default="", env="DOCUMENT_ENCRYPTION_OLD_KEYS")
+    ENCRYPTION_CHUNK_KB: int = Field(default=64, env="ENCRYPTION_CHUNK_KB")
+    
+    # Signed download URLs - lifetime, signing secret (defaults to one derived from SECRET_KEY) and
+    # proxy offload: "" streams from the app, "x-accel-redirect" (nginx internal location
+    # DOWNLOAD_OFFLOAD_PREFIX mapped to DOWNLOAD_OFFLOAD_ROOT) or "x-sendfile" (absolute path)
+    DOWNLOAD_URL_TTL_SECONDS: int = Field(default=300, env="DOWNLOAD_URL_TTL_SECONDS")
+    DOWNLOAD_URL_SECRET: Optional[str] = Field(default=None, env="DOWNLOAD_URL_SECRET")
+    DOWNLOAD_OFFLOAD: str = Field(default="", env="DOWNLOAD_OFFLOAD")
+    DOWNLOAD_OFFLOAD_PREFIX: str = Field(default="/protected", env="DOWNLOAD_OFFLOAD_PREFIX")
+    DOWNLOAD_OFFLOAD_ROOT: str = Field(default="uploads", env="DOWNLOAD_OFFLOAD_ROOT")
+    
+    # Schema migrations - apply pending migrations at startup instead of only checking the version
+    AUTO_MIGRATE: bool = Field(default=False, env="AUTO_MIGRATE")
+    
     # Security
     SECRET_KEY: str = Field(
         default="your-secret-key-here-change-in-production",
@@ -2,36 +2,125 @@
 Database configuration and session management
 """
 
+import threading
+import time
+from typing import Dict, List, Optional
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.core.cache import Cache, MemoryCache, cache
 from app.core.config import settings
 
-# Create database engine
-database_url = settings.DATABASE_URL if settings.DATABASE_URL else settings.database_url
-
-# SQL Server specific engine configuration
-if "mssql" in database_url:
-    engine = create_engine(
-        database_url,
-        # SQL Server specific options
-        pool_pre_ping=True,
-        pool_recycle=300,
-        echo=settings.DEBUG  # Log SQL queries in debug mode
-    )
-else:
+def _create_engine(database_url: str) -> Engine:
+    # SQL Server specific engine configuration
+    if "mssql" in database_url:
+        return create_engine(
+            database_url,
+            # SQL Server specific options
+            pool_pre_ping=True,
+            pool_recycle=300,
+            echo=settings.DEBUG  # Log SQL queries in debug mode
+        )
     # Fallback for other databases (like SQLite for development)
-    engine = create_engine(
+    return create_engine(
         database_url,
         connect_args={"check_same_thread": False} if "sqlite" in database_url else {}
     )
 
+# Create database engine
+database_url = settings.DATABASE_URL if settings.DATABASE_URL else settings.database_url
+engine = _create_engine(database_url)
+
+# Read replica engines (empty when no replicas are configured)
+replica_engines = [_create_engine(url) for url in settings.read_replica_urls]
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create base class for models
 Base = declarative_base()
 
+class ReplicaRouter:
+    """Pick a replica for read-only sessions.
+
+    Replicas are used round-robin; one that fails to connect is skipped for
+    `retry_after` seconds. A principal that wrote recently stays on the
+    primary for `read_your_writes` seconds so it never reads stale data. The
+    marker lives in the application cache, so other workers only see it when
+    that cache is shared (sqlite or redis); the memory cache is per worker.
+    """
+
+    def __init__(self, engines: List[Engine], read_your_writes: float, retry_after: float,
+                 write_markers: Cache):
+        self.engines = engines
+        self.read_your_writes = read_your_writes
+        self.retry_after = retry_after
+        self.write_markers = write_markers
+        self._next = 0
+        self._down_until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def worker_problem(self, workers: int) -> Optional[str]:
+        """Why read-your-writes cannot hold across `workers` processes, or None"""
+        if self.enabled and self.read_your_writes > 0 and workers > 1 and isinstance(self.write_markers, MemoryCache):
+            return (f"READ_REPLICA_URLS with {workers} workers needs CACHE_BACKEND=sqlite or redis: "
+                    "the read-your-writes marker is kept in the cache, and the memory cache is private "
+                    "to each worker, so a read served by another worker could hit a lagging replica")
+        return None
+
+    def record_write(self, principal: Optional[str]):
+        if principal and self.read_your_writes > 0:
+            self.write_markers.set(f"recent-write:{principal}", True, ttl=self.read_your_writes)
+
+    def wants_primary(self, principal: Optional[str]) -> bool:
+        if not self.enabled:
+            return True
+        if not principal or self.read_your_writes <= 0:
+            return False
+        return self.write_markers.get(f"recent-write:{principal}", False)
+
+    def connect(self) -> Optional[Connection]:
+        """Connection to the next healthy replica, or None to fall back to the primary"""
+        for engine_index in self._candidates():
+            try:
+                return self.engines[engine_index].connect()
+            except DBAPIError:
+                with self._lock:
+                    self._down_until[engine_index] = time.monotonic() + self.retry_after
+        return None
+
+    def _candidates(self) -> List[int]:
+        now = time.monotonic()
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % max(len(self.engines), 1)
+        order = [(start + offset) % len(self.engines) for offset in range(len(self.engines))]
+        return [index for index in order if self._down_until.get(index, 0) <= now]
+
+replica_router = ReplicaRouter(
+    replica_engines,
+    read_your_writes=settings.READ_YOUR_WRITES_SECONDS,
+    retry_after=settings.REPLICA_RETRY_SECONDS,
+    write_markers=cache,
+)
+
+def request_principal(request: Request) -> Optional[str]:
+    """Identify the caller for read-your-writes tracking"""
+    from app.core.security import token_subject
+
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token_subject(token)
+
 # Dependency to get database session
 def get_db():
     """Get database session"""
@@ -40,3 +129,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """Get read-only database session, served by a replica when one is available"""
+    connection = None
+    if not replica_router.wants_primary(request_principal(request)):
+        connection = replica_router.connect()
+
+    db = SessionLocal(bind=connection) if connection is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        if connection is not None:
+            connection.close()
+
+def read_connection(request: Request) -> Connection:
+    """Connection for long-running reads (exports) that outlive the request session"""
+    connection = None
+    if not replica_router.wants_primary(request_principal(request)):
+        connection = replica_router.connect()
+    return connection if connection is not None else engine.connect()
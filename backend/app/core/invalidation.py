@@ -0,0 +1,162 @@
+"""
+Cross-worker cache invalidation bus
+
+Write endpoints publish invalidation tags; every worker on the host evicts the
+matching entries from its own cache. Messages go through a small SQLite change
+table: each worker polls `PRAGMA data_version` (a cheap in-memory check) and
+only reads new rows when another process has committed. Delivery lag is
+recorded per message and reported by `/api/health`.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+from app.core.cache import Cache, cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class InvalidationBus:
+    """Broadcast cache invalidation tags to every worker sharing `path`"""
+
+    def __init__(self, cache: Cache, path: Optional[str], poll_interval: float = 0.005,
+                 retention: float = 60.0):
+        self.cache = cache
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+        self._lags = deque(maxlen=1000)
+        self._last_id = 0
+        self._data_version = None
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def after_fork(self):
+        """Become a worker of its own: a new origin (so tags from siblings are not skipped) and connection"""
+        self.origin = uuid.uuid4().hex
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self):
+        """Create the change table and start the listener thread"""
+        if not self.enabled or self._thread is not None:
+            return
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                published_at REAL NOT NULL
+            )
+        """)
+        self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()[0]
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def publish(self, *tags: str):
+        """Evict tags locally and broadcast them to the other workers"""
+        if not tags:
+            return
+        self.cache.delete_tag(*tags)
+        self.published += 1
+        if self.enabled:
+            self._connection().execute(
+                "INSERT INTO invalidations (origin, tags, published_at) VALUES (?, ?, ?)",
+                (self.origin, "\n".join(tags), time.time()),
+            )
+
+    def _run(self):
+        polls = 0
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+                polls += 1
+                if polls % 2000 == 0:
+                    self._prune()
+            except sqlite3.Error as e:
+                logger.warning(f"Invalidation bus poll failed: {e}")
+
+    def poll(self) -> int:
+        """Apply messages published by other workers since the last poll"""
+        conn = self._connection()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return 0
+        self._data_version = data_version
+
+        rows = conn.execute(
+            "SELECT id, origin, tags, published_at FROM invalidations WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ).fetchall()
+        applied = 0
+        for message_id, origin, tags, published_at in rows:
+            self._last_id = message_id
+            if origin == self.origin:
+                continue
+            self.cache.delete_tag(*tags.split("\n"))
+            self._lags.append(time.time() - published_at)
+            applied += 1
+        self.received += applied
+        return applied
+
+    def _prune(self):
+        self._connection().execute(
+            "DELETE FROM invalidations WHERE published_at < ?", (time.time() - self.retention,)
+        )
+
+    def metrics(self) -> dict:
+        lags = sorted(self._lags)
+        lag_ms = {}
+        if lags:
+            lag_ms = {
+                "last": round(self._lags[-1] * 1000, 3),
+                "avg": round(sum(lags) / len(lags) * 1000, 3),
+                "p99": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 3),
+                "max": round(lags[-1] * 1000, 3),
+            }
+        return {
+            "enabled": self.enabled,
+            "published": self.published,
+            "received": self.received,
+            "delivery_lag_ms": lag_ms,
+        }
+
+# Application-wide bus for the shared cache instance
+bus = InvalidationBus(
+    cache,
+    settings.INVALIDATION_BUS_PATH or None,
+    poll_interval=settings.INVALIDATION_POLL_MS / 1000,
+)
+
+def invalidate(*tags: str):
+    """Invalidate cache tags in every worker"""
+    bus.publish(*tags)
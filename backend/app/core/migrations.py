@@ -0,0 +1,204 @@
+"""
+Versioned schema migrations
+
+Migrations are registered in order with the `migration` decorator and applied
+explicitly with `python migrate.py`. Application startup only reads the
+recorded schema version instead of reflecting every table on each worker boot.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, select, func, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# Kept out of Base.metadata so the version table is never part of the model schema
+version_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+MIGRATIONS: List[Migration] = []
+
+def migration(version: int, description: str):
+    """Register a migration function for the given schema version"""
+    def decorator(upgrade: Callable[[Connection], None]):
+        if any(existing.version == version for existing in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return upgrade
+    return decorator
+
+def _model_table(name: str) -> Table:
+    from app.core.database import Base
+    import app.models  # noqa: F401 - registers every model on Base.metadata
+
+    return Base.metadata.tables[name]
+
+def create_tables(connection: Connection, *table_names: str):
+    """Create model tables by name if they do not exist yet"""
+    for name in table_names:
+        _model_table(name).create(bind=connection, checkfirst=True)
+
+def add_columns(connection: Connection, table_name: str, *column_names: str):
+    """Add model columns to an existing table, skipping ones already present"""
+    table = _model_table(table_name)
+    existing = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    preparer = connection.dialect.identifier_preparer
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(
+            f"ALTER TABLE {preparer.format_table(table)} ADD {preparer.format_column(column)} {column_type}"
+        ))
+
+def create_indexes(connection: Connection, table_name: str, *index_names: str):
+    """Create model indexes by name if they do not exist yet"""
+    table = _model_table(table_name)
+    existing = {index["name"] for index in inspect(connection).get_indexes(table_name)}
+    for index in table.indexes:
+        if index.name in index_names and index.name not in existing:
+            index.create(bind=connection)
+
+# Migrations
+
+@migration(1, "Initial schema")
+def _initial_schema(connection: Connection):
+    # checkfirst keeps this a no-op for databases created by the old create_all startup
+    create_tables(
+        connection,
+        "users", "lawyers", "clients", "cases", "deadlines",
+        "documents", "billing", "payments", "activities",
+    )
+
+@migration(2, "Invoice line items and billing runs")
+def _billing_runs(connection: Connection):
+    create_tables(connection, "invoice_line_items", "billing_runs")
+
+@migration(3, "Payment idempotency keys")
+def _payment_idempotency(connection: Connection):
+    add_columns(connection, "payments", "idempotency_key")
+    create_indexes(connection, "payments", "ux_payments_idempotency_key")
+
+@migration(4, "Email outbox")
+def _email_outbox(connection: Connection):
+    create_tables(connection, "email_outbox")
+
+@migration(5, "Document access audit log")
+def _document_access_log(connection: Connection):
+    create_tables(connection, "document_access_log")
+
+@migration(6, "Document grants and effective-permission index")
+def _document_permissions(connection: Connection):
+    from app.services.document_acl import rebuild_index
+
+    create_tables(connection, "document_grants", "document_permissions")
+    rebuild_index(connection)
+
+@migration(7, "Document preview status")
+def _document_previews(connection: Connection):
+    add_columns(connection, "documents", "preview_status")
+
+@migration(8, "Document upload normalization")
+def _document_normalization(connection: Connection):
+    add_columns(connection, "documents", "original_size", "original_path")
+
+@migration(9, "Document compression tier")
+def _document_tiering(connection: Connection):
+    add_columns(connection, "documents", "storage_codec", "stored_size", "tiered_at")
+
+@migration(10, "Document version history and chunk store")
+def _document_versions(connection: Connection):
+    from sqlalchemy import insert
+    from app.models.document import Document, DocumentVersion
+
+    create_tables(connection, "document_versions", "content_chunks", "document_version_chunks")
+    # Existing documents get a history row for their current content
+    connection.execute(insert(DocumentVersion).from_select(
+        ["document_id", "version", "document_name", "mime_type", "file_size", "uploaded_by", "created_at"],
+        select(Document.document_id, func.coalesce(Document.version, 1), Document.document_name,
+               Document.mime_type, Document.file_size, Document.uploaded_by, Document.created_at)
+    ))
+
+@migration(11, "Resumable upload sessions")
+def _upload_sessions(connection: Connection):
+    create_tables(connection, "upload_sessions")
+
+@migration(12, "Document encryption at rest")
+def _document_encryption(connection: Connection):
+    from sqlalchemy import update
+    from app.models.document import Document, DocumentVersion
+
+    add_columns(connection, "documents", "is_encrypted")
+    add_columns(connection, "document_versions", "is_encrypted")
+    connection.execute(update(Document).values(is_encrypted=False))
+    connection.execute(update(DocumentVersion).values(is_encrypted=False))
+
+@migration(13, "Billing run heartbeat")
+def _billing_run_heartbeat(connection: Connection):
+    add_columns(connection, "billing_runs", "heartbeat_at")
+
+# Version helpers
+
+def latest_version() -> int:
+    """Newest schema version known to the code"""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+def current_version(connection: Connection) -> int:
+    """Schema version recorded in the database (0 if never migrated)"""
+    if not inspect(connection).has_table(schema_version.name):
+        return 0
+    version = connection.execute(select(func.max(schema_version.c.version))).scalar()
+    return version or 0
+
+def check_schema_version(engine: Engine) -> int:
+    """Verify the database is at the latest version without touching the model tables"""
+    with engine.connect() as connection:
+        version = current_version(connection)
+
+    expected = latest_version()
+    if version < expected:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {expected}. "
+            "Run `python migrate.py` to apply pending migrations."
+        )
+    if version > expected:
+        logger.warning(f"Database schema version {version} is newer than the code ({expected})")
+    return version
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations up to `target` (default: latest), one transaction each"""
+    target = latest_version() if target is None else target
+
+    with engine.begin() as connection:
+        schema_version.create(bind=connection, checkfirst=True)
+        version = current_version(connection)
+
+    applied = []
+    for pending in MIGRATIONS:
+        if pending.version <= version or pending.version > target:
+            continue
+        logger.info(f"Applying migration {pending.version}: {pending.description}")
+        with engine.begin() as connection:
+            pending.upgrade(connection)
+            connection.execute(
+                schema_version.insert().values(version=pending.version, description=pending.description)
+            )
+        applied.append(pending)
+    return applied
@@ -51,6 +51,13 @@ def verify_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def token_subject(token: str) -> Optional[str]:
+    """Read the token subject without verifying it (routing decisions only, never authorization)"""
+    try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
 def get_current_user(token: str, db):
     """Get current authenticated user from token"""
     from app.models.user import User
@@ -0,0 +1,34 @@
+"""
+Uvicorn protocol helpers for the production launcher
+"""
+
+import importlib.util
+import socket
+
+from uvicorn.protocols.http.h11_impl import H11Protocol
+
+def _set_nodelay(transport):
+    # Sockets handed to uvicorn worker processes lose their protocol number, so
+    # asyncio skips TCP_NODELAY and small responses wait on delayed ACKs (~40ms).
+    sock = transport.get_extra_info("socket")
+    if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+class NoDelayH11Protocol(H11Protocol):
+    def connection_made(self, transport):
+        _set_nodelay(transport)
+        super().connection_made(transport)
+
+if importlib.util.find_spec("httptools"):
+    from uvicorn.protocols.http.httptools_impl import HttpToolsProtocol
+
+    class NoDelayHttpToolsProtocol(HttpToolsProtocol):
+        def connection_made(self, transport):
+            _set_nodelay(transport)
+            super().connection_made(transport)
+else:
+    NoDelayHttpToolsProtocol = None
+
+def http_protocol_class():
+    """Fastest available HTTP protocol implementation"""
+    return NoDelayHttpToolsProtocol or NoDelayH11Protocol
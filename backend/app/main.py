@@ -3,38 +3,53 @@ Immigration Law Dashboard - Phase 1 & 2 API
 FastAPI backend for immigration law practice management
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
 import uvicorn
 
-from app.routers import authentication, users, lawyers, clients, cases, dashboard, deadlines, documents, billing, activities
-from app.core.database import engine, SessionLocal
+from app.routers import authentication, users, lawyers, clients, cases, dashboard, deadlines, documents, files, billing, activities, notifications
+from app.core.database import engine, SessionLocal, replica_router, request_principal
 from app.core.config import settings
-from app.models import user, lawyer, client, case, deadline, document
-from app.models import billing as billing_models, activity as activity_models
+from app.core.cache import cache
+from app.core.invalidation import bus
+from app.core.migrations import check_schema_version, upgrade
+from app.services.invoices import invoice_renderer
+from app.services.outbox import outbox_worker
+from app.services.audit import audit_log
+from app.services.previews import preview_generator
+from app.services.ingest import image_normalizer
+from app.services.versions import version_store
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
+# Check database schema version
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    logger.info("Creating database tables...")
-    user.Base.metadata.create_all(bind=engine)
-    lawyer.Base.metadata.create_all(bind=engine)
-    client.Base.metadata.create_all(bind=engine)
-    case.Base.metadata.create_all(bind=engine)
-    deadline.Base.metadata.create_all(bind=engine)
-    document.Base.metadata.create_all(bind=engine)
-    billing_models.Base.metadata.create_all(bind=engine)
-    activity_models.Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
+    if settings.AUTO_MIGRATE:
+        applied = upgrade(engine)
+        logger.info(f"Applied {len(applied)} pending migrations")
+    version = check_schema_version(engine)
+    logger.info(f"Database schema at version {version}")
+    problem = replica_router.worker_problem(settings.worker_count)
+    if problem:
+        logger.warning(problem)
+    bus.start()
+    outbox_worker.start()
+    audit_log.start()
     yield
+    audit_log.stop()
+    outbox_worker.stop()
+    bus.stop()
+    invoice_renderer.shutdown()
+    preview_generator.shutdown()
+    image_normalizer.shutdown()
+    version_store.shutdown()
     logger.info("Application shutdown")
 
 # Create FastAPI application
@@ -56,6 +71,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes tracking for replica routing
+if replica_router.enabled:
+    @app.middleware("http")
+    async def track_writes(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            replica_router.record_write(request_principal(request))
+        return response
+
 # Security
 security = HTTPBearer()
 
@@ -70,8 +94,10 @@ app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"]
 # Phase 2 routers
 app.include_router(deadlines.router, prefix="/api/deadlines", tags=["deadlines"])
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
+app.include_router(files.router, prefix="/api/files", tags=["files"])
 app.include_router(billing.router, prefix="/api/billing", tags=["billing"])
 app.include_router(activities.router, prefix="/api/activities", tags=["activities"])
+app.include_router(notifications.router, prefix="/api/notifications", tags=["notifications"])
 
 @app.get("/")
 async def root():
@@ -93,7 +119,15 @@ async def health_check():
         "database": "connected",
         "version": "2.0.0",
         "phase_1_endpoints": 25,
-        "phase_2_endpoints": 25
+        "phase_2_endpoints": 25,
+        "cache": cache.info(),
+        "invalidation": bus.metrics(),
+        "invoice_pdfs": invoice_renderer.metrics(),
+        "email_outbox": outbox_worker.metrics(),
+        "audit_log": audit_log.metrics(),
+        "previews": preview_generator.metrics(),
+        "upload_normalization": image_normalizer.metrics(),
+        "versions": version_store.metrics()
     }
 
 if __name__ == "__main__":
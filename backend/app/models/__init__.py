@@ -7,9 +7,14 @@ from .lawyer import Lawyer
 from .client import Client
 from .case import Case
 from .deadline import Deadline
-from .document import Document
-from .billing import Billing, Payment
+from .document import (
+    Document, DocumentGrant, DocumentPermission, DocumentVersion, ContentChunk, DocumentVersionChunk,
+    UploadSession
+)
+from .billing import Billing, Payment, InvoiceLineItem, BillingRun
 from .activity import Activity
+from .notification import OutboxEmail
+from .audit import DocumentAccessLog
 
 __all__ = [
     "User",
@@ -18,7 +23,17 @@ __all__ = [
     "Case",
     "Deadline",
     "Document",
+    "DocumentGrant",
+    "DocumentPermission",
+    "DocumentVersion",
+    "ContentChunk",
+    "DocumentVersionChunk",
+    "UploadSession",
     "Billing",
     "Payment",
-    "Activity"
+    "InvoiceLineItem",
+    "BillingRun",
+    "Activity",
+    "OutboxEmail",
+    "DocumentAccessLog"
 ]
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Audit models - append-only document access log
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from app.core.database import Base
+
+class DocumentAccessLog(Base):
+    __tablename__ = "document_access_log"
+
+    # Rows are only ever inserted; no foreign keys so audit history outlives the records it mentions
+    log_id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, nullable=False)
+    case_id = Column(Integer)
+    user_id = Column(Integer, nullable=False)
+    action = Column(String(20), nullable=False)  # view, download, share
+    occurred_at = Column(DateTime, nullable=False)  # UTC, when the request happened (not when flushed)
+    ip_address = Column(String(45))
+    user_agent = Column(String(255))
+
+    __table_args__ = (
+        Index("ix_document_access_log_document", "document_id", "occurred_at"),
+        Index("ix_document_access_log_user", "user_id", "occurred_at"),
+        Index("ix_document_access_log_occurred_at", "occurred_at"),
+    )
+
+    @property
+    def id(self):
+        return self.log_id
@@ -2,7 +2,7 @@
 Billing model for case billing and financial tracking
 """
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Numeric, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Numeric, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -78,6 +78,9 @@ class Payment(Base):
     payment_method = Column(String(50), nullable=False)
     reference_number = Column(String(100))
     
+    # Client-supplied key; a retried request with the same key returns the original payment
+    idempotency_key = Column(String(100))
+    
     # Notes
     notes = Column(Text)
     
@@ -85,6 +88,16 @@ class Payment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     recorded_by = Column(Integer, ForeignKey("users.user_id"))
 
+    # Filtered so SQL Server allows any number of payments without a key
+    __table_args__ = (
+        Index(
+            "ux_payments_idempotency_key", "idempotency_key", unique=True,
+            mssql_where=idempotency_key.isnot(None),
+            postgresql_where=idempotency_key.isnot(None),
+            sqlite_where=idempotency_key.isnot(None),
+        ),
+    )
+
     # Relationships
     billing_record = relationship("Billing", backref="payments")
     recorder = relationship("User", backref="recorded_payments")
@@ -92,3 +105,61 @@ class Payment(Base):
     @property
     def id(self):
         return self.payment_id
+
+
+class InvoiceLineItem(Base):
+    __tablename__ = "invoice_line_items"
+
+    line_item_id = Column(Integer, primary_key=True, index=True)
+    billing_id = Column(Integer, ForeignKey("billing.billing_id"), nullable=False, index=True)
+    activity_id = Column(Integer, ForeignKey("activities.activity_id"), unique=True)
+    
+    # Line details
+    description = Column(String(200), nullable=False)
+    hours = Column(Numeric(8, 2), nullable=False)
+    rate = Column(Numeric(10, 2), nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
+
+    # Relationships
+    billing_record = relationship("Billing", backref="line_items")
+    activity = relationship("Activity")
+    
+    @property
+    def id(self):
+        return self.line_item_id
+
+
+class BillingRun(Base):
+    __tablename__ = "billing_runs"
+
+    run_id = Column(Integer, primary_key=True, index=True)
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    lawyer_id = Column(Integer, ForeignKey("lawyers.lawyer_id"))  # None = all lawyers
+    due_in_days = Column(Integer, nullable=False, default=30)
+    
+    # Progress checkpoint, updated in the same transaction as each invoice
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, completed, failed
+    total_groups = Column(Integer, nullable=False, default=0)
+    completed_groups = Column(Integer, nullable=False, default=0)
+    failed_groups = Column(Integer, nullable=False, default=0)
+    invoices_created = Column(Integer, nullable=False, default=0)
+    total_invoiced = Column(Numeric(14, 2), nullable=False, default=0)
+    error = Column(Text)
+    heartbeat_at = Column(DateTime)  # refreshed as groups finish; a stale one means the executor died
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    created_by = Column(Integer, ForeignKey("users.user_id"))
+    
+    @property
+    def id(self):
+        return self.run_id
+    
+    @property
+    def progress(self):
+        if not self.total_groups:
+            return 1.0 if self.status == "completed" else 0.0
+        return round((self.completed_groups + self.failed_groups) / self.total_groups, 4)
@@ -2,7 +2,11 @@
 Document model for case document management
 """
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean, BigInteger
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, Integer, String, ForeignKey, DateTime, Text, Boolean, BigInteger, Index, UniqueConstraint
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -25,11 +29,18 @@ class Document(Base):
     access_level = Column(String(20), nullable=False, default="case")  # public, case, lawyer, admin
     is_confidential = Column(Boolean, default=False)
     password_protected = Column(Boolean, default=False)
+    is_encrypted = Column(Boolean, default=False)  # blob is sealed with a per-file key (see services.encryption)
     
     # Metadata
     description = Column(Text)
     tags = Column(String(500))  # Comma-separated tags
     version = Column(Integer, default=1)
+    preview_status = Column(String(20))  # pending, ready, unsupported, failed
+    original_size = Column(BigInteger)  # Bytes uploaded, when the stored file was normalized
+    original_path = Column(String(500))  # Cold-storage copy of the upload, if kept
+    storage_codec = Column(String(10))  # zstd, gzip - set once the blob is in the compressed tier
+    stored_size = Column(BigInteger)  # Compressed bytes on disk
+    tiered_at = Column(DateTime)  # When the tiering job visited the blob (UTC)
     
     # Status
     status = Column(String(20), nullable=False, default="active")  # active, archived, deleted
@@ -51,3 +62,119 @@ class Document(Base):
         if self.file_size:
             return round(self.file_size / (1024 * 1024), 2)
         return 0
+
+class DocumentGrant(Base):
+    """Explicit share of a document with one user or with every user of a role"""
+    __tablename__ = "document_grants"
+
+    grant_id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"))  # set for a user grant
+    role = Column(String(20))  # set for a role grant: admin, lawyer, client
+    permission = Column(String(20), nullable=False)  # view, download, edit
+    expires_at = Column(DateTime)  # UTC, None = never
+    granted_by = Column(Integer, ForeignKey("users.user_id"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @property
+    def id(self):
+        return self.grant_id
+
+class DocumentPermission(Base):
+    """Effective-permission index: one row per principal, document and source of access
+
+    Maintained incrementally from case membership, uploads and grants so an
+    access check is a single indexed lookup on (principal, document_id).
+    """
+    __tablename__ = "document_permissions"
+
+    permission_id = Column(Integer, primary_key=True)
+    principal = Column(String(40), nullable=False)  # "user:<user_id>" or "role:<role>"
+    document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
+    case_id = Column(Integer)
+    level = Column(Integer, nullable=False)  # 1 view, 2 download, 3 edit
+    source = Column(String(20), nullable=False)  # case_client, case_lawyer, uploader, grant
+    grant_id = Column(Integer, ForeignKey("document_grants.grant_id"))
+    expires_at = Column(DateTime)  # UTC, None = never
+
+    __table_args__ = (
+        Index("ix_document_permissions_principal", "principal", "document_id", "level"),
+        Index("ix_document_permissions_document", "document_id"),
+        Index("ix_document_permissions_case", "case_id", "source"),
+        Index("ix_document_permissions_grant", "grant_id"),
+    )
+
+class DocumentVersion(Base):
+    """One content version of a document
+
+    The current version's bytes live at `Document.file_path`; when a newer
+    version is uploaded the old content is archived into the chunk store and
+    `archived_at` is set.
+    """
+    __tablename__ = "document_versions"
+
+    version_id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
+    version = Column(Integer, nullable=False)
+    document_name = Column(String(255), nullable=False)
+    mime_type = Column(String(100))
+    file_size = Column(BigInteger)
+    content_hash = Column(String(64))  # SHA-256 of the whole content (keyed when encrypted)
+    is_encrypted = Column(Boolean, default=False)  # chunks are sealed
+    comment = Column(String(500))
+    uploaded_by = Column(Integer, ForeignKey("users.user_id"))
+    created_at = Column(DateTime, default=datetime.utcnow)  # UTC
+    archived_at = Column(DateTime)  # UTC, set once the content is in the chunk store
+
+    __table_args__ = (
+        UniqueConstraint("document_id", "version", name="ux_document_versions_document_version"),
+    )
+
+class ContentChunk(Base):
+    """A deduplicated chunk in the content-addressed store"""
+    __tablename__ = "content_chunks"
+
+    chunk_hash = Column(String(64), primary_key=True)  # SHA-256, also the file name
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)  # UTC
+
+class DocumentVersionChunk(Base):
+    """Ordered chunk list of an archived version"""
+    __tablename__ = "document_version_chunks"
+
+    version_id = Column(Integer, ForeignKey("document_versions.version_id"), primary_key=True)
+    sequence = Column(Integer, primary_key=True)
+    chunk_hash = Column(String(64), ForeignKey("content_chunks.chunk_hash"), nullable=False)
+
+class UploadSession(Base):
+    """Resumable upload in progress; the bytes received so far are in a part file on disk"""
+    __tablename__ = "upload_sessions"
+
+    upload_id = Column(String(32), primary_key=True)  # random hex, also names the part file
+    created_by = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+
+    # Document to create on finalize
+    case_id = Column(Integer, ForeignKey("cases.case_id"), nullable=False)
+    document_name = Column(String(255), nullable=False)
+    document_type = Column(String(100), nullable=False)
+    mime_type = Column(String(100), nullable=False)
+    access_level = Column(String(20), nullable=False, default="case")
+    is_confidential = Column(Boolean, default=False)
+    description = Column(Text)
+    tags = Column(String(500))
+
+    # Transfer state
+    total_size = Column(BigInteger, nullable=False)
+    received = Column(BigInteger, nullable=False, default=0)  # committed offset - bytes past it are rewritten
+    sha256 = Column(String(64))  # optional checksum verified on finalize
+    status = Column(String(20), nullable=False, default="open")  # open, finalizing, completed
+    document_id = Column(Integer, ForeignKey("documents.document_id"))  # set on finalize
+
+    # Timestamps (UTC)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)  # pushed forward by every chunk
+
+    __table_args__ = (
+        Index("ix_upload_sessions_expires", "status", "expires_at"),
+        Index("ix_upload_sessions_user", "created_by", "status"),
+    )
@@ -0,0 +1,51 @@
+"""
+Notification models - transactional email outbox
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from app.core.database import Base
+
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+
+    email_id = Column(Integer, primary_key=True, index=True)
+
+    # Message
+    to_address = Column(String(255), nullable=False)
+    cc_address = Column(String(255))
+    subject = Column(String(300), nullable=False)
+    body_text = Column(Text, nullable=False)
+    attachment_path = Column(String(500))
+    attachment_name = Column(String(255))
+
+    # Origin, e.g. category "invoice" with related_id = billing_id
+    category = Column(String(50), nullable=False)
+    related_id = Column(Integer)
+    dedupe_key = Column(String(200))  # skip enqueueing the same notification twice
+
+    # Delivery state
+    status = Column(String(20), nullable=False, default="pending")  # pending, sending, sent, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = Column(String(32))
+    claimed_until = Column(DateTime)
+    last_error = Column(Text)
+
+    # Timestamps (UTC, set by the application so queue lag is comparable across databases)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_email_outbox_due", "status", "next_attempt_at"),
+        Index(
+            "ux_email_outbox_dedupe_key", "dedupe_key", unique=True,
+            mssql_where=dedupe_key.isnot(None),
+            postgresql_where=dedupe_key.isnot(None),
+            sqlite_where=dedupe_key.isnot(None),
+        ),
+    )
+
+    @property
+    def id(self):
+        return self.email_id
@@ -3,34 +3,27 @@ Activities router - Activity tracking and billable hours management
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, insert
 from datetime import date, datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, read_connection
 from app.core.security import get_current_user
 from app.models.activity import Activity
-from app.schemas.activity import ActivityResponse, ActivityCreate, ActivityUpdate
+from app.schemas.activity import (
+    ActivityResponse, ActivityCreate, ActivityUpdate,
+    ActivityBulkCreate, ActivityBulkItemResult, ActivityBulkResponse
+)
+from app.services.exports import export_response
 
 router = APIRouter()
 security = HTTPBearer()
 
-@router.get("/", response_model=List[ActivityResponse])
-async def get_activities(
-    case_id: Optional[int] = Query(None),
-    activity_type: Optional[str] = Query(None),
-    is_billable: Optional[bool] = Query(None),
-    date_from: Optional[date] = Query(None),
-    date_to: Optional[date] = Query(None),
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    """Get activities with filtering (Date range, case, type, billable status)"""
-    
-    current_user = get_current_user(credentials.credentials, db)
-    
+def _activities_query(db: Session, current_user, case_id: Optional[int] = None,
+                      activity_type: Optional[str] = None, is_billable: Optional[bool] = None,
+                      date_from: Optional[date] = None, date_to: Optional[date] = None):
     query = db.query(Activity)
     
     # Role-based filtering
@@ -53,6 +46,23 @@ async def get_activities(
         query = query.filter(Activity.activity_date >= date_from)
     if date_to:
         query = query.filter(Activity.activity_date <= date_to)
+    return query
+
+@router.get("/", response_model=List[ActivityResponse])
+async def get_activities(
+    case_id: Optional[int] = Query(None),
+    activity_type: Optional[str] = Query(None),
+    is_billable: Optional[bool] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Get activities with filtering (Date range, case, type, billable status)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    query = _activities_query(db, current_user, case_id, activity_type, is_billable, date_from, date_to)
     
     activities = query.order_by(Activity.activity_date.desc()).all()
     
@@ -62,13 +72,34 @@ async def get_activities(
     
     return [ActivityResponse.model_validate(activity) for activity in activities]
 
+@router.get("/export")
+async def export_activities(
+    request: Request,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    case_id: Optional[int] = Query(None),
+    activity_type: Optional[str] = Query(None),
+    is_billable: Optional[bool] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+):
+    """Export activities as streamed CSV or NDJSON (Same filters as list)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    query = _activities_query(db, current_user, case_id, activity_type, is_billable, date_from, date_to)
+    
+    statement = query.with_entities(*Activity.__table__.columns).order_by(Activity.activity_id).statement
+    return export_response(lambda: read_connection(request), statement, export_format, "activities")
+
 @router.get("/summary", response_model=dict)
 async def get_activities_summary(
     date_from: Optional[date] = Query(None),
     date_to: Optional[date] = Query(None),
     case_id: Optional[int] = Query(None),
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get activity summary (Total hours, billable vs non-billable, amounts)"""
     
@@ -175,6 +206,91 @@ async def create_activity(
     
     return ActivityResponse.model_validate(activity)
 
+@router.post("/bulk", response_model=ActivityBulkResponse)
+async def create_activities_bulk(
+    bulk_data: ActivityBulkCreate,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Create many activity records at once (Weekly time entry, imports)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    # Only admin and lawyers can create activities
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin and lawyers can create activities"
+        )
+    
+    return bulk_create_activities(db, current_user, bulk_data.activities, atomic=bulk_data.atomic)
+
+# Stay well below SQL Server's 2100 parameter limit for IN lists
+IN_CLAUSE_CHUNK = 1000
+
+def _chunks(values: list, size: int = IN_CLAUSE_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def bulk_create_activities(db: Session, current_user, entries: List[ActivityCreate],
+                           atomic: bool = False) -> ActivityBulkResponse:
+    """Validate and insert activities with one case query, one lawyer query and one insert"""
+    from app.models.case import Case
+    from app.models.lawyer import Lawyer
+    
+    # Case existence and ownership for every entry
+    case_owners = {}
+    for chunk in _chunks(sorted({entry.case_id for entry in entries})):
+        case_owners.update(
+            db.query(Case.case_id, Case.primary_lawyer_id).filter(Case.case_id.in_(chunk)).all()
+        )
+    
+    results = [None] * len(entries)
+    rows = []
+    for index, entry in enumerate(entries):
+        if entry.case_id not in case_owners:
+            results[index] = ActivityBulkItemResult(index=index, status="failed", error="Case not found")
+            continue
+        if current_user.role == "lawyer" and case_owners[entry.case_id] != current_user.id:
+            results[index] = ActivityBulkItemResult(index=index, status="failed", error="Access denied to this case")
+            continue
+        
+        row = entry.model_dump()
+        # Lawyers log their own time; admin imports keep the lawyer given per entry
+        if current_user.role == "lawyer":
+            row['lawyer_id'] = current_user.id
+        rows.append((index, row))
+    
+    # Lawyer existence (an unknown id would fail the whole insert) and default hourly rates
+    rates = {}
+    for chunk in _chunks(sorted({row['lawyer_id'] for _, row in rows})):
+        rates.update(db.query(Lawyer.lawyer_id, Lawyer.hourly_rate).filter(Lawyer.lawyer_id.in_(chunk)).all())
+    known = []
+    for index, row in rows:
+        if row['lawyer_id'] not in rates:
+            results[index] = ActivityBulkItemResult(index=index, status="failed", error="Lawyer not found")
+            continue
+        if row['hourly_rate'] is None:
+            row['hourly_rate'] = rates[row['lawyer_id']]
+        known.append((index, row))
+    rows = known
+    
+    failed = sum(1 for result in results if result is not None)
+    if rows and not (atomic and failed):
+        statement = insert(Activity).returning(Activity.activity_id, sort_by_parameter_order=True)
+        activity_ids = db.scalars(statement, [row for _, row in rows]).all()
+        db.commit()
+        for (index, _), activity_id in zip(rows, activity_ids):
+            results[index] = ActivityBulkItemResult(index=index, status="created", activity_id=activity_id)
+    else:
+        for index, _ in rows:
+            results[index] = ActivityBulkItemResult(
+                index=index, status="skipped", error="Batch rejected because other entries failed"
+            )
+    
+    created = sum(1 for result in results if result.status == "created")
+    return ActivityBulkResponse(created=created, failed=failed, results=results)
+
 @router.get("/{activity_id}", response_model=ActivityResponse)
 async def get_activity_by_id(
     activity_id: int,
@@ -312,7 +428,7 @@ async def get_pending_billable_activities(
     query = db.query(Activity).filter(
         and_(
             Activity.is_billable == True,
-            Activity.billed == False
+            Activity.billing_status == "unbilled"
         )
     )
     
@@ -3,32 +3,33 @@ Billing router - Billing and financial management endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Header, HTTPException, Request, Response, UploadFile, status, Query
+from fastapi.responses import FileResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
 from datetime import date, datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, read_connection
 from app.core.security import get_current_user
-from app.models.billing import Billing, Payment
-from app.schemas.billing import BillingResponse, BillingCreate, BillingUpdate, BillingSend, PaymentCreate, PaymentResponse
+from app.models.billing import Billing, Payment, BillingRun
+from app.schemas.billing import (
+    BillingResponse, BillingCreate, BillingUpdate, BillingSend, PaymentCreate, PaymentResponse,
+    BillingRunCreate, BillingRunResponse, ReconciliationImportResponse
+)
+from app.services.billing_runs import claim_billing_run, create_billing_run, execute_billing_run
+from app.services.payments import apply_payment, InvoiceNotFound, IdempotencyConflict
+from app.services import reconciliation
+from app.services.exports import export_response
+from app.services.invoices import content_hash, invoice_payload, invoice_renderer
+from app.services.outbox import enqueue_email, outbox_worker
 
 router = APIRouter()
 security = HTTPBearer()
 
-@router.get("/", response_model=List[BillingResponse])
-async def get_billing_records(
-    status_filter: Optional[str] = Query(None, alias="status"),
-    client_id: Optional[int] = Query(None),
-    lawyer_id: Optional[int] = Query(None),
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    """Get billing records with filtering"""
-    
-    current_user = get_current_user(credentials.credentials, db)
-    
+def _billing_query(db: Session, current_user, status_filter: Optional[str] = None,
+                   client_id: Optional[int] = None, lawyer_id: Optional[int] = None):
     query = db.query(Billing)
     
     # Role-based filtering
@@ -44,6 +45,21 @@ async def get_billing_records(
         query = query.filter(Billing.client_id == client_id)
     if lawyer_id and current_user.role == "admin":
         query = query.filter(Billing.lawyer_id == lawyer_id)
+    return query
+
+@router.get("/", response_model=List[BillingResponse])
+async def get_billing_records(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    client_id: Optional[int] = Query(None),
+    lawyer_id: Optional[int] = Query(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+):
+    """Get billing records with filtering"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    query = _billing_query(db, current_user, status_filter, client_id, lawyer_id)
     
     billing_records = query.order_by(Billing.created_at.desc()).all()
     
@@ -55,10 +71,35 @@ async def get_billing_records(
     
     return [BillingResponse.model_validate(record) for record in billing_records]
 
+@router.get("/export")
+async def export_billing_records(
+    request: Request,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    client_id: Optional[int] = Query(None),
+    lawyer_id: Optional[int] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+):
+    """Export billing records as streamed CSV or NDJSON (Same filters as list, invoice date range)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    query = _billing_query(db, current_user, status_filter, client_id, lawyer_id)
+    if date_from:
+        query = query.filter(Billing.invoice_date >= date_from)
+    if date_to:
+        query = query.filter(Billing.invoice_date <= date_to)
+    
+    statement = query.with_entities(*Billing.__table__.columns).order_by(Billing.billing_id).statement
+    return export_response(lambda: read_connection(request), statement, export_format, "billing")
+
 @router.get("/pending", response_model=List[BillingResponse])
 async def get_pending_invoices(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get pending invoices (Status-based filtering)"""
     
@@ -237,19 +278,103 @@ async def send_invoice(
             detail="Access denied"
         )
     
-    # Update status to sent
+    # Render (or reuse) the PDF in the render pool, off the event loop
+    pdf_path = await invoice_renderer.render(invoice_payload(db, billing))
+    
+    client_user = billing.client.user if billing.client else None
+    recipient = send_data.email_address or (client_user.email if client_user else None)
+    if not recipient:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No email address on file for this client"
+        )
+    lawyer_user = billing.lawyer.user if billing.lawyer else None
+    copy_to = lawyer_user.email if send_data.send_copy_to_lawyer and lawyer_user else None
+    
+    invoice_label = billing.invoice_number or f"#{billing.billing_id}"
+    body = [f"Please find attached invoice {invoice_label} dated {billing.invoice_date.isoformat()}."]
+    if send_data.custom_message:
+        body.append(send_data.custom_message)
+    if send_data.include_detailed_breakdown:
+        body.append(
+            f"Hours: {billing.hours_worked or 0:,.2f} at {billing.hourly_rate or 0:,.2f}\n"
+            f"Subtotal: {billing.subtotal or 0:,.2f}\n"
+            f"Tax: {billing.tax_amount or 0:,.2f}"
+        )
+    body.append(
+        f"Total due: {(billing.total_amount or 0) - (billing.amount_paid or 0):,.2f} "
+        f"by {billing.due_date.isoformat()}."
+    )
+    
+    # Status change and email are committed together; the outbox worker delivers it
     billing.status = "sent"
+    email = enqueue_email(
+        db,
+        to_address=recipient,
+        cc_address=copy_to,
+        subject=f"Invoice {invoice_label}",
+        body_text="\n\n".join(body) + "\n",
+        category="invoice",
+        related_id=billing.billing_id,
+        attachment_path=pdf_path,
+        attachment_name=f"invoice-{invoice_label.lstrip('#')}.pdf",
+    )
     db.commit()
-    
-    # TODO: Implement actual email sending and PDF generation
+    outbox_worker.wake()
     
     return {
-        "message": "Invoice sent successfully",
+        "message": "Invoice queued for sending",
         "invoice_number": billing.invoice_number,
-        "sent_to": send_data.email_address or "client@email.com",
-        "include_detailed_breakdown": send_data.include_detailed_breakdown
+        "sent_to": recipient,
+        "copy_to": copy_to,
+        "email_id": email.email_id,
+        "include_detailed_breakdown": send_data.include_detailed_breakdown,
+        "pdf_url": f"/api/billing/{billing_id}/pdf"
     }
 
+@router.get("/{billing_id}/pdf")
+async def download_invoice_pdf(
+    billing_id: int,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Download invoice PDF (Cached until the invoice changes)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    billing = db.query(Billing).filter(Billing.billing_id == billing_id).first()
+    if not billing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Billing record not found"
+        )
+    
+    # Check access permissions
+    if current_user.role == "lawyer" and billing.lawyer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    elif current_user.role == "client" and billing.client_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    payload = invoice_payload(db, billing)
+    etag = f'"{content_hash(payload)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    path = await invoice_renderer.render(payload)
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"{payload['invoice_number']}.pdf",
+        headers={"ETag": etag}
+    )
+
 @router.delete("/{billing_id}")
 async def delete_billing_record(
     billing_id: int,
@@ -283,10 +408,12 @@ async def delete_billing_record(
 @router.post("/payments", response_model=PaymentResponse)
 async def record_payment(
     payment_data: PaymentCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
-    """Record payment (Transaction tracking, balance updates)"""
+    """Record payment (Atomic balance update, deduplicated by Idempotency-Key)"""
     
     current_user = get_current_user(credentials.credentials, db)
     
@@ -297,35 +424,23 @@ async def record_payment(
             detail="Only admin and lawyers can record payments"
         )
     
-    # Check if billing record exists
-    billing = db.query(Billing).filter(Billing.billing_id == payment_data.billing_id).first()
-    if not billing:
+    try:
+        applied = apply_payment(db, payment_data, recorded_by=current_user.id, idempotency_key=idempotency_key)
+    except InvoiceNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Billing record not found"
         )
+    except IdempotencyConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     
-    # Create payment record
-    payment = Payment(
-        **payment_data.model_dump(),
-        recorded_by=current_user.id
-    )
-    db.add(payment)
-    
-    # Update billing record
-    billing.amount_paid += payment_data.payment_amount
-    billing.payment_method = payment_data.payment_method
-    billing.payment_date = payment_data.payment_date
-    billing.payment_reference = payment_data.reference_number
-    
-    # Update status
-    if billing.amount_paid >= billing.total_amount:
-        billing.status = "paid"
+    if applied.replayed:
+        response.headers["Idempotent-Replayed"] = "true"
     
-    db.commit()
-    db.refresh(payment)
-    
-    return PaymentResponse.model_validate(payment)
+    return PaymentResponse.model_validate(applied.payment)
 
 @router.get("/payments/{payment_id}", response_model=PaymentResponse)
 async def get_payment_by_id(
@@ -358,3 +473,192 @@ async def get_payment_by_id(
         )
     
     return PaymentResponse.model_validate(payment)
+
+# Bank reconciliation endpoints
+@router.post("/reconciliation/import", response_model=ReconciliationImportResponse)
+async def import_bank_payments(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, pattern="^(csv|ofx)$"),
+    batch_size: int = Query(reconciliation.DEFAULT_BATCH_SIZE, ge=1, le=10000),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Import bank/lockbox payment file (CSV or OFX, streamed and matched by invoice number)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    # Only admin and lawyers can import payments
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin and lawyers can import payments"
+        )
+    
+    if not file_format:
+        head = await file.read(4096)
+        await file.seek(0)
+        file_format = reconciliation.detect_format(file.filename, head)
+    
+    # Lawyers can only apply payments to their own invoices
+    lawyer_id = current_user.id if current_user.role == "lawyer" else None
+    
+    try:
+        result = await run_in_threadpool(
+            reconciliation.import_bank_file, db, file.file, file_format,
+            recorded_by=current_user.id, lawyer_id=lawyer_id, batch_size=batch_size
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return ReconciliationImportResponse(
+        import_id=result.import_id,
+        file_format=result.file_format,
+        total_lines=result.total_lines,
+        matched_lines=result.matched_lines,
+        payments_created=result.payments_created,
+        duplicate_lines=result.duplicate_lines,
+        exception_lines=result.exception_lines,
+        invoices_updated=len(result.invoices_updated),
+        amount_applied=result.amount_applied,
+        elapsed_seconds=result.elapsed_seconds,
+        exceptions_url=f"/api/billing/reconciliation/{result.import_id}/exceptions"
+    )
+
+@router.get("/reconciliation/{import_id}/exceptions")
+async def get_reconciliation_exceptions(
+    import_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Download exceptions report (Unmatched or rejected lines of an import)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    report = reconciliation.find_report(import_id)
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Exceptions report not found"
+        )
+    path, imported_by = report
+    
+    # Lawyers can only see the reports of their own imports
+    if current_user.role == "lawyer" and imported_by != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return FileResponse(path, media_type="text/csv", filename=f"reconciliation-{import_id}-exceptions.csv")
+
+# Billing run endpoints
+@router.post("/runs", response_model=BillingRunResponse)
+async def start_billing_run(
+    run_data: BillingRunCreate,
+    background_tasks: BackgroundTasks,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Start billing run (Invoices from unbilled activities, runs in background)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    # Only admin and lawyers can start billing runs
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin and lawyers can start billing runs"
+        )
+    
+    if run_data.period_end < run_data.period_start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="period_end must not be before period_start"
+        )
+    
+    # Lawyers can only bill their own time
+    lawyer_id = current_user.id if current_user.role == "lawyer" else run_data.lawyer_id
+    
+    run = create_billing_run(
+        db,
+        period_start=run_data.period_start,
+        period_end=run_data.period_end,
+        created_by=current_user.id,
+        lawyer_id=lawyer_id,
+        due_in_days=run_data.due_in_days
+    )
+    if claim_billing_run(db, run.run_id):
+        background_tasks.add_task(execute_billing_run, run.run_id, run_data.max_workers)
+    db.refresh(run)
+    
+    return BillingRunResponse.model_validate(run)
+
+def _get_billing_run(run_id: int, current_user, db: Session) -> BillingRun:
+    run = db.query(BillingRun).filter(BillingRun.run_id == run_id).first()
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Billing run not found"
+        )
+    
+    # Check access permissions
+    if current_user.role == "client" or (current_user.role == "lawyer" and run.lawyer_id != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    return run
+
+@router.get("/runs/{run_id}", response_model=BillingRunResponse)
+async def get_billing_run(
+    run_id: int,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Get billing run progress"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    run = _get_billing_run(run_id, current_user, db)
+    
+    return BillingRunResponse.model_validate(run)
+
+@router.post("/runs/{run_id}/resume", response_model=BillingRunResponse)
+async def resume_billing_run(
+    run_id: int,
+    background_tasks: BackgroundTasks,
+    max_workers: int = Query(4, ge=1, le=16),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Resume an interrupted or failed billing run from its last checkpoint"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    run = _get_billing_run(run_id, current_user, db)
+    
+    if run.status == "completed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Billing run already completed"
+        )
+    
+    # Only one execution at a time; a concurrent resume loses the claim
+    if not claim_billing_run(db, run.run_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Billing run is already running"
+        )
+    db.refresh(run)
+    
+    # Groups already invoiced have no unbilled activities left, so re-running is safe
+    background_tasks.add_task(execute_billing_run, run.run_id, max_workers)
+    
+    return BillingRunResponse.model_validate(run)
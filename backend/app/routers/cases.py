@@ -3,30 +3,27 @@ Cases router - Case management endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, read_connection
 from app.core.security import get_current_user
+from app.core.invalidation import invalidate
 from app.models.case import Case
+from app.models.document import Document
 from app.schemas.case import CaseResponse, CaseCreate, CaseUpdate
+from app.services.exports import export_response
+from app.services import document_acl
+from app.services.archives import available_documents, zip_response
+from app.services.audit import audit_log
 
 router = APIRouter()
 security = HTTPBearer()
 
-@router.get("/", response_model=List[CaseResponse])
-async def get_cases(
-    status_filter: Optional[str] = Query(None, alias="status"),
-    priority: Optional[str] = Query(None),
-    lawyer_id: Optional[int] = Query(None),
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    """Get all cases (filtered by user role)"""
-    
-    current_user = get_current_user(credentials.credentials, db)
-    
+def _cases_query(db: Session, current_user, status_filter: Optional[str] = None,
+                 priority: Optional[str] = None, lawyer_id: Optional[int] = None):
     query = db.query(Case)
     
     # Role-based filtering
@@ -45,10 +42,44 @@ async def get_cases(
         query = query.filter(Case.priority_level == priority)
     if lawyer_id:
         query = query.filter(Case.primary_lawyer_id == lawyer_id)
+    return query
+
+@router.get("/", response_model=List[CaseResponse])
+async def get_cases(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    priority: Optional[str] = Query(None),
+    lawyer_id: Optional[int] = Query(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Get all cases (filtered by user role)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    query = _cases_query(db, current_user, status_filter, priority, lawyer_id)
     
     cases = query.all()
     return [CaseResponse.model_validate(case) for case in cases]
 
+@router.get("/export")
+async def export_cases(
+    request: Request,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    priority: Optional[str] = Query(None),
+    lawyer_id: Optional[int] = Query(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+):
+    """Export cases as streamed CSV or NDJSON (Same filters as list)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    query = _cases_query(db, current_user, status_filter, priority, lawyer_id)
+    
+    statement = query.with_entities(*Case.__table__.columns).order_by(Case.case_id).statement
+    return export_response(lambda: read_connection(request), statement, export_format, "cases")
+
 @router.get("/statistics")
 async def get_case_statistics(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -116,6 +147,45 @@ async def get_case_by_id(
     
     return CaseResponse.model_validate(case)
 
+@router.get("/{case_id}/documents.zip")
+async def download_case_documents(
+    case_id: int,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Stream a ZIP of every case document the caller may download"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    case = db.query(Case).filter(Case.case_id == case_id).first()
+    if not case:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Case not found"
+        )
+    
+    query = db.query(Document).filter(Document.case_id == case_id, Document.status == "active")
+    documents = document_acl.filter_accessible(query, current_user, "download") \
+        .order_by(Document.document_type, Document.document_id).all()
+    # A missing blob would abort the stream halfway; leave it out instead
+    documents = await run_in_threadpool(available_documents, documents)
+    if not documents:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No documents available for download"
+        )
+    
+    for document in documents:
+        audit_log.record(
+            document.document_id, current_user.id, "download",
+            case_id=case_id,
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+        )
+    
+    return zip_response(documents, f"{case.case_number or f'case-{case_id}'}-documents.zip")
+
 @router.post("/", response_model=CaseResponse)
 async def create_case(
     case_data: CaseCreate,
@@ -137,6 +207,7 @@ async def create_case(
     case = Case(**case_data.model_dump())
     db.add(case)
     db.commit()
+    invalidate("cases", "dashboard")
     db.refresh(case)
     
     return CaseResponse.model_validate(case)
@@ -173,6 +244,7 @@ async def update_case(
         setattr(case, field, value)
     
     db.commit()
+    invalidate(f"case:{case_id}", "cases", "dashboard")
     db.refresh(case)
     
     return CaseResponse.model_validate(case)
@@ -203,6 +275,7 @@ async def delete_case(
     
     db.delete(case)
     db.commit()
+    invalidate(f"case:{case_id}", "cases", "dashboard")
     
     return {"message": "Case deleted successfully"}
 
@@ -236,9 +309,12 @@ async def assign_lawyer_to_case(
     
     if role == "primary":
         case.primary_lawyer_id = lawyer_id
+        # Document access follows the primary lawyer
+        document_acl.reindex_case(db, case_id)
     # In full implementation, handle secondary lawyers via separate table
     
     db.commit()
+    invalidate(f"case:{case_id}", "cases")
     db.refresh(case)
     
     return {"message": f"Lawyer {lawyer_id} assigned as {role} lawyer to case {case_id}"}
\ No newline at end of file
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.invalidation import invalidate
 from app.models.user import User
 from app.models.client import Client
 from app.schemas.client import ClientResponse, ClientCreate, ClientUpdate
@@ -109,6 +110,7 @@ async def create_client(
     client = Client(**client_data.model_dump())
     db.add(client)
     db.commit()
+    invalidate("clients", "dashboard")
     db.refresh(client)
     
     return ClientResponse.model_validate(client)
@@ -145,6 +147,7 @@ async def update_client(
         setattr(client, field, value)
     
     db.commit()
+    invalidate(f"client:{client_id}", "clients")
     db.refresh(client)
     
     return ClientResponse.model_validate(client)
@@ -175,5 +178,6 @@ async def delete_client(
     
     db.delete(client)
     db.commit()
+    invalidate(f"client:{client_id}", "clients", "dashboard")
     
     return {"message": "Client profile deleted successfully"}
\ No newline at end of file
@@ -8,7 +8,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.lawyer import Lawyer
@@ -21,7 +21,7 @@ security = HTTPBearer()
 @router.get("/stats")
 async def get_dashboard_stats(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Dashboard statistics - KPIs, recent activities, alerts"""
     
@@ -90,7 +90,7 @@ async def get_dashboard_stats(
 async def get_recent_activity(
     limit: int = 10,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get recent activity"""
     
@@ -126,7 +126,7 @@ async def get_recent_activity(
 async def get_upcoming_deadlines(
     days: int = 7,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get upcoming deadlines"""
     
@@ -171,7 +171,7 @@ async def get_upcoming_deadlines(
 @router.get("/case-distribution")
 async def get_case_distribution(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get case distribution by type and status"""
     
@@ -3,24 +3,178 @@ Documents router - Document management endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query, UploadFile, File
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 from sqlalchemy.orm import Session
+from datetime import datetime
 import os
-import uuid
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import get_current_user
-from app.models.document import Document
-from app.schemas.document import DocumentResponse, DocumentCreate, DocumentUpdate, DocumentShare
+from app.models.audit import DocumentAccessLog
+from app.models.document import Document, DocumentGrant, DocumentVersion, UploadSession
+from app.models.user import User
+from app.schemas.document import (
+    DocumentResponse, DocumentCreate, DocumentUpdate, DocumentShare, DocumentGrantResponse, DocumentAccessLogResponse,
+    DocumentSavingsResponse, TieringRunResponse, TieringStatsResponse, DocumentVersionResponse,
+    DownloadUrlResponse, UploadSessionCreate, UploadSessionResponse
+)
+from app.services.audit import audit_log
+from app.services import confidential, document_acl, encryption, signed_urls, tiering, uploads, versions
+from app.services.ingest import image_normalizer, savings_by_type
+from app.services.imaging import PENDING, READY, placeholder_svg
+from app.services.previews import derivative_file, initial_status, preview_generator
+from app.services.storage import storage
 
 router = APIRouter()
 security = HTTPBearer()
 
-# Configure upload directory
-UPLOAD_DIR = "uploads/documents"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+ALLOWED_TYPES = {
+    'application/pdf', 'image/jpeg', 'image/png', 'image/gif',
+    'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'text/plain'
+}
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB for single-request uploads
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+def _get_document(db: Session, current_user, document_id: int, permission: str) -> Document:
+    """Load a document and check the caller holds `permission` on it"""
+    document = db.query(Document).filter(Document.document_id == document_id).first()
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    if not document_acl.has_permission(db, current_user, document_id, permission):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return document
+
+def _record_access(request: Request, document: Document, user_id: int, action: str):
+    audit_log.record(
+        document.document_id, user_id, action,
+        case_id=document.case_id,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+
+def _check_file_type(content_type: Optional[str]):
+    if content_type not in ALLOWED_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type {content_type} not allowed"
+        )
+
+class _FileTooLarge(Exception):
+    pass
+
+async def _stored_upload(document_name: str, file_path: str, mime_type: str, file_size: int,
+                         encrypted: bool = False) -> dict:
+    """Document columns for a blob already in storage, after upload normalization"""
+    upload = {
+        "document_name": document_name,
+        "file_path": file_path,
+        "file_size": file_size,
+        "mime_type": mime_type,
+        "original_size": None,
+        "original_path": None,
+        "is_encrypted": encrypted,
+    }
+    
+    # Camera scans are downscaled and recompressed in the ingest pool, off the event loop
+    # (not confidential ones - the pool would need them in plaintext - and only on local storage)
+    if settings.INGEST_NORMALIZE_IMAGES and not encrypted and storage.local:
+        normalized = await image_normalizer.normalize(storage.local_path(file_path), mime_type)
+        if normalized:
+            if normalized.mime_type != mime_type:
+                upload["document_name"] = os.path.splitext(document_name)[0] + ".jpg"
+            upload.update(
+                file_path=storage.key_for(normalized.file_path),
+                file_size=normalized.file_size,
+                mime_type=normalized.mime_type,
+                original_size=upload["file_size"],
+                original_path=normalized.original_path,
+            )
+    
+    return upload
+
+async def _save_upload(file: UploadFile, encrypt: bool = False) -> dict:
+    """Validate and store a single-request upload; returns the Document columns describing it
+
+    Confidential uploads are encrypted block by block as they are written.
+    """
+    
+    _check_file_type(file.content_type)
+    
+    file_path = storage.new_key(file.filename)
+    
+    # Save file, checking the size limit (10MB - larger files go through /uploads sessions) as it streams
+    try:
+        size = await run_in_threadpool(_write_upload, file.file, file_path, encrypt)
+    except _FileTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File size exceeds 10MB limit"
+        )
+    
+    return await _stored_upload(file.filename, file_path, file.content_type, size, encrypted=encrypt)
+
+def _write_upload(source, file_path: str, encrypt: bool) -> int:
+    """Copy the spooled upload into storage; an oversized file is never published"""
+    size = 0
+    with storage.open_write(file_path) as f:
+        writer = encryption.EncryptingWriter(f) if encrypt else f
+        while block := source.read(UPLOAD_BLOCK_SIZE):
+            size += len(block)
+            if size > MAX_FILE_SIZE:
+                raise _FileTooLarge()
+            writer.write(block)
+        if encrypt:
+            writer.finish()
+    return size
+
+def _create_document(db: Session, current_user, upload: dict, **values) -> Document:
+    """Insert a Document for a stored upload, index its access and start its first version"""
+    document = Document(
+        uploaded_by=current_user.id,
+        preview_status=initial_status(upload["mime_type"], upload["is_encrypted"]),
+        **values,
+        **upload
+    )
+    
+    db.add(document)
+    db.flush()
+    document_acl.index_document(db, document.document_id)
+    versions.create_initial_version(db, document)
+    return document
+
+async def _audit_query(db: Session, document_id: Optional[int], user_id: Optional[int], action: Optional[str],
+                 since: Optional[datetime], until: Optional[datetime], skip: int, limit: int):
+    # Events still in the in-memory buffer are written first so the answer is complete
+    await run_in_threadpool(audit_log.flush)
+    
+    query = db.query(DocumentAccessLog)
+    if document_id:
+        query = query.filter(DocumentAccessLog.document_id == document_id)
+    if user_id:
+        query = query.filter(DocumentAccessLog.user_id == user_id)
+    if action:
+        query = query.filter(DocumentAccessLog.action == action)
+    if since:
+        query = query.filter(DocumentAccessLog.occurred_at >= since)
+    if until:
+        query = query.filter(DocumentAccessLog.occurred_at < until)
+    
+    return query.order_by(DocumentAccessLog.occurred_at.desc(), DocumentAccessLog.log_id.desc()) \
+        .offset(skip).limit(limit).all()
 
 @router.get("/", response_model=List[DocumentResponse])
 async def get_documents(
@@ -35,15 +189,8 @@ async def get_documents(
     
     query = db.query(Document).filter(Document.status == "active")
     
-    # Role-based filtering
-    if current_user.role == "client":
-        # Clients can only see documents for their cases
-        from app.models.case import Case
-        query = query.join(Case).filter(Case.client_id == current_user.id)
-    elif current_user.role == "lawyer":
-        # Lawyers can see documents for their assigned cases
-        # For now, show all - in full implementation, filter by case assignments
-        pass
+    # Documents the caller can access through their cases, uploads or grants
+    query = document_acl.filter_accessible(query, current_user)
     
     # Apply filters
     if case_id:
@@ -53,10 +200,6 @@ async def get_documents(
     
     documents = query.order_by(Document.created_at.desc()).all()
     
-    # Add computed properties
-    for doc in documents:
-        doc.file_size_mb = doc.file_size_mb
-    
     return [DocumentResponse.model_validate(doc) for doc in documents]
 
 @router.post("/", response_model=DocumentResponse)
@@ -82,64 +225,335 @@ async def upload_document(
             detail="Only admin and lawyers can upload documents"
         )
     
-    # Validate file type
-    allowed_types = {
-        'application/pdf', 'image/jpeg', 'image/png', 'image/gif',
-        'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        'text/plain'
-    }
+    upload = await _save_upload(file, encrypt=is_confidential)
     
-    if file.content_type not in allowed_types:
+    # Create document record
+    document = _create_document(
+        db, current_user, upload,
+        case_id=case_id,
+        document_type=document_type,
+        access_level=access_level,
+        is_confidential=is_confidential,
+        description=description,
+        tags=tags
+    )
+    db.commit()
+    db.refresh(document)
+    
+    # Thumbnail and preview are rendered in the background
+    if document.preview_status == PENDING:
+        preview_generator.request(document)
+    
+    return DocumentResponse.model_validate(document)
+
+@router.get("/audit/", response_model=List[DocumentAccessLogResponse])
+async def get_access_log(
+    document_id: Optional[int] = Query(None),
+    user_id: Optional[int] = Query(None),
+    action: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="UTC, inclusive"),
+    until: Optional[datetime] = Query(None, description="UTC, exclusive"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Document access audit trail by document, user and time range"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role != "admin":
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type {file.content_type} not allowed"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can view the firm-wide audit log"
         )
     
-    # Check file size (limit to 10MB)
-    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-    file_content = await file.read()
-    if len(file_content) > MAX_FILE_SIZE:
+    return await _audit_query(db, document_id, user_id, action, since, until, skip, limit)
+
+@router.get("/ingest/savings", response_model=List[DocumentSavingsResponse])
+async def get_ingest_savings(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Bytes saved by upload normalization, per document type"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role != "admin":
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File size exceeds 10MB limit"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can view storage savings"
         )
     
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
+    return savings_by_type(db)
+
+@router.post("/tiering/run", response_model=TieringRunResponse)
+async def run_tiering(
+    older_than_days: int = Query(settings.TIERING_AGE_DAYS, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Compress aged documents and documents of closed cases"""
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_content)
+    current_user = get_current_user(credentials.credentials, db)
     
-    # Create document record
-    document = Document(
-        case_id=case_id,
-        uploaded_by=current_user.id,
-        document_name=file.filename,
-        document_type=document_type,
-        file_path=file_path,
-        file_size=len(file_content),
-        mime_type=file.content_type,
-        access_level=access_level,
-        is_confidential=is_confidential,
-        description=description,
-        tags=tags
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can run document tiering"
+        )
+    
+    result = await run_in_threadpool(
+        tiering.tier_documents, db, older_than_days, settings.TIERING_CASE_STATUSES.split(","),
+        codec=settings.TIERING_CODEC, level=settings.TIERING_LEVEL,
+        min_saving=settings.TIERING_MIN_SAVING, limit=limit
     )
     
-    db.add(document)
+    return TieringRunResponse(
+        compressed=result.compressed,
+        incompressible=result.incompressible,
+        missing=result.missing,
+        bytes_reclaimed=result.bytes_reclaimed
+    )
+
+@router.get("/tiering/stats", response_model=TieringStatsResponse)
+async def get_tiering_stats(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Space reclaimed by the compression tier and the latency of cold reads"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can view tiering statistics"
+        )
+    
+    return tiering.tiering_stats(db)
+
+@router.post("/permissions/rebuild")
+async def rebuild_permission_index(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Recompute the effective-permission index (after bulk imports or direct database edits)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can rebuild document permissions"
+        )
+    
+    document_acl.rebuild_index(db)
     db.commit()
+    
+    return {"message": "Document permission index rebuilt"}
+
+def _get_upload_session(db: Session, user, upload_id: str) -> UploadSession:
+    """Load an upload session visible to the user (its creator, or an admin)"""
+    session = db.query(UploadSession).filter(UploadSession.upload_id == upload_id).first()
+    if not session or (session.created_by != user.id and user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+    return session
+
+def _session_response(session: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        upload_id=session.upload_id,
+        offset=session.received,
+        total_size=session.total_size,
+        status=session.status,
+        expires_at=session.expires_at,
+        chunk_max_bytes=settings.UPLOAD_CHUNK_MAX_MB * 1024 * 1024,
+        document_id=session.document_id
+    )
+
+def _upload_error(e: uploads.UploadError) -> HTTPException:
+    if isinstance(e, uploads.OffsetMismatch):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers={"Upload-Offset": str(e.expected)}
+        )
+    status_code = {
+        uploads.ChunkTooLarge: status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        uploads.SessionClosed: status.HTTP_410_GONE,
+        uploads.IncompleteUpload: status.HTTP_409_CONFLICT,
+        uploads.ChecksumMismatch: status.HTTP_422_UNPROCESSABLE_ENTITY,
+        uploads.PartMissing: status.HTTP_409_CONFLICT,
+    }.get(type(e), status.HTTP_400_BAD_REQUEST)
+    return HTTPException(status_code=status_code, detail=str(e))
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    upload: UploadSessionCreate,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Start a resumable upload for a file too large for a single request"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin and lawyers can upload documents"
+        )
+    
+    _check_file_type(upload.mime_type)
+    
+    if upload.total_size > settings.UPLOAD_MAX_SIZE_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds {settings.UPLOAD_MAX_SIZE_MB}MB limit"
+        )
+    
+    if uploads.open_session_count(db, current_user.id) >= settings.UPLOAD_MAX_OPEN_SESSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many unfinished uploads; finish or cancel one first"
+        )
+    
+    session = uploads.create_session(
+        db, current_user.id,
+        case_id=upload.case_id,
+        document_name=os.path.basename(upload.file_name),
+        document_type=upload.document_type,
+        mime_type=upload.mime_type,
+        access_level=upload.access_level,
+        is_confidential=upload.is_confidential,
+        description=upload.description,
+        tags=upload.tags,
+        total_size=upload.total_size,
+        sha256=upload.sha256.lower() if upload.sha256 else None
+    )
+    
+    return _session_response(session)
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    upload_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Committed offset of an upload - where a client resumes after a dropped connection"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    return _session_response(_get_upload_session(db, current_user, upload_id))
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Append the raw request body at `offset` (must equal the committed offset)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    session = _get_upload_session(db, current_user, upload_id)
+    
+    # Refuse an oversized chunk before reading any of it
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.UPLOAD_CHUNK_MAX_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Chunks are limited to {settings.UPLOAD_CHUNK_MAX_MB}MB"
+        )
+    
+    try:
+        await uploads.write_chunk(db, session, offset, request.stream())
+    except uploads.UploadError as e:
+        raise _upload_error(e)
+    except ClientDisconnect:
+        # Nobody is listening; the received bytes were committed for the retry
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+    
+    return _session_response(session)
+
+@router.post("/uploads/{upload_id}/finalize", response_model=DocumentResponse)
+async def finalize_upload(
+    upload_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Turn a fully received upload into a document (safe to retry)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    session = _get_upload_session(db, current_user, upload_id)
+    
+    # A retried finalize whose response was lost gets the same document back
+    if session.status == uploads.COMPLETED and session.document_id:
+        return DocumentResponse.model_validate(_get_document(db, current_user, session.document_id, "view"))
+    
+    destination = storage.new_key(session.document_name)
+    try:
+        await uploads.claim_file(db, session, destination, encrypt=bool(session.is_confidential))
+    except uploads.UploadError as e:
+        raise _upload_error(e)
+    
+    try:
+        upload = await _stored_upload(session.document_name, destination, session.mime_type,
+                                      session.total_size, encrypted=bool(session.is_confidential))
+        document = _create_document(
+            db, current_user, upload,
+            case_id=session.case_id,
+            document_type=session.document_type,
+            access_level=session.access_level,
+            is_confidential=session.is_confidential,
+            description=session.description,
+            tags=session.tags
+        )
+        uploads.complete(session, document.document_id)
+        db.commit()
+    except Exception:
+        uploads.release(db, session, destination)
+        raise
+    uploads.remove_part(session.upload_id)
     db.refresh(document)
     
-    # Add computed properties
-    document.file_size_mb = document.file_size_mb
+    if document.preview_status == PENDING:
+        preview_generator.request(document)
     
     return DocumentResponse.model_validate(document)
 
+@router.delete("/uploads/{upload_id}")
+async def cancel_upload(
+    upload_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Abandon an unfinished upload and free its disk space"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    session = _get_upload_session(db, current_user, upload_id)
+    
+    if session.status == uploads.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload already finalized"
+        )
+    
+    uploads.abort(db, session)
+    
+    return {"message": "Upload cancelled"}
+
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document_by_id(
     document_id: int,
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -147,31 +561,16 @@ async def get_document_by_id(
     
     current_user = get_current_user(credentials.credentials, db)
     
-    document = db.query(Document).filter(Document.document_id == document_id).first()
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
-    
-    # Check access permissions
-    if current_user.role == "client":
-        from app.models.case import Case
-        case = db.query(Case).filter(Case.case_id == document.case_id).first()
-        if not case or case.client_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+    document = _get_document(db, current_user, document_id, "view")
     
-    # Add computed properties
-    document.file_size_mb = document.file_size_mb
+    _record_access(request, document, current_user.id, "view")
     
     return DocumentResponse.model_validate(document)
 
 @router.get("/{document_id}/download")
 async def download_document(
     document_id: int,
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -179,56 +578,227 @@ async def download_document(
     
     current_user = get_current_user(credentials.credentials, db)
     
-    document = db.query(Document).filter(Document.document_id == document_id).first()
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
-    
-    # Check access permissions
-    if current_user.role == "client":
-        from app.models.case import Case
-        case = db.query(Case).filter(Case.case_id == document.case_id).first()
-        if not case or case.client_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+    document = _get_document(db, current_user, document_id, "download")
     
     # Check if file exists
-    if not os.path.exists(document.file_path):
+    if not tiering.blob_exists(document):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
-    # TODO: Add audit logging here
+    _record_access(request, document, current_user.id, "download")
+    
+    # Tiered blobs are decompressed, encrypted ones decrypted and object-storage ones
+    # relayed while streaming (in the threadpool)
+    if document.storage_codec or document.is_encrypted or not storage.local:
+        return tiering.content_response(document, request.headers.get("range"))
     
     return FileResponse(
-        path=document.file_path,
+        path=storage.local_path(document.file_path),
         filename=document.document_name,
         media_type=document.mime_type
     )
 
-@router.put("/{document_id}", response_model=DocumentResponse)
-async def update_document(
+@router.post("/{document_id}/download-url", response_model=DownloadUrlResponse)
+async def create_download_url(
     document_id: int,
-    document_update: DocumentUpdate,
+    request: Request,
+    expires_in: Optional[int] = Query(None, ge=1, description="Seconds, capped at DOWNLOAD_URL_TTL_SECONDS"),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
-    """Update document metadata"""
+    """Issue a signed, expiring link that downloads the document without further checks"""
     
     current_user = get_current_user(credentials.credentials, db)
     
-    document = db.query(Document).filter(Document.document_id == document_id).first()
-    if not document:
+    document = _get_document(db, current_user, document_id, "download")
+    
+    if not tiering.blob_exists(document):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
+            detail="File not found"
+        )
+    
+    # The download itself is audited when the link is used
+    token, expires = signed_urls.issue(document, current_user.id, expires_in)
+    
+    return DownloadUrlResponse(
+        url=str(request.url_for("download_signed_file", token=token)),
+        expires_at=datetime.utcfromtimestamp(expires)
+    )
+
+@router.get("/{document_id}/preview")
+async def get_document_preview(
+    document_id: int,
+    request: Request,
+    size: str = Query("thumb", pattern="^(thumb|preview)$"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Document thumbnail or first-page preview (placeholder until generated)"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    document = _get_document(db, current_user, document_id, "view")
+    
+    path = derivative_file(document.file_path, size)
+    if document.preview_status == READY and path and os.path.exists(path):
+        stat = os.stat(path)
+        etag = f'"{document_id}-{size}-{int(stat.st_mtime)}-{stat.st_size}"'
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return FileResponse(path, media_type="image/jpeg", headers=headers)
+    
+    # Resubmit jobs lost to a restart (or a missing derivative file)
+    pending = document.preview_status in (PENDING, READY)
+    if pending and not preview_generator.is_pending(document_id):
+        preview_generator.request(document)
+    
+    return Response(
+        content=placeholder_svg(document.mime_type, 256 if size == "thumb" else 1024, pending),
+        media_type="image/svg+xml",
+        headers={"Cache-Control": "no-store", "X-Preview-Status": document.preview_status or "unsupported"}
+    )
+
+@router.get("/{document_id}/versions", response_model=List[DocumentVersionResponse])
+async def get_document_versions(
+    document_id: int,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Version history of a document, newest first"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    document = _get_document(db, current_user, document_id, "view")
+    
+    history = db.query(DocumentVersion).filter(DocumentVersion.document_id == document_id) \
+        .order_by(DocumentVersion.version.desc()).all()
+    
+    return [
+        DocumentVersionResponse.model_validate(version).model_copy(
+            update={"is_current": version.version == document.version}
+        )
+        for version in history
+    ]
+
+@router.post("/{document_id}/versions", response_model=DocumentVersionResponse)
+async def upload_document_version(
+    document_id: int,
+    comment: Optional[str] = None,
+    file: UploadFile = File(...),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Upload new content for a document; the previous content is kept in its history"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin and lawyers can upload document versions"
+        )
+    
+    document = _get_document(db, current_user, document_id, "edit")
+    
+    if not tiering.blob_exists(document):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Current file not found"
+        )
+    
+    upload = await _save_upload(file, encrypt=bool(document.is_confidential))
+    try:
+        version = await versions.add_version(db, document, upload, current_user.id, comment=comment)
+    except versions.VersionConflict as e:
+        storage.delete(upload["file_path"])
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception:
+        storage.delete(upload["file_path"])
+        raise
+    
+    if document.preview_status == PENDING:
+        preview_generator.request(document)
+    
+    return DocumentVersionResponse.model_validate(version).model_copy(update={"is_current": True})
+
+@router.get("/{document_id}/versions/{version}/download")
+async def download_document_version(
+    document_id: int,
+    version: int,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Download one version of a document"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    document = _get_document(db, current_user, document_id, "download")
+    
+    if version == document.version:
+        return await download_document(document_id, request, credentials, db)
+    
+    stored = db.query(DocumentVersion).filter(
+        DocumentVersion.document_id == document_id, DocumentVersion.version == version
+    ).first()
+    if not stored or not stored.archived_at:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Version not found"
         )
     
+    _record_access(request, document, current_user.id, "download")
+    
+    return StreamingResponse(
+        versions.version_store.iter_version(db, stored),
+        media_type=stored.mime_type,
+        headers=tiering.attachment_headers(stored.document_name, stored.file_size)
+    )
+
+@router.get("/{document_id}/audit", response_model=List[DocumentAccessLogResponse])
+async def get_document_access_log(
+    document_id: int,
+    user_id: Optional[int] = Query(None),
+    action: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="UTC, inclusive"),
+    until: Optional[datetime] = Query(None, description="UTC, exclusive"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Access audit trail for one document"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin and lawyers can view the audit log"
+        )
+    
+    _get_document(db, current_user, document_id, "edit")
+    
+    return await _audit_query(db, document_id, user_id, action, since, until, skip, limit)
+
+@router.put("/{document_id}", response_model=DocumentResponse)
+async def update_document(
+    document_id: int,
+    document_update: DocumentUpdate,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Update document metadata"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
     # Check permissions
     if current_user.role == "client":
         raise HTTPException(
@@ -236,23 +806,25 @@ async def update_document(
             detail="Clients cannot update documents"
         )
     
+    document = _get_document(db, current_user, document_id, "edit")
+    
     # Update document fields
     update_data = document_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(document, field, value)
     
-    # Increment version
-    document.version += 1
+    # Metadata edits do not create a version - content does (POST /{document_id}/versions)
     
     db.commit()
     db.refresh(document)
     
-    # Add computed properties
-    document.file_size_mb = document.file_size_mb
+    # Newly confidential content is encrypted in place (streamed, in the threadpool)
+    if document.is_confidential and not document.is_encrypted:
+        await run_in_threadpool(confidential.encrypt_document, db, document)
     
     return DocumentResponse.model_validate(document)
 
-@router.post("/{document_id}/share")
+@router.post("/{document_id}/share", response_model=List[DocumentGrantResponse])
 async def share_document(
     document_id: int,
     share_data: DocumentShare,
@@ -270,21 +842,91 @@ async def share_document(
             detail="Only admin and lawyers can share documents"
         )
     
-    document = db.query(Document).filter(Document.document_id == document_id).first()
-    if not document:
+    document = _get_document(db, current_user, document_id, "edit")
+    
+    if not share_data.user_ids and not share_data.roles:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide user_ids or roles to share with"
+        )
+    invalid_roles = set(share_data.roles) - set(document_acl.GRANTABLE_ROLES)
+    if invalid_roles:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown roles: {', '.join(sorted(invalid_roles))}"
+        )
+    user_ids = set(share_data.user_ids)
+    found = {user_id for (user_id,) in db.query(User.user_id).filter(User.user_id.in_(user_ids))}
+    if found != user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown users: {', '.join(str(u) for u in sorted(user_ids - found))}"
+        )
+    
+    grants = document_acl.grant_access(
+        db, document, share_data.access_level,
+        user_ids=sorted(user_ids),
+        roles=sorted(set(share_data.roles)),
+        expires_at=share_data.expires_at,
+        granted_by=current_user.id
+    )
+    db.commit()
+    
+    return grants
+
+@router.get("/{document_id}/shares", response_model=List[DocumentGrantResponse])
+async def get_document_shares(
+    document_id: int,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """List grants on a document"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin and lawyers can view document shares"
+        )
+    
+    _get_document(db, current_user, document_id, "edit")
+    
+    return db.query(DocumentGrant).filter(DocumentGrant.document_id == document_id) \
+        .order_by(DocumentGrant.grant_id).all()
+
+@router.delete("/{document_id}/shares/{grant_id}")
+async def revoke_document_share(
+    document_id: int,
+    grant_id: int,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Revoke a grant"""
+    
+    current_user = get_current_user(credentials.credentials, db)
+    
+    if current_user.role not in ["admin", "lawyer"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin and lawyers can revoke document shares"
+        )
+    
+    _get_document(db, current_user, document_id, "edit")
+    
+    grant = db.query(DocumentGrant).filter(
+        DocumentGrant.grant_id == grant_id, DocumentGrant.document_id == document_id
+    ).first()
+    if not grant:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
+            detail="Share not found"
         )
     
-    # TODO: Implement document sharing logic with permissions table
-    # For now, return success message
+    document_acl.revoke_grant(db, grant)
+    db.commit()
     
-    return {
-        "message": f"Document shared with {len(share_data.user_ids)} users",
-        "shared_with": share_data.user_ids,
-        "access_level": share_data.access_level
-    }
+    return {"message": "Share revoked successfully"}
 
 @router.get("/search/")
 async def search_documents(
@@ -300,10 +942,8 @@ async def search_documents(
     
     query = db.query(Document).filter(Document.status == "active")
     
-    # Role-based filtering
-    if current_user.role == "client":
-        from app.models.case import Case
-        query = query.join(Case).filter(Case.client_id == current_user.id)
+    # Documents the caller can access through their cases, uploads or grants
+    query = document_acl.filter_accessible(query, current_user)
     
     # Search in document name, description, and tags
     search_filter = (
@@ -321,10 +961,6 @@ async def search_documents(
     
     documents = query.order_by(Document.created_at.desc()).all()
     
-    # Add computed properties
-    for doc in documents:
-        doc.file_size_mb = doc.file_size_mb
-    
     return {
         "query": q,
         "total_results": len(documents),
@@ -348,12 +984,7 @@ async def delete_document(
             detail="Only admin and lawyers can delete documents"
         )
     
-    document = db.query(Document).filter(Document.document_id == document_id).first()
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
+    document = _get_document(db, current_user, document_id, "edit")
     
     # Soft delete - mark as deleted
     document.status = "deleted"
@@ -0,0 +1,71 @@
+"""
+Signed download routes - no bearer token and no database session
+
+Links are issued by POST /api/documents/{id}/download-url after the usual
+permission check; see app.services.signed_urls.
+"""
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse, RedirectResponse, Response
+
+from app.services import signed_urls, tiering
+from app.services.audit import audit_log
+from app.services.storage import storage
+
+router = APIRouter()
+
+@router.get("/{token}")
+async def download_signed_file(token: str, request: Request):
+    """Download a document through a signed, expiring link (audited)"""
+    
+    try:
+        download = signed_urls.verify(token)
+    except signed_urls.LinkExpired as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e)
+        )
+    except signed_urls.SignedUrlError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e)
+        )
+    
+    download = signed_urls.resolve_blob(download)
+    if download is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found; request a new download link"
+        )
+    
+    # Buffered - the event reaches document_access_log without a round trip here
+    audit_log.record(
+        download.document_id, download.user_id, "download",
+        case_id=download.case_id,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    
+    # Links are personal and short-lived; keep shared caches out of it
+    no_store = {"Cache-Control": "private, no-store"}
+    
+    offload = signed_urls.offload_headers(download)
+    if offload:
+        # The proxy sends the bytes (and their length); this response carries headers only
+        headers = tiering.attachment_headers(download.document_name, None)
+        return Response(media_type=download.mime_type, headers={**headers, **no_store, **offload})
+    
+    presigned = signed_urls.presigned_url(download)
+    if presigned:
+        # The bucket serves the bytes (and ranges) directly
+        return RedirectResponse(presigned, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers=no_store)
+    
+    if download.storage_codec or download.is_encrypted or not storage.local:
+        return tiering.content_response(download.as_document(), request.headers.get("range"), no_store)
+    
+    return FileResponse(
+        path=storage.local_path(download.file_path),
+        filename=download.document_name,
+        media_type=download.mime_type,
+        headers=no_store
+    )
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.invalidation import invalidate
 from app.models.user import User
 from app.models.lawyer import Lawyer
 from app.schemas.lawyer import LawyerResponse, LawyerCreate, LawyerUpdate
@@ -91,6 +92,7 @@ async def create_lawyer(
     lawyer = Lawyer(**lawyer_data.model_dump())
     db.add(lawyer)
     db.commit()
+    invalidate("lawyers", "dashboard")
     db.refresh(lawyer)
     
     return LawyerResponse.model_validate(lawyer)
@@ -126,6 +128,7 @@ async def update_lawyer(
         setattr(lawyer, field, value)
     
     db.commit()
+    invalidate(f"lawyer:{lawyer_id}", "lawyers")
     db.refresh(lawyer)
     
     return LawyerResponse.model_validate(lawyer)
@@ -156,6 +159,7 @@ async def delete_lawyer(
     
     db.delete(lawyer)
     db.commit()
+    invalidate(f"lawyer:{lawyer_id}", "lawyers", "dashboard")
     
     return {"message": "Lawyer profile deleted successfully"}
 
@@ -0,0 +1,115 @@
+"""
+Notifications router - Email outbox administration endpoints
+"""
+
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models.notification import OutboxEmail
+from app.schemas.notification import OutboxEmailResponse, DeadlineRemindersResponse
+from app.services.outbox import enqueue_deadline_reminders, outbox_stats, outbox_worker
+
+router = APIRouter()
+security = HTTPBearer()
+
+def _require_admin(credentials: HTTPAuthorizationCredentials, db: Session):
+    current_user = get_current_user(credentials.credentials, db)
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can manage notifications"
+        )
+    return current_user
+
+@router.get("/outbox", response_model=List[OutboxEmailResponse])
+async def get_outbox(
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(pending|sending|sent|dead)$"),
+    category: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """List queued, sent and dead-lettered emails (newest first)"""
+
+    _require_admin(credentials, db)
+
+    query = db.query(OutboxEmail)
+    if status_filter:
+        query = query.filter(OutboxEmail.status == status_filter)
+    if category:
+        query = query.filter(OutboxEmail.category == category)
+
+    return query.order_by(OutboxEmail.email_id.desc()).offset(skip).limit(limit).all()
+
+@router.get("/outbox/stats")
+async def get_outbox_stats(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Queue depth and delivery metrics"""
+
+    _require_admin(credentials, db)
+
+    return {
+        "queue": outbox_stats(db),
+        "worker": outbox_worker.metrics()
+    }
+
+@router.post("/outbox/{email_id}/retry", response_model=OutboxEmailResponse)
+async def retry_email(
+    email_id: int,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Requeue a dead-lettered email with a fresh set of attempts"""
+
+    _require_admin(credentials, db)
+
+    email = db.query(OutboxEmail).filter(OutboxEmail.email_id == email_id).first()
+    if not email:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email not found"
+        )
+    if email.status != "dead":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only dead-lettered emails can be retried"
+        )
+    if email.attachment_path and not os.path.exists(email.attachment_path):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The attachment is no longer available; send the message again instead"
+        )
+
+    email.status = "pending"
+    email.attempts = 0
+    email.next_attempt_at = datetime.utcnow()
+    db.commit()
+    db.refresh(email)
+    outbox_worker.wake()
+
+    return email
+
+@router.post("/deadline-reminders", response_model=DeadlineRemindersResponse)
+async def queue_deadline_reminders(
+    days_ahead: int = Query(7, ge=0, le=90),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Queue reminders for pending deadlines due within days_ahead (safe to call repeatedly, e.g. from cron)"""
+
+    _require_admin(credentials, db)
+
+    queued = enqueue_deadline_reminders(db, days_ahead)
+    db.commit()
+    outbox_worker.wake()
+
+    return {"days_ahead": days_ahead, "queued": queued}
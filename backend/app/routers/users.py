@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.security import verify_token, get_current_user
+from app.core.invalidation import invalidate
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate, UserCreate
 
@@ -91,6 +92,7 @@ async def update_user(
         setattr(user, field, value)
     
     db.commit()
+    invalidate(f"user:{user_id}", "users", "dashboard")
     db.refresh(user)
     
     return UserResponse.model_validate(user)
@@ -122,6 +124,7 @@ async def delete_user(
     # Soft delete - mark as inactive
     user.is_active = False
     db.commit()
+    invalidate(f"user:{user_id}", "users", "dashboard")
     
     return {"message": "User deleted successfully"}
 
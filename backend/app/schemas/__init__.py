@@ -7,9 +7,10 @@ from .lawyer import LawyerCreate, LawyerUpdate, LawyerResponse
 from .client import ClientCreate, ClientUpdate, ClientResponse
 from .case import CaseCreate, CaseUpdate, CaseResponse
 from .deadline import DeadlineCreate, DeadlineUpdate, DeadlineResponse
-from .document import DocumentCreate, DocumentUpdate, DocumentResponse, DocumentUpload, DocumentShare
-from .billing import BillingCreate, BillingUpdate, BillingResponse, BillingSend, PaymentCreate, PaymentResponse
-from .activity import ActivityCreate, ActivityUpdate, ActivityResponse
+from .document import DocumentCreate, DocumentUpdate, DocumentResponse, DocumentUpload, DocumentShare, DocumentGrantResponse, DocumentAccessLogResponse, DocumentSavingsResponse, TieringRunResponse, TieringStatsResponse, DocumentVersionResponse, DownloadUrlResponse, UploadSessionCreate, UploadSessionResponse
+from .billing import BillingCreate, BillingUpdate, BillingResponse, BillingSend, PaymentCreate, PaymentResponse, BillingRunCreate, BillingRunResponse, ReconciliationImportResponse
+from .activity import ActivityCreate, ActivityUpdate, ActivityResponse, ActivityBulkCreate, ActivityBulkItemResult, ActivityBulkResponse
+from .notification import OutboxEmailResponse, DeadlineRemindersResponse
 
 __all__ = [
     "UserCreate", "UserUpdate", "UserResponse",
@@ -17,7 +18,10 @@ __all__ = [
     "ClientCreate", "ClientUpdate", "ClientResponse", 
     "CaseCreate", "CaseUpdate", "CaseResponse",
     "DeadlineCreate", "DeadlineUpdate", "DeadlineResponse",
-    "DocumentCreate", "DocumentUpdate", "DocumentResponse", "DocumentUpload", "DocumentShare",
+    "DocumentCreate", "DocumentUpdate", "DocumentResponse", "DocumentUpload", "DocumentShare", "DocumentGrantResponse", "DocumentAccessLogResponse", "DocumentSavingsResponse", "TieringRunResponse", "TieringStatsResponse", "DocumentVersionResponse", "DownloadUrlResponse", "UploadSessionCreate", "UploadSessionResponse",
     "BillingCreate", "BillingUpdate", "BillingResponse", "BillingSend", "PaymentCreate", "PaymentResponse",
-    "ActivityCreate", "ActivityUpdate", "ActivityResponse"
+    "BillingRunCreate", "BillingRunResponse", "ReconciliationImportResponse",
+    "ActivityCreate", "ActivityUpdate", "ActivityResponse",
+    "ActivityBulkCreate", "ActivityBulkItemResult", "ActivityBulkResponse",
+    "OutboxEmailResponse", "DeadlineRemindersResponse"
 ]
\ No newline at end of file
@@ -2,8 +2,8 @@
 Activity schemas for API requests and responses
 """
 
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from datetime import datetime
 from decimal import Decimal
 
@@ -20,6 +20,21 @@ class ActivityCreate(BaseModel):
     is_billable: bool = True
     hourly_rate: Optional[Decimal] = None
 
+class ActivityBulkCreate(BaseModel):
+    activities: List[ActivityCreate] = Field(..., min_length=1, max_length=5000)
+    atomic: bool = False  # reject the whole batch if any entry fails
+
+class ActivityBulkItemResult(BaseModel):
+    index: int
+    status: str  # created, failed, skipped
+    activity_id: Optional[int] = None
+    error: Optional[str] = None
+
+class ActivityBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[ActivityBulkItemResult]
+
 class ActivityUpdate(BaseModel):
     activity_type: Optional[str] = None
     title: Optional[str] = None
@@ -3,7 +3,7 @@ Billing schemas for API requests and responses
 """
 
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -99,6 +99,7 @@ class PaymentResponse(BaseModel):
     payment_method: str
     reference_number: Optional[str] = None
     notes: Optional[str] = None
+    idempotency_key: Optional[str] = None
     created_at: datetime
     recorded_by: Optional[int] = None
     
@@ -112,6 +113,49 @@ class PaymentResponse(BaseModel):
     def id(self):
         return self.payment_id
 
+class BillingRunCreate(BaseModel):
+    period_start: date
+    period_end: date
+    lawyer_id: Optional[int] = None  # None = all lawyers (admin only)
+    due_in_days: int = 30
+    max_workers: int = Field(4, ge=1, le=16)
+
+class BillingRunResponse(BaseModel):
+    run_id: int
+    period_start: date
+    period_end: date
+    lawyer_id: Optional[int] = None
+    due_in_days: int
+    status: str
+    total_groups: int
+    completed_groups: int
+    failed_groups: int
+    invoices_created: int
+    total_invoiced: Decimal
+    progress: float
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    created_by: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class ReconciliationImportResponse(BaseModel):
+    import_id: str
+    file_format: str
+    total_lines: int
+    matched_lines: int
+    payments_created: int
+    duplicate_lines: int
+    exception_lines: int
+    invoices_updated: int
+    amount_applied: Decimal
+    elapsed_seconds: float
+    exceptions_url: str
+
 # Import here to avoid circular import
 from app.schemas.case import CaseResponse
 from app.schemas.lawyer import LawyerResponse
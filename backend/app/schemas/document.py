@@ -3,7 +3,7 @@ Document schemas for API requests and responses
 """
 
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 class DocumentCreate(BaseModel):
@@ -37,10 +37,105 @@ class DocumentUpload(BaseModel):
     tags: Optional[str] = None
 
 class DocumentShare(BaseModel):
-    user_ids: list[int]
-    access_level: str = "view"  # view, edit, download
+    user_ids: list[int] = []
+    roles: list[str] = []  # admin, lawyer, client - shares with every user of the role
+    access_level: str = Field("view", pattern="^(view|download|edit)$")
     expires_at: Optional[datetime] = None
 
+class DocumentGrantResponse(BaseModel):
+    grant_id: int
+    document_id: int
+    user_id: Optional[int] = None
+    role: Optional[str] = None
+    permission: str
+    expires_at: Optional[datetime] = None
+    granted_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class DocumentAccessLogResponse(BaseModel):
+    log_id: int
+    document_id: int
+    case_id: Optional[int] = None
+    user_id: int
+    action: str
+    occurred_at: datetime
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class DocumentSavingsResponse(BaseModel):
+    document_type: str
+    documents: int
+    normalized: int
+    uploaded_bytes: int
+    stored_bytes: int
+    saved_bytes: int
+    saved_percent: float
+
+class TieringRunResponse(BaseModel):
+    compressed: int
+    incompressible: int
+    missing: int
+    bytes_reclaimed: int
+
+class TieringStatsResponse(BaseModel):
+    tiered_documents: int
+    logical_bytes: int
+    stored_bytes: int
+    bytes_reclaimed: int
+    codec: str
+    cold_reads: int
+    first_byte_ms_avg: Optional[float] = None
+    first_byte_ms_p95: Optional[float] = None
+    throughput_mb_s: Optional[float] = None
+
+class DocumentVersionResponse(BaseModel):
+    version_id: int
+    document_id: int
+    version: int
+    document_name: str
+    mime_type: Optional[str] = None
+    file_size: Optional[int] = None
+    content_hash: Optional[str] = None
+    comment: Optional[str] = None
+    uploaded_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+    is_current: bool = False
+
+    class Config:
+        from_attributes = True
+
+class DownloadUrlResponse(BaseModel):
+    url: str
+    expires_at: datetime
+
+class UploadSessionCreate(BaseModel):
+    case_id: int
+    document_type: str
+    file_name: str = Field(..., min_length=1, max_length=255)
+    mime_type: str
+    total_size: int = Field(..., gt=0)
+    access_level: str = "case"
+    is_confidential: bool = False
+    description: Optional[str] = None
+    tags: Optional[str] = None
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    offset: int
+    total_size: int
+    status: str
+    expires_at: datetime
+    chunk_max_bytes: int
+    document_id: Optional[int] = None
+
 class DocumentResponse(BaseModel):
     document_id: int
     case_id: int
@@ -57,6 +152,10 @@ class DocumentResponse(BaseModel):
     tags: Optional[str] = None
     version: int
     status: str
+    preview_status: Optional[str] = None
+    original_size: Optional[int] = None
+    storage_codec: Optional[str] = None
+    is_encrypted: Optional[bool] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
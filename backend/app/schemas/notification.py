@@ -0,0 +1,28 @@
+"""
+Notification schemas for API requests and responses
+"""
+
+from typing import Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+class OutboxEmailResponse(BaseModel):
+    email_id: int
+    to_address: str
+    cc_address: Optional[str] = None
+    subject: str
+    category: str
+    related_id: Optional[int] = None
+    status: str
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class DeadlineRemindersResponse(BaseModel):
+    days_ahead: int
+    queued: int
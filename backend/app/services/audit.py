@@ -0,0 +1,220 @@
+"""
+Buffered document access audit log
+
+Recording an access must not add a database round trip to the download it
+describes. `AuditLog.record` appends the event to an in-process buffer and
+returns; a background thread writes the buffer to the append-only
+`document_access_log` table with one bulk insert whenever it reaches
+`batch_size` events or the oldest event is `flush_interval` seconds old.
+
+Events are not lost when the database is unavailable: a failed batch is
+appended to a JSON-lines segment file in `spill_dir` and replayed by the next
+successful flush (of any worker). `stop()` flushes whatever is buffered, so a
+graceful shutdown keeps every recorded event. A segment left claimed by a
+worker that died mid-replay is put back once its claim is stale, at start or
+by a later flush.
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.audit import DocumentAccessLog
+
+logger = logging.getLogger(__name__)
+
+# A segment claimed for replay longer than this belongs to a worker that died mid-replay
+STALE_CLAIM_SECONDS = 300
+# How often a running flusher looks for such segments
+RECOVERY_INTERVAL_SECONDS = 60
+
+class AuditLog:
+    """Collect access events in memory and write them to the database in batches"""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int = 500,
+                 flush_interval: float = 1.0, spill_dir: Optional[str] = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir
+        self.recorded = 0
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.last_flush_ms = 0.0
+        self._buffer: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._full = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_recovery = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._recover_claimed()
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write everything still buffered"""
+        if self._thread is not None:
+            self._stop.set()
+            self._full.set()
+            self._thread.join(timeout=30)
+            self._thread = None
+        self.flush()
+
+    def record(self, document_id: int, user_id: int, action: str, case_id: Optional[int] = None,
+               ip_address: Optional[str] = None, user_agent: Optional[str] = None):
+        """Queue one access event; never touches the database"""
+        event = {
+            "document_id": document_id,
+            "case_id": case_id,
+            "user_id": user_id,
+            "action": action,
+            "occurred_at": datetime.utcnow(),
+            "ip_address": ip_address,
+            "user_agent": (user_agent or "")[:255] or None,
+        }
+        with self._lock:
+            self._buffer.append(event)
+            self.recorded += 1
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._full.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._full.wait(self.flush_interval)
+            self._full.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Audit log flush failed: {e}")
+
+    def _take(self) -> List[dict]:
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        return events
+
+    def flush(self) -> int:
+        """Write buffered events (and any spilled segments); returns the number written"""
+        with self._flush_lock:
+            events = self._take()
+            written = 0
+            if events:
+                started = time.perf_counter()
+                try:
+                    written += self._insert(events)
+                except Exception as e:
+                    logger.warning(f"Audit log write failed, spilling {len(events)} events to disk: {e}")
+                    self._spill(events)
+                    return 0
+                self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            try:
+                written += self._replay_spilled()
+            except Exception as e:
+                logger.warning(f"Replaying spilled audit events failed: {e}")
+            return written
+
+    def _insert(self, events: List[dict]) -> int:
+        db = self.session_factory()
+        try:
+            for offset in range(0, len(events), self.batch_size):
+                db.execute(insert(DocumentAccessLog), events[offset:offset + self.batch_size])
+                self.batches += 1
+            db.commit()
+        finally:
+            db.close()
+        self.written += len(events)
+        return len(events)
+
+    # Spill segments
+
+    def _spill(self, events: List[dict]):
+        if not self.spill_dir:
+            # Nowhere to spill; keep them for the next attempt
+            with self._lock:
+                self._buffer[:0] = events
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"audit-{os.getpid()}-{time.time_ns()}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps({**event, "occurred_at": event["occurred_at"].isoformat()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.spilled += len(events)
+
+    def _replay_spilled(self) -> int:
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return 0
+        if time.monotonic() >= self._next_recovery:
+            self._recover_claimed()
+        written = 0
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, "audit-*.jsonl"))):
+            # Claim the segment by renaming it so two workers never replay the same file
+            claimed = path + ".replaying"
+            try:
+                os.rename(path, claimed)
+                # Stamp the claim so a restart can tell it from one that is still in progress
+                os.utime(claimed)
+            except OSError:
+                continue
+            with open(claimed, encoding="utf-8") as f:
+                events = [json.loads(line) for line in f if line.strip()]
+            for event in events:
+                event["occurred_at"] = datetime.fromisoformat(event["occurred_at"])
+            try:
+                written += self._insert(events)
+            except Exception:
+                os.rename(claimed, path)
+                raise
+            os.remove(claimed)
+        return written
+
+    def _recover_claimed(self):
+        """Return segments whose replay was interrupted (the worker died) to the replay set"""
+        self._next_recovery = time.monotonic() + RECOVERY_INTERVAL_SECONDS
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return
+        cutoff = time.time() - STALE_CLAIM_SECONDS
+        for claimed in glob.glob(os.path.join(self.spill_dir, "audit-*.jsonl.replaying")):
+            try:
+                if os.path.getmtime(claimed) < cutoff:
+                    os.rename(claimed, claimed[:-len(".replaying")])
+                    logger.warning(f"Recovered interrupted audit replay {os.path.basename(claimed)}")
+            except OSError:
+                # Another worker recovered or finished it
+                continue
+
+    def metrics(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "buffered": len(self._buffer),
+            "batches": self.batches,
+            "spilled": self.spilled,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+# Application-wide audit log
+audit_log = AuditLog(
+    SessionLocal,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_SECONDS,
+    spill_dir=settings.AUDIT_SPILL_DIR,
+)
@@ -0,0 +1,257 @@
+"""
+Billing run engine - month-end invoice generation from unbilled activities
+
+Unbilled billable activities in the period are grouped by client, case and
+lawyer. Each group becomes one invoice: the Billing row, its line items
+(INSERT ... SELECT) and the billing_status flip (one UPDATE) commit together
+with the run's progress counters, so an interrupted run can be resumed by
+executing it again - finished groups no longer have unbilled activities.
+Lawyers are processed in parallel, each on its own session.
+
+One execution holds a run at a time. Every finished group refreshes the
+run's heartbeat; a "running" run whose heartbeat is older than
+BILLING_RUN_LEASE_SECONDS lost its executor (the worker was killed) and can
+be claimed again.
+"""
+
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Callable, List, Optional
+
+from sqlalchemy import and_, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.activity import Activity
+from app.models.billing import Billing, BillingRun, InvoiceLineItem
+from app.models.case import Case
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class InvoiceGroup:
+    client_id: int
+    case_id: int
+    lawyer_id: int
+    activity_count: int
+    hours: Decimal
+    amount: Decimal
+
+def _period_filter(run: BillingRun):
+    conditions = [
+        Activity.is_billable == True,
+        Activity.billing_status == "unbilled",
+        Activity.activity_date >= datetime.combine(run.period_start, time.min),
+        Activity.activity_date < datetime.combine(run.period_end + timedelta(days=1), time.min),
+    ]
+    if run.lawyer_id:
+        conditions.append(Activity.lawyer_id == run.lawyer_id)
+    return and_(*conditions)
+
+def _line_amount():
+    return Activity.hours_spent * func.coalesce(Activity.hourly_rate, 0)
+
+def pending_groups(db: Session, run: BillingRun) -> List[InvoiceGroup]:
+    """Aggregate the run's unbilled activities into invoice groups (one query)"""
+    rows = db.execute(
+        select(
+            Case.client_id,
+            Activity.case_id,
+            Activity.lawyer_id,
+            func.count(Activity.activity_id),
+            func.sum(Activity.hours_spent),
+            func.sum(_line_amount()),
+        )
+        .join(Case, Case.case_id == Activity.case_id)
+        .where(_period_filter(run))
+        .group_by(Case.client_id, Activity.case_id, Activity.lawyer_id)
+    ).all()
+    return [
+        InvoiceGroup(client_id, case_id, lawyer_id, count, Decimal(hours or 0), Decimal(amount or 0))
+        for client_id, case_id, lawyer_id, count, hours, amount in rows
+    ]
+
+def create_billing_run(db: Session, period_start: date, period_end: date, created_by: int,
+                       lawyer_id: Optional[int] = None, due_in_days: int = 30) -> BillingRun:
+    run = BillingRun(
+        period_start=period_start,
+        period_end=period_end,
+        lawyer_id=lawyer_id,
+        due_in_days=due_in_days,
+        status="pending",
+        created_by=created_by,
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+def _invoice_number(db: Session, base: str) -> str:
+    """`base`, or `base-<n>` when a resumed run meets the same group again after activities were added"""
+    # The prefix also matches other groups' numbers (INV-00001-1-2 vs INV-00001-1-23), so check the suffix
+    taken = [number[len(base) + 1:] for (number,) in db.query(Billing.invoice_number).filter(
+        Billing.invoice_number.like(f"{base}-%")
+    )]
+    suffixes = [int(suffix) for suffix in taken if suffix.isdigit()]
+    if suffixes:
+        return f"{base}-{max(suffixes) + 1}"
+    if db.query(Billing.billing_id).filter(Billing.invoice_number == base).first():
+        return f"{base}-2"
+    return base
+
+def _invoice_group(db: Session, run: BillingRun, group: InvoiceGroup) -> bool:
+    """Create one invoice and bill its activities; False if the activities changed underneath"""
+    hours = group.hours.quantize(Decimal("0.01"))
+    subtotal = group.amount.quantize(Decimal("0.01"))
+
+    invoice_number = _invoice_number(db, f"INV-{run.run_id:05d}-{group.case_id}-{group.lawyer_id}")
+    billing = Billing(
+        case_id=group.case_id,
+        lawyer_id=group.lawyer_id,
+        client_id=group.client_id,
+        invoice_number=invoice_number,
+        invoice_date=run.period_end,
+        due_date=run.period_end + timedelta(days=run.due_in_days),
+        hours_worked=hours,
+        hourly_rate=(subtotal / hours).quantize(Decimal("0.01")) if hours else Decimal("0.00"),
+        subtotal=subtotal,
+        tax_amount=Decimal("0.00"),
+        total_amount=subtotal,
+        status="pending",
+        description=f"Services rendered {run.period_start} to {run.period_end}",
+    )
+    db.add(billing)
+    db.flush()
+
+    group_filter = and_(
+        _period_filter(run),
+        Activity.case_id == group.case_id,
+        Activity.lawyer_id == group.lawyer_id,
+    )
+    db.execute(
+        insert(InvoiceLineItem).from_select(
+            ["billing_id", "activity_id", "description", "hours", "rate", "amount"],
+            select(
+                literal(billing.billing_id),
+                Activity.activity_id,
+                Activity.title,
+                Activity.hours_spent,
+                func.coalesce(Activity.hourly_rate, 0),
+                _line_amount(),
+            ).where(group_filter),
+        )
+    )
+    flipped = db.execute(
+        update(Activity)
+        .where(group_filter)
+        .values(billing_status="billed", billed_amount=_line_amount())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if flipped != group.activity_count:
+        db.rollback()
+        return False
+
+    db.execute(
+        update(BillingRun)
+        .where(BillingRun.run_id == run.run_id)
+        .values(
+            completed_groups=BillingRun.completed_groups + 1,
+            invoices_created=BillingRun.invoices_created + 1,
+            total_invoiced=BillingRun.total_invoiced + subtotal,
+            heartbeat_at=datetime.utcnow(),
+        )
+    )
+    db.commit()
+    return True
+
+def _record_failure(db: Session, run_id: int, message: str):
+    db.rollback()
+    db.execute(
+        update(BillingRun)
+        .where(BillingRun.run_id == run_id)
+        .values(failed_groups=BillingRun.failed_groups + 1, error=message[:2000], heartbeat_at=datetime.utcnow())
+    )
+    db.commit()
+
+def _invoice_lawyer(session_factory: Callable[[], Session], run_id: int, groups: List[InvoiceGroup]):
+    db = session_factory()
+    try:
+        run = db.get(BillingRun, run_id)
+        for group in groups:
+            try:
+                if not _invoice_group(db, run, group):
+                    _record_failure(db, run_id, f"Activities for case {group.case_id} changed during the run")
+            except Exception as e:
+                logger.exception(f"Billing run {run_id}: case {group.case_id} lawyer {group.lawyer_id} failed")
+                _record_failure(db, run_id, str(e))
+    finally:
+        db.close()
+
+def claim_billing_run(db: Session, run_id: int) -> bool:
+    """Mark a run as running unless it already is (or has completed); False if someone else holds it
+
+    A running run whose heartbeat lapsed is taken over.
+    """
+    now = datetime.utcnow()
+    abandoned = and_(
+        BillingRun.status == "running",
+        or_(BillingRun.heartbeat_at.is_(None),
+            BillingRun.heartbeat_at < now - timedelta(seconds=settings.BILLING_RUN_LEASE_SECONDS)),
+    )
+    claimed = db.execute(
+        update(BillingRun)
+        .where(BillingRun.run_id == run_id,
+               or_(BillingRun.status.notin_(("running", "completed")), abandoned))
+        .values(status="running", heartbeat_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return bool(claimed)
+
+def execute_billing_run(run_id: int, max_workers: int = 4,
+                        session_factory: Callable[[], Session] = SessionLocal) -> BillingRun:
+    """Invoice every pending group of the run; safe to call again to resume"""
+    db = session_factory()
+    try:
+        run = db.get(BillingRun, run_id)
+        groups = pending_groups(db, run)
+        run.status = "running"
+        run.heartbeat_at = datetime.utcnow()
+        run.failed_groups = 0
+        run.error = None
+        run.total_groups = run.completed_groups + len(groups)
+        db.commit()
+
+        by_lawyer = defaultdict(list)
+        for group in groups:
+            by_lawyer[group.lawyer_id].append(group)
+
+        logger.info(f"Billing run {run_id}: {len(groups)} invoices across {len(by_lawyer)} lawyers")
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(by_lawyer) or 1))) as executor:
+            futures = [
+                executor.submit(_invoice_lawyer, session_factory, run_id, lawyer_groups)
+                for lawyer_groups in by_lawyer.values()
+            ]
+            for future in futures:
+                future.result()
+
+        db.expire_all()
+        run = db.get(BillingRun, run_id)
+        run.status = "failed" if run.failed_groups else "completed"
+        run.completed_at = func.now()
+        db.commit()
+        db.refresh(run)
+        return run
+    except Exception as e:
+        logger.exception(f"Billing run {run_id} aborted")
+        db.rollback()
+        db.execute(update(BillingRun).where(BillingRun.run_id == run_id).values(status="failed", error=str(e)[:2000]))
+        db.commit()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,131 @@
+"""
+Content-defined chunking and the content-addressed chunk store
+
+Superseded document versions are split with FastCDC-style content-defined
+chunking: a gear rolling hash over the last 32 bytes picks cut points, so an
+edit only changes the chunks around it and the rest of a revised form hashes
+to chunks that are already stored. Chunks are blobs named by their SHA-256
+under the storage key `<prefix>/<aa>/<bb>/<hash>`, written through the
+storage driver (so every API server shares them on object storage) and
+never rewritten.
+Chunks of encrypted documents are sealed and named by a keyed hash instead
+(see `encryption`). Content is chunked as it streams in: a cut point depends
+on at most MAX_CHUNK bytes, so only that much is buffered, and a stream is cut
+exactly as the same bytes in one piece would be.
+
+Runs inside the version process pool, so it has no database imports.
+"""
+
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.services import encryption
+from app.services.storage import storage
+
+# Chunk sizes - a form revision typically changes a few chunks around each edit
+MIN_CHUNK = 4 * 1024
+AVG_CHUNK = 16 * 1024
+MAX_CHUNK = 64 * 1024
+
+# Gear table: one pseudo-random 32-bit value per byte, fixed so cut points are stable across releases
+GEAR = tuple(int.from_bytes(hashlib.sha256(bytes([value])).digest()[:4], "big") for value in range(256))
+
+def _masks(avg_size: int) -> Tuple[int, int]:
+    """Normalized chunking: a stricter mask before the average size, a looser one after"""
+    bits = avg_size.bit_length() - 1
+    strict = ((1 << (bits + 1)) - 1) << (32 - bits - 1)
+    loose = ((1 << (bits - 1)) - 1) << (32 - bits + 1)
+    return strict, loose
+
+def _scan(view: memoryview, start: int, stop: int, mask: int):
+    """First cut point in [start, stop), or None"""
+    gear = GEAR
+    h = 0
+    for position, byte in enumerate(view[start:stop], start + 1):
+        # Only the high bits are tested; they depend on the last 32 bytes
+        h = ((h << 1) + gear[byte]) & 0xFFFFFFFF
+        if not h & mask:
+            return position
+    return None
+
+def _cut(view: memoryview, start: int, min_size: int, avg_size: int, max_size: int,
+         strict: int, loose: int) -> int:
+    """End of the chunk starting at `start`; looks at no more than max_size bytes"""
+    end = min(start + max_size, len(view))
+    if end - start <= min_size:
+        return end
+    normal = min(start + avg_size, end)
+    return _scan(view, start + min_size, normal, strict) or _scan(view, normal, end, loose) or end
+
+def cut_points(data: bytes, min_size: int = MIN_CHUNK, avg_size: int = AVG_CHUNK,
+               max_size: int = MAX_CHUNK) -> List[int]:
+    """End offsets of the content-defined chunks of `data`"""
+    strict, loose = _masks(avg_size)
+    view = memoryview(data)
+    cuts = []
+    start = 0
+    while start < len(data):
+        start = _cut(view, start, min_size, avg_size, max_size, strict, loose)
+        cuts.append(start)
+    return cuts
+
+def iter_pieces(blocks: Iterable[bytes], min_size: int = MIN_CHUNK, avg_size: int = AVG_CHUNK,
+                max_size: int = MAX_CHUNK) -> Iterator[bytes]:
+    """The content-defined chunks of a stream, holding at most max_size bytes plus one block"""
+    strict, loose = _masks(avg_size)
+    buffer = bytearray()
+    start = 0
+    for block in blocks:
+        del buffer[:start]
+        start = 0
+        buffer += block
+        # A full max_size window decides the next cut whatever follows it
+        while len(buffer) - start >= max_size:
+            with memoryview(buffer) as view:
+                cut = _cut(view, start, min_size, avg_size, max_size, strict, loose)
+            yield bytes(buffer[start:cut])
+            start = cut
+    while start < len(buffer):
+        with memoryview(buffer) as view:
+            cut = _cut(view, start, min_size, avg_size, max_size, strict, loose)
+        yield bytes(buffer[start:cut])
+        start = cut
+
+def chunk_key(prefix: str, chunk_hash: str) -> str:
+    return f"{prefix.rstrip('/')}/{chunk_hash[:2]}/{chunk_hash[2:4]}/{chunk_hash}"
+
+def store_stream(blocks: Iterable[bytes], prefix: str,
+                 key: Optional[bytes] = None) -> Tuple[str, List[Tuple[str, int]]]:
+    """Chunk a stream into the store; returns its SHA-256 and the ordered (chunk hash, size) list
+
+    With a master `key` the chunks are sealed and both hashes are keyed.
+    """
+    content = encryption.keyed_hash(key) if key else hashlib.sha256()
+    chunks = []
+    for piece in iter_pieces(blocks):
+        content.update(piece)
+        chunk_hash = encryption.chunk_id(key, piece) if key else hashlib.sha256(piece).hexdigest()
+        key_name = chunk_key(prefix, chunk_hash)
+        # Content-addressed: an existing blob already holds exactly these bytes
+        if not storage.exists(key_name):
+            storage.put_stream(key_name, [encryption.seal(key, piece) if key else piece])
+        chunks.append((chunk_hash, len(piece)))
+    return content.hexdigest(), chunks
+
+def store_chunks(data: bytes, prefix: str, key: Optional[bytes] = None) -> Tuple[str, List[Tuple[str, int]]]:
+    """`store_stream` for content already in memory"""
+    return store_stream([data], prefix, key)
+
+def store_file(path: str, encrypted: bool, prefix: str, key: Optional[bytes] = None,
+               keys: Optional[Dict[bytes, bytes]] = None) -> Tuple[str, List[Tuple[str, int]]]:
+    """`store_stream` for a local blob, decrypted as it is read when `encrypted`"""
+    blocks = encryption.iter_decrypted(path, keys=keys) if encrypted else encryption.iter_file(path)
+    return store_stream(blocks, prefix, key)
+
+def iter_chunks(prefix: str, chunk_hashes: Iterable[str],
+                keys: Optional[Dict[bytes, bytes]] = None) -> Iterator[bytes]:
+    """Reassemble content from its chunks (unsealing them with `keys` for encrypted content)"""
+    for chunk_hash in chunk_hashes:
+        with storage.open(chunk_key(prefix, chunk_hash)) as f:
+            data = f.read()
+        yield encryption.unseal(data, keys) if keys else data
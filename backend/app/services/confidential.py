@@ -0,0 +1,88 @@
+"""
+Encrypting documents that are already stored
+
+New confidential uploads are encrypted as they are written. A document
+marked confidential later, or uploaded before encryption at rest existed, is
+encrypted here: its current content (decompressed if it was tiered) is
+streamed through `encryption` into a new blob, the document is pointed at it
+with a guarded UPDATE, and the plaintext blob and its preview derivatives are
+removed once that is committed. Run `python encrypt_documents.py` to backfill.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.services import encryption, tiering
+from app.services.imaging import UNSUPPORTED
+from app.services.previews import remove_derivatives
+from app.services.storage import storage
+
+@dataclass
+class EncryptionResult:
+    encrypted: int = 0
+    missing: int = 0
+    skipped: int = 0
+    bytes_encrypted: int = 0
+
+def _unencrypted():
+    return or_(Document.is_encrypted.is_(None), Document.is_encrypted == False)
+
+def encrypt_document(db: Session, document: Document) -> bool:
+    """Encrypt one document's current content; False if it was missing or changed meanwhile"""
+    old_blob = tiering.blob_path(document)
+    if document.is_encrypted or not storage.exists(old_blob):
+        return False
+    old_file_path = document.file_path
+    new_path = storage.new_key(old_file_path)
+    with storage.open_write(new_path) as f:
+        size = encryption.encrypt_to(tiering.iter_content(document), f)
+
+    try:
+        # Guarded: a new version or a concurrent run leaves the document alone
+        updated = db.execute(update(Document).where(
+            Document.document_id == document.document_id,
+            Document.file_path == old_file_path,
+            _unencrypted(),
+        ).values(
+            file_path=new_path,
+            file_size=size,
+            is_encrypted=True,
+            preview_status=UNSUPPORTED,
+            storage_codec=None,
+            stored_size=None,
+            tiered_at=None,
+        )).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        storage.delete(new_path)
+        raise
+    if not updated:
+        storage.delete(new_path)
+        return False
+    db.refresh(document)
+
+    storage.delete(old_blob)
+    remove_derivatives(old_file_path)
+    return True
+
+def encrypt_confidential(db: Session, limit: Optional[int] = None) -> EncryptionResult:
+    """Encrypt confidential documents still stored in plaintext, committing after each one"""
+    result = EncryptionResult()
+    query = db.query(Document).filter(Document.is_confidential == True, _unencrypted()) \
+        .order_by(Document.document_id)
+    if limit:
+        query = query.limit(limit)
+    for document in query.all():
+        if not tiering.blob_exists(document):
+            result.missing += 1
+        elif encrypt_document(db, document):
+            result.encrypted += 1
+            result.bytes_encrypted += document.file_size or 0
+        else:
+            result.skipped += 1
+    return result
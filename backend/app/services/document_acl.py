@@ -0,0 +1,159 @@
+"""
+Document sharing and effective permissions
+
+Access to a document comes from case membership (the case's client and
+primary lawyer), from uploading it, or from an explicit grant to a user or a
+role. Rather than re-deriving that on every request, each source writes rows
+into the `document_permissions` index keyed by principal ("user:<id>" or
+"role:<role>"), so list filtering and download checks are one indexed EXISTS
+lookup. The index is updated incrementally: uploads index one document,
+lawyer reassignment re-indexes one case, and grants/revocations add or remove
+only their own rows. Admins bypass the index.
+"""
+
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import String, case, cast, delete, exists, insert, literal, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.case import Case
+from app.models.client import Client
+from app.models.document import Document, DocumentGrant, DocumentPermission
+from app.models.lawyer import Lawyer
+
+PERMISSION_LEVELS = {"view": 1, "download": 2, "edit": 3}
+GRANTABLE_ROLES = ("admin", "lawyer", "client")
+
+# Access implied by case membership and uploading
+CASE_CLIENT_LEVEL = PERMISSION_LEVELS["download"]
+CASE_LAWYER_LEVEL = PERMISSION_LEVELS["edit"]
+UPLOADER_LEVEL = PERMISSION_LEVELS["edit"]
+
+_INDEX_COLUMNS = ["principal", "document_id", "case_id", "level", "source", "grant_id", "expires_at"]
+
+def principals(user) -> List[str]:
+    return [f"user:{user.user_id}", f"role:{user.role}"]
+
+def _user_principal(column):
+    return literal("user:") + cast(column, String)
+
+def _active(now: datetime):
+    return or_(DocumentPermission.expires_at.is_(None), DocumentPermission.expires_at > now)
+
+def permitted(user, permission: str = "view"):
+    """EXISTS clause limiting Document rows to those the user holds `permission` on"""
+    return exists().where(
+        DocumentPermission.document_id == Document.document_id,
+        DocumentPermission.principal.in_(principals(user)),
+        DocumentPermission.level >= PERMISSION_LEVELS[permission],
+        _active(datetime.utcnow()),
+    )
+
+def filter_accessible(query, user, permission: str = "view"):
+    """Restrict a Document query to what the user may access"""
+    if user.role == "admin":
+        return query
+    return query.filter(permitted(user, permission))
+
+def has_permission(db: Session, user, document_id: int, permission: str = "view") -> bool:
+    if user.role == "admin":
+        return True
+    found = db.query(DocumentPermission.permission_id).filter(
+        DocumentPermission.principal.in_(principals(user)),
+        DocumentPermission.document_id == document_id,
+        DocumentPermission.level >= PERMISSION_LEVELS[permission],
+        _active(datetime.utcnow()),
+    ).first()
+    return found is not None
+
+# Index maintenance
+
+def _membership_rows(*criteria):
+    """Index rows implied by case membership and uploads for documents matching criteria"""
+    no_grant, no_expiry = literal(None, type_=DocumentPermission.grant_id.type), \
+        literal(None, type_=DocumentPermission.expires_at.type)
+    client_rows = select(
+        _user_principal(Client.user_id), Document.document_id, Document.case_id,
+        literal(CASE_CLIENT_LEVEL), literal("case_client"), no_grant, no_expiry,
+    ).select_from(Document) \
+        .join(Case, Case.case_id == Document.case_id) \
+        .join(Client, Client.client_id == Case.client_id) \
+        .where(Client.user_id.isnot(None), *criteria)
+    lawyer_rows = select(
+        _user_principal(Lawyer.user_id), Document.document_id, Document.case_id,
+        literal(CASE_LAWYER_LEVEL), literal("case_lawyer"), no_grant, no_expiry,
+    ).select_from(Document) \
+        .join(Case, Case.case_id == Document.case_id) \
+        .join(Lawyer, Lawyer.lawyer_id == Case.primary_lawyer_id) \
+        .where(*criteria)
+    uploader_rows = select(
+        _user_principal(Document.uploaded_by), Document.document_id, Document.case_id,
+        literal(UPLOADER_LEVEL), literal("uploader"), no_grant, no_expiry,
+    ).where(*criteria)
+    return insert(DocumentPermission).from_select(
+        _INDEX_COLUMNS, union_all(client_rows, lawyer_rows, uploader_rows)
+    )
+
+def index_document(db: Session, document_id: int):
+    """(Re)index the membership rows of one document - call after upload"""
+    db.execute(delete(DocumentPermission).where(
+        DocumentPermission.document_id == document_id, DocumentPermission.grant_id.is_(None)
+    ))
+    db.execute(_membership_rows(Document.document_id == document_id))
+
+def reindex_case(db: Session, case_id: int):
+    """Refresh membership rows for every document of a case - call after its client or lawyer changes"""
+    db.flush()
+    db.execute(delete(DocumentPermission).where(
+        DocumentPermission.case_id == case_id, DocumentPermission.grant_id.is_(None)
+    ))
+    db.execute(_membership_rows(Document.case_id == case_id))
+
+def rebuild_index(connection):
+    """Recompute the whole index from cases, uploads and unexpired grants"""
+    connection.execute(delete(DocumentPermission))
+    connection.execute(_membership_rows())
+    grant_principal = case(
+        (DocumentGrant.user_id.isnot(None), _user_principal(DocumentGrant.user_id)),
+        else_=literal("role:") + DocumentGrant.role,
+    )
+    connection.execute(insert(DocumentPermission).from_select(_INDEX_COLUMNS, select(
+        grant_principal, DocumentGrant.document_id, Document.case_id,
+        case(PERMISSION_LEVELS, value=DocumentGrant.permission), literal("grant"),
+        DocumentGrant.grant_id, DocumentGrant.expires_at,
+    ).join(Document, Document.document_id == DocumentGrant.document_id).where(
+        or_(DocumentGrant.expires_at.is_(None), DocumentGrant.expires_at > datetime.utcnow()),
+    )))
+
+# Grants
+
+def grant_access(db: Session, document: Document, permission: str, user_ids: Iterable[int] = (),
+                 roles: Iterable[str] = (), expires_at: Optional[datetime] = None,
+                 granted_by: Optional[int] = None) -> List[DocumentGrant]:
+    """Create grants and their index rows in the caller's transaction"""
+    if expires_at is not None and expires_at.tzinfo is not None:
+        expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+    grants = [DocumentGrant(document_id=document.document_id, user_id=user_id, permission=permission,
+                            expires_at=expires_at, granted_by=granted_by) for user_id in user_ids]
+    grants += [DocumentGrant(document_id=document.document_id, role=role, permission=permission,
+                             expires_at=expires_at, granted_by=granted_by) for role in roles]
+    db.add_all(grants)
+    db.flush()
+    db.add_all([
+        DocumentPermission(
+            principal=f"user:{grant.user_id}" if grant.user_id is not None else f"role:{grant.role}",
+            document_id=document.document_id,
+            case_id=document.case_id,
+            level=PERMISSION_LEVELS[permission],
+            source="grant",
+            grant_id=grant.grant_id,
+            expires_at=expires_at,
+        )
+        for grant in grants
+    ])
+    return grants
+
+def revoke_grant(db: Session, grant: DocumentGrant):
+    db.execute(delete(DocumentPermission).where(DocumentPermission.grant_id == grant.grant_id))
+    db.delete(grant)
@@ -0,0 +1,234 @@
+"""
+Encryption at rest for confidential documents
+
+Each encrypted blob has its own random 256-bit data key, wrapped with the
+master key (DOCUMENT_ENCRYPTION_KEY) and stored in the blob's header, so
+rotating the master key never means re-encrypting content. The content is
+sealed in fixed-size chunks with AES-256-GCM:
+
+    header  magic "LDE1" | master key id (8) | wrap nonce (12) | wrapped data key (48)
+            | chunk size (4) | nonce prefix (8)
+    chunks  ciphertext + 16-byte tag, chunk i sealed with nonce prefix || i
+            and a final-chunk flag as associated data
+
+Encryption and decryption are one chunk at a time, so nothing is held whole,
+and a byte range is served by decrypting only the chunks it overlaps. The
+counter nonce stops chunks being reordered and the final flag stops a blob
+being truncated at a chunk boundary.
+
+Version-history chunks of encrypted documents are sealed individually
+(`seal`) and named by an HMAC instead of a plain hash, so the chunk store
+does not reveal which content it holds.
+
+Used inside the version process pool, so it has no database imports.
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import struct
+import tempfile
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"LDE1"
+CHUNK_MAGIC = b"LDC1"
+TAG_SIZE = 16
+_HEADER = struct.Struct(">4s8s12s48sI8s")
+HEADER_SIZE = _HEADER.size
+_READ_BLOCK = 1024 * 1024
+
+class EncryptionError(Exception):
+    """Blob is not encrypted, was sealed with an unknown key, or failed authentication"""
+
+def _derive(secret: bytes, purpose: bytes) -> bytes:
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=purpose).derive(secret)
+
+def _decode_key(value: str) -> bytes:
+    key = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+    if len(key) != 32:
+        raise ValueError("Document encryption keys must be 32 bytes, base64-encoded")
+    return key
+
+_warned = False
+
+def master_key() -> bytes:
+    """Current master key; derived from SECRET_KEY when DOCUMENT_ENCRYPTION_KEY is not set"""
+    global _warned
+    if settings.DOCUMENT_ENCRYPTION_KEY:
+        return _decode_key(settings.DOCUMENT_ENCRYPTION_KEY)
+    if not _warned:
+        logger.warning("DOCUMENT_ENCRYPTION_KEY is not set - deriving the document key from SECRET_KEY")
+        _warned = True
+    return _derive(settings.SECRET_KEY.encode(), b"document-encryption")
+
+def key_id(key: bytes) -> bytes:
+    return hashlib.sha256(b"document-key-id" + key).digest()[:8]
+
+def keyring() -> Dict[bytes, bytes]:
+    """Master keys able to open existing blobs: the current one and any retired ones"""
+    keys = [master_key()] + [_decode_key(value.strip())
+                             for value in settings.DOCUMENT_ENCRYPTION_OLD_KEYS.split(",") if value.strip()]
+    return {key_id(key): key for key in keys}
+
+def _nonce(prefix: bytes, index: int) -> bytes:
+    return prefix + index.to_bytes(4, "big")
+
+def _final_flag(final: bool) -> bytes:
+    return b"\x01" if final else b"\x00"
+
+class EncryptingWriter:
+    """File-like writer that seals whatever is written to it into `f`; call `finish` at the end"""
+
+    def __init__(self, f: BinaryIO, key: Optional[bytes] = None, chunk_size: Optional[int] = None):
+        key = key or master_key()
+        self.chunk_size = chunk_size or settings.ENCRYPTION_CHUNK_KB * 1024
+        self.size = 0
+        data_key = AESGCM.generate_key(bit_length=256)
+        wrap_nonce = os.urandom(12)
+        self._prefix = os.urandom(8)
+        self._aead = AESGCM(data_key)
+        self._f = f
+        self._buffer = bytearray()
+        self._index = 0
+        wrapped = AESGCM(key).encrypt(wrap_nonce, data_key, MAGIC)
+        f.write(_HEADER.pack(MAGIC, key_id(key), wrap_nonce, wrapped, self.chunk_size, self._prefix))
+
+    def _seal(self, chunk, final: bool):
+        self._f.write(self._aead.encrypt(_nonce(self._prefix, self._index), chunk, _final_flag(final)))
+        self._index += 1
+
+    def write(self, data) -> int:
+        view = memoryview(data)
+        size = len(view)
+        self.size += size
+        # A chunk is sealed only once a byte after it has arrived: `finish` seals the last one
+        position = 0
+        if self._buffer:
+            needed = self.chunk_size - len(self._buffer)
+            if size <= needed:
+                self._buffer += view
+                return size
+            self._buffer += view[:needed]
+            self._seal(self._buffer, final=False)
+            self._buffer.clear()
+            position = needed
+        # Seal straight from the caller's buffer, copying only the tail
+        while size - position > self.chunk_size:
+            self._seal(view[position:position + self.chunk_size], final=False)
+            position += self.chunk_size
+        self._buffer += view[position:]
+        return size
+
+    def finish(self):
+        self._seal(self._buffer, final=True)
+        self._buffer = bytearray()
+
+def encrypt_to(blocks: Iterable[bytes], f: BinaryIO, key: Optional[bytes] = None) -> int:
+    """Write the blocks encrypted to the open file `f`; returns the plaintext size"""
+    writer = EncryptingWriter(f, key)
+    for block in blocks:
+        writer.write(block)
+    writer.finish()
+    return writer.size
+
+def encrypt_blocks(blocks: Iterable[bytes], destination: str, key: Optional[bytes] = None) -> int:
+    """Write the blocks encrypted to the file `destination` (atomically); returns the plaintext size"""
+    directory = os.path.dirname(destination) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            size = encrypt_to(blocks, f, key)
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size
+
+def iter_file(path: str, block_size: int = _READ_BLOCK) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            yield block
+
+def _open_header(f: BinaryIO, keys: Dict[bytes, bytes]):
+    header = f.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE:
+        raise EncryptionError("Not an encrypted document")
+    magic, master_id, wrap_nonce, wrapped, chunk_size, prefix = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise EncryptionError("Not an encrypted document")
+    if master_id not in keys:
+        raise EncryptionError("Document was encrypted with a key that is not configured")
+    try:
+        data_key = AESGCM(keys[master_id]).decrypt(wrap_nonce, wrapped, MAGIC)
+    except Exception:
+        raise EncryptionError("Document key failed authentication")
+    return AESGCM(data_key), chunk_size, prefix
+
+def _chunk_count(stored_size: int, chunk_size: int) -> int:
+    body = stored_size - HEADER_SIZE
+    return max(1, -(-body // (chunk_size + TAG_SIZE)))
+
+def iter_decrypted_file(f: BinaryIO, start: int = 0, end: Optional[int] = None,
+                        keys: Optional[Dict[bytes, bytes]] = None) -> Iterator[bytes]:
+    """Plaintext bytes [start, end) of an open, seekable encrypted blob, decrypting only the chunks they span"""
+    stored_size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    aead, chunk_size, prefix = _open_header(f, keys or keyring())
+    count = _chunk_count(stored_size, chunk_size)
+    first = start // chunk_size
+    last = count - 1 if end is None else min(count - 1, max(end - 1, 0) // chunk_size)
+    f.seek(HEADER_SIZE + first * (chunk_size + TAG_SIZE))
+    for index in range(first, last + 1):
+        sealed = f.read(chunk_size + TAG_SIZE)
+        try:
+            chunk = aead.decrypt(_nonce(prefix, index), sealed, _final_flag(index == count - 1))
+        except Exception:
+            raise EncryptionError(f"Chunk {index} failed authentication")
+        chunk_start = index * chunk_size
+        lower = max(start - chunk_start, 0)
+        upper = len(chunk) if end is None else min(end - chunk_start, len(chunk))
+        if lower or upper < len(chunk):
+            chunk = chunk[lower:upper]
+        if chunk:
+            yield chunk
+
+def iter_decrypted(path: str, start: int = 0, end: Optional[int] = None,
+                   keys: Optional[Dict[bytes, bytes]] = None) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        yield from iter_decrypted_file(f, start, end, keys)
+
+# Version-history chunks
+
+def keyed_hash(key: bytes):
+    """Incremental form of `chunk_id`, for content hashed as it streams past"""
+    return hmac.new(_derive(key, b"chunk-id"), digestmod=hashlib.sha256)
+
+def chunk_id(key: bytes, data) -> str:
+    """Keyed name for a sealed chunk - equal content still deduplicates under one key"""
+    hasher = keyed_hash(key)
+    hasher.update(data)
+    return hasher.hexdigest()
+
+def seal(key: bytes, data) -> bytes:
+    nonce = os.urandom(12)
+    return CHUNK_MAGIC + key_id(key) + nonce + AESGCM(_derive(key, b"chunk-seal")).encrypt(nonce, bytes(data), None)
+
+def unseal(data: bytes, keys: Optional[Dict[bytes, bytes]] = None) -> bytes:
+    keys = keys or keyring()
+    if data[:4] != CHUNK_MAGIC or data[4:12] not in keys:
+        raise EncryptionError("Chunk is not sealed with a configured key")
+    try:
+        return AESGCM(_derive(keys[data[4:12]], b"chunk-seal")).decrypt(data[12:24], data[24:], None)
+    except Exception:
+        raise EncryptionError("Chunk failed authentication")
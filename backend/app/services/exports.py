@@ -0,0 +1,74 @@
+"""
+Streaming CSV/NDJSON exports
+
+Rows are fetched from a server-side cursor (`yield_per`) on a connection the
+export owns, encoded into ~64KB chunks and handed to StreamingResponse one
+chunk at a time. The ASGI server awaits each send until the client has taken
+the data, so the cursor only advances as fast as the client reads and memory
+stays constant regardless of how many rows are exported.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterator, List
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+
+EXPORT_FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+CHUNK_SIZE = 64 * 1024
+YIELD_PER = 1000
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return str(value)  # keep exact amounts
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+def _encode_csv(columns: List[str], rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _encode_ndjson(columns: List[str], rows) -> Iterator[str]:
+    parts, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(columns, row)), default=_json_value, separators=(",", ":")) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(parts)
+            parts, size = [], 0
+    yield "".join(parts)
+
+def stream_rows(connect: Callable[[], Connection], statement: Select, export_format: str) -> Iterator[bytes]:
+    """Encode the statement's rows as CSV or NDJSON chunks, holding one batch at a time"""
+    encode = _encode_ndjson if export_format == "ndjson" else _encode_csv
+    with connect() as connection:
+        result = connection.execution_options(yield_per=YIELD_PER).execute(statement)
+        for chunk in encode(list(result.keys()), result):
+            if chunk:
+                yield chunk.encode("utf-8")
+
+def export_response(connect: Callable[[], Connection], statement: Select, export_format: str,
+                    name: str) -> StreamingResponse:
+    filename = f"{name}-{date.today().isoformat()}.{export_format}"
+    return StreamingResponse(
+        stream_rows(connect, statement, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,159 @@
+"""
+Document derivatives - thumbnails and first-page previews - and upload
+normalization of camera scans
+
+Runs inside worker process pools, so it has no database imports. Images
+are decoded with Pillow (optional: without it every document falls back to
+the placeholder); PDFs are rasterized with poppler's `pdftoppm` when it is
+installed. Derivatives are JPEGs published atomically next to the blob.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Optional, Tuple
+
+IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif"}
+PDF_TYPES = {"application/pdf"}
+PREVIEWABLE_TYPES = IMAGE_TYPES | PDF_TYPES
+# Scans recompressed on upload - GIFs are left alone (palette art, animation)
+NORMALIZABLE_TYPES = {"image/jpeg", "image/png"}
+
+# Derivative states stored on Document.preview_status
+PENDING, READY, UNSUPPORTED, FAILED = "pending", "ready", "unsupported", "failed"
+
+def derivative_path(file_path: str, kind: str) -> str:
+    """Where the `thumb` or `preview` derivative of a blob lives"""
+    return f"{file_path}.{kind}.jpg"
+
+def _save_jpeg(image, path: str, quality: int):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, "JPEG", quality=quality, optimize=True, progressive=True)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _open_image(path: str, target: int):
+    from PIL import Image, ImageOps
+
+    image = Image.open(path)
+    # JPEG can decode at 1/2, 1/4 or 1/8 scale directly - much cheaper for 12MP phone scans
+    image.draft("RGB", (target, target))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.split()[-1])
+        image = background
+    return image
+
+def _render_pdf_page(path: str, target: int) -> Optional[str]:
+    """Rasterize page 1 with pdftoppm; returns a temporary JPEG path or None if unavailable"""
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    prefix = os.path.join(tempfile.mkdtemp(prefix="preview-"), "page")
+    subprocess.run(
+        [pdftoppm, "-jpeg", "-f", "1", "-l", "1", "-singlefile", "-scale-to", str(target), path, prefix],
+        check=True, capture_output=True, timeout=60,
+    )
+    return prefix + ".jpg"
+
+def render_derivatives(file_path: str, mime_type: str, thumb_size: int, preview_size: int) -> str:
+    """Write the thumbnail and preview for one blob; returns the resulting preview status"""
+    if mime_type not in PREVIEWABLE_TYPES:
+        return UNSUPPORTED
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return UNSUPPORTED
+
+    rendered_page = None
+    source = file_path
+    try:
+        if mime_type in PDF_TYPES:
+            rendered_page = _render_pdf_page(file_path, preview_size)
+            if rendered_page is None:
+                return UNSUPPORTED
+            source = rendered_page
+        image = _open_image(source, preview_size)
+        image.thumbnail((preview_size, preview_size))
+        _save_jpeg(image, derivative_path(file_path, "preview"), quality=85)
+        image.thumbnail((thumb_size, thumb_size))
+        _save_jpeg(image, derivative_path(file_path, "thumb"), quality=80)
+    finally:
+        if rendered_page:
+            shutil.rmtree(os.path.dirname(rendered_page), ignore_errors=True)
+    return READY
+
+def normalize_image(file_path: str, mime_type: str, max_edge: int, dpi: int, quality: int,
+                    original_copy: Optional[str] = None) -> Optional[Tuple[str, str, int]]:
+    """Downscale, strip metadata and recompress an uploaded scan in place
+
+    Photographic PNGs (no transparency) are re-encoded as JPEG next to the
+    original. The original is copied to `original_copy` first when given.
+    Returns (path, mime_type, size) of the stored file, or None when the
+    result would not be smaller and the upload is kept as it was.
+    """
+    if mime_type not in NORMALIZABLE_TYPES:
+        return None
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+
+    with Image.open(file_path) as source:
+        source.draft("RGB", (max_edge, max_edge))
+        has_alpha = source.mode in ("RGBA", "LA", "PA") or "transparency" in source.info
+        if mime_type == "image/png" and has_alpha:
+            return None
+        # Bake the EXIF rotation into the pixels - the EXIF block itself is dropped on save
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        # The colour profile is kept (phone cameras shoot Display P3); EXIF, GPS and XMP are not
+        icc_profile = source.info.get("icc_profile")
+
+    target = os.path.splitext(file_path)[0] + ".jpg" if mime_type == "image/png" else file_path
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, "JPEG", quality=quality, optimize=True, progressive=True, dpi=(dpi, dpi),
+                       icc_profile=icc_profile)
+        size = os.path.getsize(temp_path)
+        if size >= os.path.getsize(file_path):
+            os.remove(temp_path)
+            return None
+        if original_copy:
+            os.makedirs(os.path.dirname(original_copy) or ".", exist_ok=True)
+            shutil.copyfile(file_path, original_copy)
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if target != file_path:
+        os.remove(file_path)
+    return target, "image/jpeg", size
+
+def placeholder_svg(mime_type: Optional[str], size: int, pending: bool) -> bytes:
+    """Neutral page icon labelled with the file type, shown until (or instead of) a real preview"""
+    label = (mime_type or "file").split("/")[-1].split(".")[-1].upper()[:4]
+    note = "Preparing preview" if pending else "No preview"
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 100 100">'
+        f'<rect width="100" height="100" fill="#f1f3f5"/>'
+        f'<path d="M30 15h28l14 14v56H30z" fill="#fff" stroke="#adb5bd" stroke-width="2"/>'
+        f'<path d="M58 15v14h14" fill="none" stroke="#adb5bd" stroke-width="2"/>'
+        f'<text x="51" y="60" font-family="Helvetica,Arial,sans-serif" font-size="11" font-weight="bold" '
+        f'fill="#495057" text-anchor="middle">{label}</text>'
+        f'<text x="50" y="95" font-family="Helvetica,Arial,sans-serif" font-size="6" fill="#868e96" '
+        f'text-anchor="middle">{note}</text>'
+        f'</svg>'
+    ).encode("utf-8")
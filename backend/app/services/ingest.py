@@ -0,0 +1,152 @@
+"""
+Upload normalization for camera scans
+
+Passport and ID scans straight off a phone are 8-10MB JPEG/PNG files at far
+more resolution than a legal reviewer needs. When INGEST_NORMALIZE_IMAGES is
+on, `upload_document` passes each image through `ImageNormalizer`: it is
+downscaled to INGEST_DPI on an A4 page, stripped of EXIF/GPS metadata and
+recompressed, in a spawn-based process pool so the event loop keeps serving
+requests. The original can be kept in cold storage (INGEST_ORIGINALS_DIR);
+`Document.original_size` records what was uploaded so savings can be
+reported per document type.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.document import Document
+from app.services.imaging import NORMALIZABLE_TYPES, normalize_image
+
+logger = logging.getLogger(__name__)
+
+# Long edge of an A4 page in inches - scans are sized as if printed on one
+A4_LONG_EDGE_INCHES = 11.69
+
+@dataclass
+class NormalizedUpload:
+    file_path: str
+    mime_type: str
+    file_size: int
+    original_path: Optional[str]
+
+class ImageNormalizer:
+    """Recompress uploaded scans in worker processes"""
+
+    def __init__(self, workers: int, dpi: int, quality: int, originals_dir: str = ""):
+        self.workers = workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.quality = quality
+        self.originals_dir = originals_dir
+        self.max_edge = round(dpi * A4_LONG_EDGE_INCHES)
+        self.normalized = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs server threads is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def normalize(self, file_path: str, mime_type: str) -> Optional[NormalizedUpload]:
+        """Normalize a stored upload; None leaves it untouched (not an image, no gain, or an error)"""
+        if mime_type not in NORMALIZABLE_TYPES:
+            return None
+        original_size = os.path.getsize(file_path)
+        original_copy = os.path.join(self.originals_dir, os.path.basename(file_path)) \
+            if self.originals_dir else None
+        executor = self._pool()
+        try:
+            result = await asyncio.wrap_future(executor.submit(
+                normalize_image, file_path, mime_type, self.max_edge, self.dpi, self.quality, original_copy
+            ))
+        except Exception as e:
+            # A scan Pillow cannot read is still a valid upload - keep it as it came
+            logger.error(f"Normalizing {file_path} failed: {e}")
+            if isinstance(e, BrokenProcessPool):
+                self._discard_pool(executor)
+            self.failed += 1
+            return None
+        if result is None:
+            self.skipped += 1
+            return None
+        path, new_mime_type, size = result
+        self.normalized += 1
+        self.bytes_in += original_size
+        self.bytes_out += size
+        return NormalizedUpload(path, new_mime_type, size, original_copy)
+
+    def _discard_pool(self, executor: ProcessPoolExecutor):
+        """A worker died; the next upload starts a fresh pool"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": settings.INGEST_NORMALIZE_IMAGES,
+            "workers": self.workers,
+            "normalized": self.normalized,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+        }
+
+def savings_by_type(db: Session) -> List[dict]:
+    """Uploaded vs stored bytes per document type, over active documents"""
+    uploaded = func.coalesce(Document.original_size, Document.file_size, 0)
+    rows = db.query(
+        Document.document_type,
+        func.count(Document.document_id),
+        func.count(Document.original_size),
+        func.sum(uploaded),
+        func.sum(func.coalesce(Document.file_size, 0)),
+    ).filter(Document.status == "active") \
+        .group_by(Document.document_type) \
+        .order_by(Document.document_type) \
+        .all()
+    return [
+        {
+            "document_type": document_type,
+            "documents": documents,
+            "normalized": normalized,
+            "uploaded_bytes": int(uploaded_bytes or 0),
+            "stored_bytes": int(stored_bytes or 0),
+            "saved_bytes": int((uploaded_bytes or 0) - (stored_bytes or 0)),
+            "saved_percent": round(100 * (1 - stored_bytes / uploaded_bytes), 1) if uploaded_bytes else 0.0,
+        }
+        for document_type, documents, normalized, uploaded_bytes, stored_bytes in rows
+    ]
+
+# Application-wide normalizer
+image_normalizer = ImageNormalizer(
+    settings.INGEST_WORKERS,
+    settings.INGEST_DPI,
+    settings.INGEST_JPEG_QUALITY,
+    originals_dir=settings.INGEST_ORIGINALS_DIR,
+)
@@ -0,0 +1,187 @@
+"""
+Invoice PDF rendering - process pool with a content-addressed artifact cache
+
+An invoice is reduced to a payload of the fields that appear on the PDF. The
+artifact is stored as `<billing_id>-<hash>.pdf`, where the hash covers that
+payload, so a PDF is rendered once per distinct invoice state and served from
+disk afterwards. Rendering runs in a spawn-based process pool so month-end
+batches never block the event loop; concurrent requests for the same
+artifact share one render.
+"""
+
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.activity import Activity
+from app.models.billing import Billing, InvoiceLineItem
+from app.services.pdf import render_invoice_to_file
+
+logger = logging.getLogger(__name__)
+
+def _money(value) -> str:
+    return f"{value or 0:,.2f}"
+
+def invoice_payload(db: Session, billing: Billing) -> dict:
+    """Every field printed on the invoice, in a stable JSON-serializable form"""
+    line_items = db.query(InvoiceLineItem, Activity.activity_date) \
+        .outerjoin(Activity, Activity.activity_id == InvoiceLineItem.activity_id) \
+        .filter(InvoiceLineItem.billing_id == billing.billing_id) \
+        .order_by(Activity.activity_date, InvoiceLineItem.line_item_id) \
+        .all()
+
+    client = billing.client
+    client_user = client.user if client else None
+    case = billing.case
+    total = billing.total_amount or 0
+    paid = billing.amount_paid or 0
+    return {
+        "firm_name": settings.INVOICE_FIRM_NAME,
+        "billing_id": billing.billing_id,
+        "invoice_number": billing.invoice_number or f"#{billing.billing_id}",
+        "invoice_date": billing.invoice_date.isoformat(),
+        "due_date": billing.due_date.isoformat(),
+        "client_name": f"{client_user.first_name} {client_user.last_name}" if client_user else "",
+        "client_number": client.client_number if client else "",
+        "case_number": case.case_number if case else "",
+        "case_type": case.case_type if case else "",
+        "description": billing.description or "",
+        "hours_worked": _money(billing.hours_worked),
+        "hourly_rate": _money(billing.hourly_rate),
+        "subtotal": _money(billing.subtotal),
+        "tax_amount": _money(billing.tax_amount),
+        "total_amount": _money(total),
+        "amount_paid": _money(paid),
+        "balance_due": _money(total - paid),
+        "line_items": [
+            {
+                "date": activity_date.date().isoformat() if activity_date else "",
+                "description": item.description,
+                "hours": _money(item.hours),
+                "rate": _money(item.rate),
+                "amount": _money(item.amount),
+            }
+            for item, activity_date in line_items
+        ],
+    }
+
+def content_hash(payload: dict) -> str:
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+class InvoiceRenderer:
+    """Render invoice PDFs in worker processes and keep one artifact per invoice"""
+
+    def __init__(self, directory: str, workers: int):
+        self.directory = directory
+        self.workers = workers or os.cpu_count() or 1
+        self.renders = 0
+        self.cache_hits = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                os.makedirs(self.directory, exist_ok=True)
+                # spawn: forking a process that runs server threads is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def artifact_path(self, billing_id: int, digest: str) -> str:
+        return os.path.join(self.directory, f"{billing_id}-{digest}.pdf")
+
+    def submit(self, payload: dict) -> Future:
+        """Future resolving to the artifact path; reuses the cached file or an in-flight render"""
+        digest = content_hash(payload)
+        path = self.artifact_path(payload["billing_id"], digest)
+        if os.path.exists(path):
+            self.cache_hits += 1
+            done = Future()
+            done.set_result(path)
+            return done
+
+        with self._lock:
+            pending = self._in_flight.get(path)
+            if pending is not None:
+                return pending
+            result = Future()
+            self._in_flight[path] = result
+
+        def finished(render: Future):
+            with self._lock:
+                self._in_flight.pop(path, None)
+            error = render.exception()
+            if error is not None:
+                logger.error(f"Rendering invoice {payload['billing_id']} failed: {error}")
+                if isinstance(error, BrokenProcessPool):
+                    self._discard_pool(executor)
+                result.set_exception(error)
+                return
+            self.renders += 1
+            self._remove_stale(payload["billing_id"], path)
+            result.set_result(path)
+
+        try:
+            executor = self._pool()
+            render = executor.submit(render_invoice_to_file, payload, path)
+        except Exception:
+            with self._lock:
+                self._in_flight.pop(path, None)
+            raise
+        render.add_done_callback(finished)
+        return result
+
+    async def render(self, payload: dict) -> str:
+        """Artifact path for the payload, rendering off the event loop if needed"""
+        return await asyncio.wrap_future(self.submit(payload))
+
+    def render_many(self, payloads: List[dict]) -> List[str]:
+        """Render a batch in parallel (month-end runs, scripts)"""
+        return [future.result() for future in [self.submit(payload) for payload in payloads]]
+
+    def _remove_stale(self, billing_id: int, keep: str):
+        for path in glob.glob(os.path.join(self.directory, f"{billing_id}-*.pdf")):
+            if path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _discard_pool(self, executor: ProcessPoolExecutor):
+        """A worker died; the next render starts a fresh pool"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "renders": self.renders,
+            "cache_hits": self.cache_hits,
+            "in_flight": len(self._in_flight),
+        }
+
+# Application-wide renderer
+invoice_renderer = InvoiceRenderer(settings.INVOICE_PDF_DIR, settings.INVOICE_PDF_WORKERS)
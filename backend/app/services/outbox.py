@@ -0,0 +1,460 @@
+"""
+Transactional email outbox
+
+Emails are never sent from a request. `enqueue_email` adds an `email_outbox`
+row to the caller's session, so the message is committed - or rolled back -
+together with the change that produced it. `OutboxWorker` drains the table in
+the background: it claims a batch with a lease (so several processes can
+drain safely and a crashed worker's batch is picked up again), delivers it
+over one reused SMTP connection and records the results with a single UPDATE
+per batch. Transient failures are retried with exponential backoff; permanent
+ones, or messages out of attempts, are dead-lettered for an admin to requeue.
+A lease that runs out counts as an attempt, so a message that keeps killing
+its worker is dead-lettered too.
+
+Attachments are hard-linked (or copied) into OUTBOX_ATTACHMENT_DIR when the
+email is queued, so re-rendering an invoice cannot remove its PDF before
+delivery; the copy is deleted once the email is sent or dead-lettered, or
+right away if the queueing transaction is rolled back. A missing attachment
+fails the attempt instead of sending without it.
+"""
+
+import logging
+import mimetypes
+import os
+import shutil
+import smtplib
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+from typing import Callable, List, Optional
+
+from sqlalchemy import case, event, func, or_, and_, update
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.deadline import Deadline
+from app.models.lawyer import Lawyer
+from app.models.notification import OutboxEmail
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 3600
+LEASE_SECONDS = 300  # a claimed batch not finished by then is claimed again
+IDLE_CONNECTION_SECONDS = 30  # close the SMTP connection after this long without work
+
+def keep_attachment(path: str) -> str:
+    """The outbox's own link to (or copy of) a file to attach"""
+    os.makedirs(settings.OUTBOX_ATTACHMENT_DIR, exist_ok=True)
+    target = os.path.join(settings.OUTBOX_ATTACHMENT_DIR, f"{uuid.uuid4().hex}{os.path.splitext(path)[1]}")
+    try:
+        os.link(path, target)
+    except OSError:
+        shutil.copyfile(path, target)  # another filesystem, or no hard links
+    return target
+
+def remove_attachment(path: Optional[str]):
+    """Delete an attachment the outbox owns; other paths (rows queued before it kept copies) are left alone"""
+    if not path or os.path.dirname(os.path.abspath(path)) != os.path.abspath(settings.OUTBOX_ATTACHMENT_DIR):
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# Session.info key of attachments kept for emails the session has not committed yet
+_UNCOMMITTED_ATTACHMENTS = "outbox_uncommitted_attachments"
+
+def _track_attachment(db: Session, path: str):
+    """Remove `path` again unless the session's current transaction commits"""
+    pending = db.info.get(_UNCOMMITTED_ATTACHMENTS)
+    if pending is None:
+        pending = db.info[_UNCOMMITTED_ATTACHMENTS] = []
+        event.listen(db, "after_commit", _attachments_committed)
+        event.listen(db, "after_transaction_end", _attachments_abandoned)
+    pending.append(path)
+
+def _attachments_committed(session: Session):
+    # The rows are in; the worker removes their attachments after delivery
+    session.info[_UNCOMMITTED_ATTACHMENTS].clear()
+
+def _attachments_abandoned(session: Session, transaction: SessionTransaction):
+    # Runs after after_commit, so anything left belongs to a rolled-back (or closed) transaction
+    if transaction.parent is not None:
+        return
+    pending = session.info[_UNCOMMITTED_ATTACHMENTS]
+    for path in pending:
+        remove_attachment(path)
+    pending.clear()
+
+def enqueue_email(db: Session, to_address: str, subject: str, body_text: str, category: str,
+                  related_id: Optional[int] = None, cc_address: Optional[str] = None,
+                  attachment_path: Optional[str] = None, attachment_name: Optional[str] = None,
+                  dedupe_key: Optional[str] = None) -> Optional[OutboxEmail]:
+    """Queue an email in the caller's transaction; None if dedupe_key was already queued"""
+    if dedupe_key and db.query(OutboxEmail.email_id).filter(OutboxEmail.dedupe_key == dedupe_key).first():
+        return None
+    if attachment_path:
+        attachment_path = keep_attachment(attachment_path)
+        _track_attachment(db, attachment_path)
+    email = OutboxEmail(
+        to_address=to_address,
+        cc_address=cc_address,
+        subject=subject,
+        body_text=body_text,
+        category=category,
+        related_id=related_id,
+        attachment_path=attachment_path,
+        attachment_name=attachment_name,
+        dedupe_key=dedupe_key,
+    )
+    db.add(email)
+    return email
+
+def enqueue_deadline_reminders(db: Session, days_ahead: int = 7, today: Optional[date] = None) -> int:
+    """Queue one reminder per pending deadline due within days_ahead; returns how many were queued"""
+    today = today or date.today()
+    rows = db.query(Deadline, User.email) \
+        .join(Lawyer, Lawyer.lawyer_id == Deadline.lawyer_id) \
+        .join(User, User.user_id == Lawyer.user_id) \
+        .filter(
+            Deadline.status == "pending",
+            Deadline.due_date >= today,
+            Deadline.due_date <= today + timedelta(days=days_ahead),
+        ) \
+        .order_by(Deadline.due_date) \
+        .all()
+
+    keys = {deadline.deadline_id: f"deadline-reminder:{deadline.deadline_id}:{deadline.due_date.isoformat()}"
+            for deadline, _ in rows}
+    existing = set()
+    key_list = list(keys.values())
+    for offset in range(0, len(key_list), 500):
+        existing.update(key for (key,) in db.query(OutboxEmail.dedupe_key)
+                        .filter(OutboxEmail.dedupe_key.in_(key_list[offset:offset + 500])))
+
+    queued = 0
+    for deadline, email_address in rows:
+        key = keys[deadline.deadline_id]
+        if key in existing or not email_address:
+            continue
+        days_left = (deadline.due_date - today).days
+        court = " (court deadline)" if deadline.is_court_deadline else ""
+        db.add(OutboxEmail(
+            to_address=email_address,
+            subject=f"Deadline reminder: {deadline.title} due {deadline.due_date.isoformat()}",
+            body_text=(
+                f"{deadline.deadline_type}{court}: {deadline.title}\n"
+                f"Due: {deadline.due_date.isoformat()} ({days_left} day(s) from today)\n"
+                f"Priority: {deadline.priority_level}\n\n"
+                f"{deadline.description or ''}"
+            ).rstrip() + "\n",
+            category="deadline",
+            related_id=deadline.deadline_id,
+            dedupe_key=key,
+        ))
+        queued += 1
+    return queued
+
+def outbox_stats(db: Session) -> dict:
+    """Queue depth per status and age of the oldest due message"""
+    counts = dict(db.query(OutboxEmail.status, func.count(OutboxEmail.email_id))
+                  .group_by(OutboxEmail.status).all())
+    oldest = db.query(func.min(OutboxEmail.created_at)) \
+        .filter(OutboxEmail.status.in_(["pending", "sending"])).scalar()
+    return {
+        "pending": counts.get("pending", 0),
+        "sending": counts.get("sending", 0),
+        "sent": counts.get("sent", 0),
+        "dead": counts.get("dead", 0),
+        "oldest_pending_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0,
+    }
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies will fail the same way on retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and code >= 500
+
+class OutboxWorker:
+    """Deliver queued emails in batches over a persistent SMTP connection"""
+
+    def __init__(self, session_factory: Callable[[], Session], host: str, port: int = 25,
+                 username: str = "", password: str = "", use_tls: bool = False,
+                 sender: str = "", timeout: float = 30, batch_size: int = 50,
+                 poll_interval: float = 1.0, max_attempts: int = 8, backoff_seconds: float = 30):
+        self.session_factory = session_factory
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.sender = sender
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.sent = 0
+        self.retries = 0
+        self.dead = 0
+        self.batches = 0
+        self.connections = 0
+        self.busy_seconds = 0.0
+        self._lags = deque(maxlen=1000)
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.host)
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Finish the batch in progress and close the connection; unsent rows stay queued"""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout=self.timeout + 5)
+            self._thread = None
+        self._disconnect()
+
+    def wake(self):
+        """Skip the rest of the poll interval - called after committing new messages"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                delivered = self.drain_once()
+            except Exception as e:
+                logger.error(f"Email outbox batch failed: {e}")
+                delivered = 0
+            if delivered < self.batch_size:
+                if self._smtp is not None and time.monotonic() - self._last_used > IDLE_CONNECTION_SECONDS:
+                    self._disconnect()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    # Claiming
+
+    def _claim(self, db: Session) -> List[OutboxEmail]:
+        now = datetime.utcnow()
+        expired = and_(OutboxEmail.status == "sending", OutboxEmail.claimed_until < now)
+        due = or_(and_(OutboxEmail.status == "pending", OutboxEmail.next_attempt_at <= now), expired)
+        ids = [email_id for (email_id,) in db.query(OutboxEmail.email_id).filter(due)
+               .order_by(OutboxEmail.next_attempt_at, OutboxEmail.email_id).limit(self.batch_size)]
+        if not ids:
+            return []
+        # The due condition is re-checked so a row claimed by another worker in between is skipped.
+        # A lapsed lease means the worker died mid-send, which counts as an attempt (attempts is
+        # set first, while status still tells the two cases apart).
+        token = uuid.uuid4().hex
+        db.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.email_id.in_(ids), due)
+            .ordered_values(
+                (OutboxEmail.attempts, case((expired, OutboxEmail.attempts + 1), else_=OutboxEmail.attempts)),
+                (OutboxEmail.status, "sending"),
+                (OutboxEmail.claim_token, token),
+                (OutboxEmail.claimed_until, now + timedelta(seconds=LEASE_SECONDS)),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        claimed = db.query(OutboxEmail).filter(OutboxEmail.claim_token == token) \
+            .order_by(OutboxEmail.email_id).all()
+
+        exhausted = [email for email in claimed if email.attempts >= self.max_attempts]
+        for email in exhausted:
+            email.status = "dead"
+            email.claim_token = None
+            email.claimed_until = None
+            email.last_error = "Lease expired: the worker delivering this message stopped"
+            logger.warning(f"Email {email.email_id} dead-lettered after {email.attempts} attempt(s): lease expired")
+        if exhausted:
+            finished = [email.attachment_path for email in exhausted]
+            db.commit()
+            self.dead += len(exhausted)
+            for path in finished:
+                remove_attachment(path)
+        return [email for email in claimed if email.attempts < self.max_attempts]
+
+    # Delivery
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password)
+            self._smtp = smtp
+            self.connections += 1
+        return self._smtp
+
+    def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+
+    def _message(self, email: OutboxEmail) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = email.to_address
+        if email.cc_address:
+            message["Cc"] = email.cc_address
+        message["Subject"] = email.subject
+        message["Message-ID"] = f"<outbox-{email.email_id}@{self.sender.split('@')[-1] or 'localhost'}>"
+        message.set_content(email.body_text)
+        if email.attachment_path:
+            # Raises if the file is gone, failing the attempt rather than sending without it
+            name = email.attachment_name or os.path.basename(email.attachment_path)
+            maintype, subtype = (mimetypes.guess_type(name)[0] or "application/octet-stream").split("/")
+            with open(email.attachment_path, "rb") as f:
+                message.add_attachment(f.read(), maintype=maintype, subtype=subtype, filename=name)
+        return message
+
+    def _send(self, message: EmailMessage) -> dict:
+        """Deliver one message; returns the recipients the relay refused while accepting the others"""
+        try:
+            try:
+                refused = self._connect().send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                # The relay dropped an idle connection; reconnect once
+                self._disconnect()
+                refused = self._connect().send_message(message)
+        except (smtplib.SMTPSenderRefused, smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError):
+            raise  # smtplib already sent RSET, the connection carries the next message
+        except (smtplib.SMTPException, OSError):
+            self._disconnect()
+            raise
+        self._last_used = time.monotonic()
+        return refused
+
+    def drain_once(self) -> int:
+        """Claim and deliver one batch; returns the number of messages handled"""
+        db = self.session_factory()
+        try:
+            batch = self._claim(db)
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            sent_ids, failures, unsent, partial = [], [], [], []
+            for email in batch:
+                if self._stop.is_set():
+                    unsent.append(email.email_id)  # shutting down; hand the rest back to the queue
+                    continue
+                try:
+                    refused = self._send(self._message(email))
+                    sent_ids.append(email.email_id)
+                    if refused:
+                        partial.append((email, refused))
+                except Exception as e:
+                    failures.append((email, e))
+
+            now = datetime.utcnow()
+            sent = set(sent_ids)
+            if sent_ids:
+                db.execute(
+                    update(OutboxEmail)
+                    .where(OutboxEmail.email_id.in_(sent_ids))
+                    .values(status="sent", sent_at=now, claim_token=None, claimed_until=None,
+                            attempts=OutboxEmail.attempts + 1)
+                    .execution_options(synchronize_session=False)
+                )
+                self._lags.extend((now - email.created_at).total_seconds()
+                                  for email in batch if email.email_id in sent)
+            for email, refused in partial:
+                email.last_error = f"Refused recipients: {refused}"[:2000]
+            if unsent:
+                db.execute(
+                    update(OutboxEmail)
+                    .where(OutboxEmail.email_id.in_(unsent))
+                    .values(status="pending", claim_token=None, claimed_until=None)
+                    .execution_options(synchronize_session=False)
+                )
+            for email, error in failures:
+                attempts = email.attempts + 1
+                dead = attempts >= self.max_attempts or is_permanent(error)
+                delay = min(self.backoff_seconds * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+                email.attempts = attempts
+                email.status = "dead" if dead else "pending"
+                email.next_attempt_at = now + timedelta(seconds=delay)
+                email.claim_token = None
+                email.claimed_until = None
+                email.last_error = f"{type(error).__name__}: {error}"[:2000]
+                if dead:
+                    self.dead += 1
+                    logger.warning(f"Email {email.email_id} dead-lettered after {attempts} attempt(s): {error}")
+                else:
+                    self.retries += 1
+            finished = [email.attachment_path for email in batch
+                        if email.email_id in sent or email.status == "dead"]
+            db.commit()
+
+            for path in finished:
+                remove_attachment(path)
+            self.sent += len(sent_ids)
+            self.batches += 1
+            self.busy_seconds += time.perf_counter() - started
+            return len(sent_ids) + len(failures)
+        finally:
+            db.close()
+
+    def metrics(self) -> dict:
+        lags = sorted(self._lags)
+        lag_ms = {}
+        if lags:
+            lag_ms = {
+                "avg": round(sum(lags) / len(lags) * 1000, 1),
+                "p50": round(lags[len(lags) // 2] * 1000, 1),
+                "p99": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 1),
+                "max": round(lags[-1] * 1000, 1),
+            }
+        return {
+            "enabled": self.enabled,
+            "sent": self.sent,
+            "retries": self.retries,
+            "dead_lettered": self.dead,
+            "batches": self.batches,
+            "smtp_connections": self.connections,
+            "sent_per_second": round(self.sent / self.busy_seconds, 1) if self.busy_seconds else 0,
+            "queue_lag_ms": lag_ms,
+        }
+
+# Application-wide worker; idle unless SMTP_HOST is configured
+outbox_worker = OutboxWorker(
+    SessionLocal,
+    settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USERNAME,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    sender=settings.SMTP_FROM,
+    timeout=settings.SMTP_TIMEOUT,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    backoff_seconds=settings.OUTBOX_BACKOFF_SECONDS,
+)
@@ -0,0 +1,85 @@
+"""
+Payment application - atomic balance updates with idempotency keys
+
+The invoice balance is never read into Python: one UPDATE adds the payment to
+`amount_paid` and derives the status from the new total, so concurrent
+payments against the same invoice serialize on the row lock instead of
+overwriting each other. The payment row is inserted in the same transaction;
+a unique (filtered) index on `idempotency_key` turns a retried gateway
+callback into a lookup of the payment that was already recorded.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.billing import Billing, Payment
+from app.schemas.billing import PaymentCreate
+
+class InvoiceNotFound(Exception):
+    pass
+
+class IdempotencyConflict(Exception):
+    """The idempotency key was already used for a different payment"""
+
+@dataclass
+class AppliedPayment:
+    payment: Payment
+    replayed: bool = False
+
+def _find_by_key(db: Session, idempotency_key: str) -> Optional[Payment]:
+    return db.query(Payment).filter(Payment.idempotency_key == idempotency_key).first()
+
+def _check_replay(payment: Payment, payment_data: PaymentCreate) -> AppliedPayment:
+    if payment.billing_id != payment_data.billing_id or payment.payment_amount != payment_data.payment_amount:
+        raise IdempotencyConflict(
+            f"Idempotency key already used for payment {payment.payment_id}"
+        )
+    return AppliedPayment(payment, replayed=True)
+
+def apply_payment(db: Session, payment_data: PaymentCreate, recorded_by: Optional[int] = None,
+                  idempotency_key: Optional[str] = None) -> AppliedPayment:
+    """Record a payment and add it to the invoice balance in one transaction"""
+    if idempotency_key:
+        existing = _find_by_key(db, idempotency_key)
+        if existing:
+            return _check_replay(existing, payment_data)
+
+    new_paid = func.coalesce(Billing.amount_paid, 0) + payment_data.payment_amount
+    updated = db.execute(
+        update(Billing)
+        .where(Billing.billing_id == payment_data.billing_id)
+        .values(
+            amount_paid=new_paid,
+            status=case((new_paid >= Billing.total_amount, "paid"), else_=Billing.status),
+            payment_method=payment_data.payment_method,
+            payment_date=payment_data.payment_date,
+            payment_reference=payment_data.reference_number,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not updated:
+        db.rollback()
+        raise InvoiceNotFound(f"Billing record {payment_data.billing_id} not found")
+
+    payment = Payment(
+        **payment_data.model_dump(),
+        idempotency_key=idempotency_key,
+        recorded_by=recorded_by,
+    )
+    db.add(payment)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key won; its balance update stands, ours is rolled back
+        db.rollback()
+        existing = _find_by_key(db, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return _check_replay(existing, payment_data)
+
+    db.refresh(payment)
+    return AppliedPayment(payment)
@@ -0,0 +1,151 @@
+"""
+Minimal PDF writer for invoices
+
+Produces plain text-and-rule PDFs with the standard Helvetica fonts, so no
+rendering library is required. Output is deterministic: the same payload
+always yields the same bytes. This module has no database imports because it
+runs inside the invoice rendering process pool.
+"""
+
+import os
+import tempfile
+from typing import List, Tuple
+
+PAGE_WIDTH = 612  # US Letter, points
+PAGE_HEIGHT = 792
+MARGIN = 50
+LINE_HEIGHT = 14
+ITEMS_BOTTOM = 110  # leave room for the footer / totals
+
+# (x, y, font, size, text) - font is "F1" regular or "F2" bold; text None draws a rule at y
+Element = Tuple[float, float, str, int, str]
+
+def _escape(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _content_stream(elements: List[Element]) -> bytes:
+    commands = []
+    for x, y, font, size, text in elements:
+        if text is None:
+            commands.append(f"0.6 G 0.5 w {x:.1f} {y:.1f} m {PAGE_WIDTH - MARGIN:.1f} {y:.1f} l S")
+        else:
+            commands.append(f"BT /{font} {size} Tf {x:.1f} {y:.1f} Td ({_escape(text)}) Tj ET")
+    return "\n".join(commands).encode("latin-1")
+
+def build_pdf(pages: List[List[Element]]) -> bytes:
+    """Serialize pages of positioned text into a PDF 1.4 document"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_numbers = []
+    for elements in pages:
+        stream = _content_stream(elements)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_number = len(objects)
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_number} 0 R >>"
+        ).encode("latin-1"))
+        page_numbers.append(len(objects))
+    kids = " ".join(f"{number} 0 R" for number in page_numbers)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode("latin-1")
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+def _right(x: float, text: str, size: int) -> float:
+    """X position that right-aligns text ending at x (Helvetica averages ~0.5em per glyph)"""
+    return x - len(text) * size * 0.5
+
+def _clip(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+def layout_invoice(payload: dict) -> List[List[Element]]:
+    """Lay the invoice payload out on as many pages as the line items need"""
+    right = PAGE_WIDTH - MARGIN
+    header = [
+        (MARGIN, 742, "F2", 18, payload["firm_name"]),
+        (_right(right, "INVOICE", 16), 742, "F2", 16, "INVOICE"),
+        (MARGIN, 712, "F1", 10, f"Invoice number: {payload['invoice_number']}"),
+        (MARGIN, 698, "F1", 10, f"Invoice date: {payload['invoice_date']}"),
+        (MARGIN, 684, "F1", 10, f"Due date: {payload['due_date']}"),
+        (330, 712, "F2", 10, "Bill to"),
+        (330, 698, "F1", 10, _clip(payload["client_name"], 45)),
+        (330, 684, "F1", 10, f"Client #{payload['client_number']}"),
+        (330, 670, "F1", 10, _clip(f"Case {payload['case_number']} ({payload['case_type']})", 45)),
+        (MARGIN, 640, "F2", 9, "Date"),
+        (120, 640, "F2", 9, "Description"),
+        (_right(420, "Hours", 9), 640, "F2", 9, "Hours"),
+        (_right(490, "Rate", 9), 640, "F2", 9, "Rate"),
+        (_right(right, "Amount", 9), 640, "F2", 9, "Amount"),
+        (MARGIN, 634, "F1", 0, None),
+    ]
+
+    items = payload["line_items"] or [{
+        "date": "", "description": payload["description"] or "Professional services",
+        "hours": payload["hours_worked"], "rate": payload["hourly_rate"], "amount": payload["subtotal"],
+    }]
+
+    pages, elements, y = [], list(header), 620
+    for item in items:
+        if y < ITEMS_BOTTOM:
+            pages.append(elements)
+            elements, y = list(header), 620
+        elements += [
+            (MARGIN, y, "F1", 9, item["date"]),
+            (120, y, "F1", 9, _clip(item["description"], 48)),
+            (_right(420, item["hours"], 9), y, "F1", 9, item["hours"]),
+            (_right(490, item["rate"], 9), y, "F1", 9, item["rate"]),
+            (_right(right, item["amount"], 9), y, "F1", 9, item["amount"]),
+        ]
+        y -= LINE_HEIGHT
+
+    if y < ITEMS_BOTTOM + 20:
+        pages.append(elements)
+        elements, y = list(header), 620
+    elements.append((MARGIN, y + 6, "F1", 0, None))
+    for label, value, font in (
+        ("Subtotal", payload["subtotal"], "F1"),
+        ("Tax", payload["tax_amount"], "F1"),
+        ("Total", payload["total_amount"], "F2"),
+        ("Paid", payload["amount_paid"], "F1"),
+        ("Balance due", payload["balance_due"], "F2"),
+    ):
+        y -= LINE_HEIGHT
+        elements += [(400, y, font, 10, label), (_right(right, value, 10), y, font, 10, value)]
+    pages.append(elements)
+
+    for number, page in enumerate(pages, start=1):
+        footer = f"{payload['invoice_number']} - page {number} of {len(pages)}"
+        page.append((MARGIN, 40, "F1", 8, footer))
+    return pages
+
+def render_invoice_pdf(payload: dict) -> bytes:
+    return build_pdf(layout_invoice(payload))
+
+def render_invoice_to_file(payload: dict, path: str) -> int:
+    """Render in a pool worker and publish the file atomically; returns its size"""
+    data = render_invoice_pdf(payload)
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(data)
@@ -0,0 +1,164 @@
+"""
+Background thumbnail and preview generation
+
+`upload_document` hands each new blob to `PreviewGenerator.submit`; the
+derivatives are produced in a spawn-based process pool (decoding a 12MP scan
+is CPU-bound and would stall the event loop) and the outcome is written to
+`Document.preview_status`. Until a derivative exists the preview endpoint
+serves a placeholder, and a document whose job was lost (e.g. a restart
+while pending) is resubmitted the next time its preview is requested.
+Workers read the blob from disk, so derivatives need the local storage
+driver; on object storage every document gets the placeholder.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document
+from app.services.imaging import FAILED, PENDING, PREVIEWABLE_TYPES, UNSUPPORTED, derivative_path, render_derivatives
+from app.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+def initial_status(mime_type: Optional[str], encrypted: bool = False) -> str:
+    # Derivatives would be plaintext copies of an encrypted document
+    previewable = mime_type in PREVIEWABLE_TYPES and not encrypted and storage.local
+    return PENDING if previewable else UNSUPPORTED
+
+def derivative_file(file_path: str, kind: str) -> Optional[str]:
+    """Path of a blob's `thumb` or `preview` derivative, when derivatives are kept"""
+    if not storage.local:
+        return None
+    return derivative_path(storage.local_path(file_path), kind)
+
+def remove_derivatives(file_path: str):
+    for kind in ("thumb", "preview"):
+        path = derivative_file(file_path, kind)
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class PreviewGenerator:
+    """Render document derivatives in worker processes and record the result"""
+
+    def __init__(self, session_factory: Callable[[], Session], workers: int,
+                 thumb_size: int = 256, preview_size: int = 1024):
+        self.session_factory = session_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.thumb_size = thumb_size
+        self.preview_size = preview_size
+        self.generated = 0
+        self.unsupported = 0
+        self.failed = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight: Dict[int, Future] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs server threads is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def is_pending(self, document_id: int) -> bool:
+        return document_id in self._in_flight
+
+    def submit(self, document_id: int, file_path: str, mime_type: str) -> Future:
+        """Queue derivative generation; a job already in flight for the document is reused"""
+        executor = self._pool()
+        with self._lock:
+            pending = self._in_flight.get(document_id)
+            if pending is not None:
+                return pending
+            job = executor.submit(render_derivatives, storage.local_path(file_path), mime_type,
+                                  self.thumb_size, self.preview_size)
+            self._in_flight[document_id] = job
+
+        def finished(job: Future):
+            with self._lock:
+                self._in_flight.pop(document_id, None)
+            if job.cancelled():
+                return  # shutting down; stays pending and is resubmitted on the next preview request
+            error = job.exception()
+            if error is not None:
+                logger.error(f"Preview generation for document {document_id} failed: {error}")
+                if isinstance(error, BrokenProcessPool):
+                    self._discard_pool(executor)
+                self.failed += 1
+                result = FAILED
+            else:
+                result = job.result()
+                if result == UNSUPPORTED:
+                    self.unsupported += 1
+                else:
+                    self.generated += 1
+            self._record(document_id, result)
+
+        job.add_done_callback(finished)
+        return job
+
+    def request(self, document: Document):
+        """Queue a document's derivatives; a pool failure is logged, never raised to the request"""
+        try:
+            self.submit(document.document_id, document.file_path, document.mime_type)
+        except Exception as e:
+            logger.error(f"Could not queue preview for document {document.document_id}: {e}")
+            if isinstance(e, BrokenProcessPool) and self._executor is not None:
+                self._discard_pool(self._executor)
+
+    def _record(self, document_id: int, result: str):
+        db = self.session_factory()
+        try:
+            db.execute(update(Document).where(Document.document_id == document_id)
+                       .values(preview_status=result))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Recording preview status for document {document_id} failed: {e}")
+        finally:
+            db.close()
+
+    def _discard_pool(self, executor: ProcessPoolExecutor):
+        """A worker died; the next job starts a fresh pool"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "generated": self.generated,
+            "unsupported": self.unsupported,
+            "failed": self.failed,
+            "in_flight": len(self._in_flight),
+        }
+
+# Application-wide generator
+preview_generator = PreviewGenerator(
+    SessionLocal,
+    settings.PREVIEW_WORKERS,
+    thumb_size=settings.PREVIEW_THUMB_SIZE,
+    preview_size=settings.PREVIEW_SIZE,
+)
@@ -0,0 +1,370 @@
+"""
+Bank reconciliation import - streaming CSV/OFX payment files
+
+The file is parsed one transaction at a time and matched to invoices through
+an invoice-number index loaded once per import. Matched lines are buffered in
+batches: each batch is one bulk INSERT into payments plus one executemany
+UPDATE that adds the per-invoice totals to `amount_paid`, committed together.
+Lines that cannot be applied are written straight to an exceptions CSV, so
+memory stays flat however large the file is.
+"""
+
+import codecs
+import csv
+import glob
+import io
+import os
+import re
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, case, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.billing import Billing, Payment
+
+DEFAULT_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 64 * 1024
+
+# Accepted CSV header names (lower-cased) for each field
+CSV_COLUMNS = {
+    "amount": ("amount", "payment_amount", "credit", "deposit"),
+    "posted": ("date", "payment_date", "posted_date", "posting_date", "value_date"),
+    "invoice_number": ("invoice_number", "invoice", "invoice_no"),
+    "reference": ("reference", "reference_number", "ref", "check_number"),
+    "transaction_id": ("transaction_id", "fitid", "bank_reference", "id"),
+    "method": ("payment_method", "method", "type"),
+    "memo": ("memo", "description", "details", "name"),
+}
+
+DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%d-%b-%Y", "%Y%m%d")
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-_/]*")
+
+EXCEPTION_FIELDS = ["line", "reason", "amount", "date", "invoice_number", "reference", "transaction_id", "memo"]
+
+@dataclass
+class BankLine:
+    line: int
+    amount: str = ""
+    posted: str = ""
+    invoice_number: str = ""
+    reference: str = ""
+    transaction_id: str = ""
+    method: str = ""
+    memo: str = ""
+
+@dataclass
+class ReconciliationResult:
+    import_id: str
+    file_format: str
+    total_lines: int = 0
+    matched_lines: int = 0
+    payments_created: int = 0
+    duplicate_lines: int = 0
+    exception_lines: int = 0
+    amount_applied: Decimal = Decimal("0.00")
+    invoices_updated: Set[int] = field(default_factory=set)
+    elapsed_seconds: float = 0.0
+
+# Parsers
+
+def detect_format(filename: Optional[str], head: bytes) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ofx", ".qfx")) or b"OFXHEADER" in head or b"<OFX>" in head.upper():
+        return "ofx"
+    return "csv"
+
+def _text_stream(stream: BinaryIO) -> io.TextIOWrapper:
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+
+def parse_csv(stream: BinaryIO) -> Iterator[BankLine]:
+    """Yield one BankLine per CSV row; the header row picks the columns"""
+    reader = csv.reader(_text_stream(stream))
+    header = next(reader, None)
+    if not header:
+        return
+    header = [name.strip().lower() for name in header]
+    positions = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                positions[key] = header.index(alias)
+                break
+    missing = [label for key, label in (("amount", "amount"), ("posted", "date")) if key not in positions]
+    if missing:
+        raise ValueError(f"CSV header has no {' or '.join(missing)} column")
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        values = {
+            key: row[index].strip() if index < len(row) else ""
+            for key, index in positions.items()
+        }
+        yield BankLine(line=reader.line_num, **values)
+
+def _ofx_tokens(stream: BinaryIO) -> Iterator[tuple]:
+    """Yield (tag, value) pairs from OFX SGML or XML, reading fixed-size chunks"""
+    decoder = codecs.getincrementaldecoder("latin-1")()
+    pending = ""
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        pending += decoder.decode(chunk or b"", final=not chunk)
+        pieces = pending.split("<")
+        # The last piece may be cut mid-element; keep it for the next chunk
+        pending = pieces.pop() if chunk else ""
+        for piece in pieces:
+            tag, sep, value = piece.partition(">")
+            if sep:
+                yield tag.strip().upper(), value.strip()
+        if not chunk:
+            return
+
+OFX_FIELDS = {
+    "TRNAMT": "amount",
+    "DTPOSTED": "posted",
+    "FITID": "transaction_id",
+    "REFNUM": "reference",
+    "CHECKNUM": "reference",
+    "NAME": "memo",
+    "MEMO": "memo",
+    "TRNTYPE": "method",
+}
+
+def parse_ofx(stream: BinaryIO) -> Iterator[BankLine]:
+    """Yield one BankLine per STMTTRN aggregate"""
+    current = None
+    count = 0
+    for tag, value in _ofx_tokens(stream):
+        if tag == "STMTTRN":
+            count += 1
+            current = BankLine(line=count)
+        elif tag == "/STMTTRN" and current is not None:
+            yield current
+            current = None
+        elif current is not None and tag in OFX_FIELDS:
+            key = OFX_FIELDS[tag]
+            if key == "posted":
+                value = value[:8]
+            elif key == "method":
+                value = "check" if value.upper() == "CHECK" else "bank_transfer"
+            existing = getattr(current, key)
+            setattr(current, key, f"{existing} {value}".strip() if key == "memo" else value)
+
+# Matching
+
+def load_invoice_index(db: Session, lawyer_id: Optional[int] = None) -> Dict[str, int]:
+    """Map normalized invoice numbers to billing ids, streamed from one query"""
+    query = select(Billing.invoice_number, Billing.billing_id).where(
+        Billing.invoice_number.isnot(None),
+        Billing.status != "cancelled",
+    )
+    if lawyer_id:
+        query = query.where(Billing.lawyer_id == lawyer_id)
+    return {
+        _normalize(invoice_number): billing_id
+        for invoice_number, billing_id in db.execute(query.execution_options(yield_per=5000))
+    }
+
+def _normalize(value: str) -> str:
+    return value.strip().upper()
+
+def match_invoice(index: Dict[str, int], line: BankLine) -> Optional[int]:
+    for candidate in (line.invoice_number, line.reference):
+        if candidate and _normalize(candidate) in index:
+            return index[_normalize(candidate)]
+    # Fall back to invoice numbers quoted inside the reference or memo text
+    for text in (line.reference, line.memo):
+        for token in TOKEN_PATTERN.findall(text or ""):
+            billing_id = index.get(token.upper())
+            if billing_id:
+                return billing_id
+    return None
+
+def _parse_amount(value: str) -> Optional[Decimal]:
+    cleaned = value.replace("$", "").replace(",", "").strip()
+    if cleaned.startswith("(") and cleaned.endswith(")"):
+        cleaned = "-" + cleaned[1:-1]
+    try:
+        amount = Decimal(cleaned)
+    except (InvalidOperation, ValueError):
+        return None
+    return amount.quantize(Decimal("0.01")) if amount.is_finite() else None
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+# Import
+
+def _balance_update():
+    """Per-invoice UPDATE run as one executemany; the balance is never read into Python"""
+    billing = Billing.__table__
+    new_paid = func.coalesce(billing.c.amount_paid, 0) + bindparam("b_amount")
+    return (
+        billing.update()
+        .where(billing.c.billing_id == bindparam("b_id"))
+        .values(
+            amount_paid=new_paid,
+            status=case((new_paid >= billing.c.total_amount, "paid"), else_=billing.c.status),
+            payment_date=bindparam("b_date"),
+        )
+    )
+
+def report_path(import_id: str, recorded_by: Optional[int]) -> str:
+    # The importing user is part of the name, so the download can be scoped to them
+    return os.path.join(settings.RECONCILIATION_REPORT_DIR, f"{import_id}-{recorded_by or 0}-exceptions.csv")
+
+def find_report(import_id: str) -> Optional[Tuple[str, Optional[int]]]:
+    """Path of an import's exceptions report and the user who ran the import, or None"""
+    if not re.fullmatch(r"[0-9a-f]{32}", import_id):
+        return None
+    for path in glob.glob(os.path.join(settings.RECONCILIATION_REPORT_DIR, f"{import_id}-*-exceptions.csv")):
+        owner = os.path.basename(path)[len(import_id) + 1:-len("-exceptions.csv")]
+        if owner.isdigit():
+            return path, int(owner) or None
+    # Written before reports recorded their owner
+    legacy = os.path.join(settings.RECONCILIATION_REPORT_DIR, f"{import_id}-exceptions.csv")
+    return (legacy, None) if os.path.exists(legacy) else None
+
+class _Importer:
+    def __init__(self, db: Session, result: ReconciliationResult, index: Dict[str, int],
+                 recorded_by: Optional[int], batch_size: int, report):
+        self.db = db
+        self.result = result
+        self.index = index
+        self.recorded_by = recorded_by
+        self.batch_size = batch_size
+        self.report = report
+        self.batch: List[tuple] = []
+
+    def reject(self, line: BankLine, reason: str):
+        self.result.exception_lines += 1
+        self.report.writerow([
+            line.line, reason, line.amount, line.posted, line.invoice_number,
+            line.reference, line.transaction_id, line.memo,
+        ])
+
+    def add(self, line: BankLine):
+        self.result.total_lines += 1
+        amount = _parse_amount(line.amount)
+        if amount is None:
+            return self.reject(line, "invalid amount")
+        if amount <= 0:
+            return self.reject(line, "not a credit")
+        posted = _parse_date(line.posted)
+        if posted is None:
+            return self.reject(line, "invalid date")
+        billing_id = match_invoice(self.index, line)
+        if billing_id is None:
+            return self.reject(line, "no matching invoice")
+
+        self.result.matched_lines += 1
+        self.batch.append((line, billing_id, amount, posted))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def _prepare(self):
+        """Split the batch into new payments (with per-invoice totals) and already-applied lines"""
+        # Bank transaction ids become idempotency keys, so re-importing a file is a no-op
+        keys = {f"bank:{line.transaction_id}" for line, *_ in self.batch if line.transaction_id}
+        seen = set(self.db.scalars(
+            select(Payment.idempotency_key).where(Payment.idempotency_key.in_(keys))
+        )) if keys else set()
+
+        payments = []
+        duplicates = []
+        totals: Dict[int, list] = defaultdict(lambda: [Decimal("0.00"), None])
+        for line, billing_id, amount, posted in self.batch:
+            key = f"bank:{line.transaction_id}" if line.transaction_id else None
+            if key in seen:
+                duplicates.append(line)
+                continue
+            if key:
+                seen.add(key)
+            reference = line.reference or line.transaction_id
+            payments.append({
+                "billing_id": billing_id,
+                "payment_amount": amount,
+                "payment_date": posted,
+                "payment_method": (line.method or "bank_transfer")[:50],
+                "reference_number": reference[:100] if reference else None,
+                "idempotency_key": key,
+                "notes": line.memo[:2000] if line.memo else None,
+                "recorded_by": self.recorded_by,
+            })
+            total = totals[billing_id]
+            total[0] += amount
+            total[1] = max(total[1], posted) if total[1] else posted
+        return payments, totals, duplicates
+
+    def flush(self, attempts: int = 3):
+        if not self.batch:
+            return
+        for attempt in range(attempts):
+            payments, totals, duplicates = self._prepare()
+            if not payments:
+                break
+            try:
+                self.db.execute(insert(Payment), payments)
+                self.db.execute(_balance_update(), [
+                    {"b_id": billing_id, "b_amount": amount, "b_date": posted}
+                    for billing_id, (amount, posted) in totals.items()
+                ])
+                self.db.commit()
+                break
+            except IntegrityError:
+                # A concurrent import of the same file applied some of these first; its balance
+                # updates stand, ours are rolled back and the batch is matched again
+                self.db.rollback()
+                if attempt == attempts - 1:
+                    raise
+
+        for line in duplicates:
+            self.result.duplicate_lines += 1
+            self.reject(line, "duplicate transaction")
+        self.result.payments_created += len(payments)
+        self.result.amount_applied += sum(payment["payment_amount"] for payment in payments)
+        self.result.invoices_updated.update(totals)
+        self.batch = []
+
+def import_bank_file(db: Session, stream: BinaryIO, file_format: str, recorded_by: Optional[int] = None,
+                     lawyer_id: Optional[int] = None,
+                     batch_size: int = DEFAULT_BATCH_SIZE) -> ReconciliationResult:
+    """Apply every matching line of a bank/lockbox file; unmatched lines go to the exceptions report"""
+    started = time.perf_counter()
+    result = ReconciliationResult(import_id=uuid.uuid4().hex, file_format=file_format)
+    index = load_invoice_index(db, lawyer_id)
+    parser = parse_ofx if file_format == "ofx" else parse_csv
+
+    os.makedirs(settings.RECONCILIATION_REPORT_DIR, exist_ok=True)
+    with open(report_path(result.import_id, recorded_by), "w", newline="", encoding="utf-8") as report_file:
+        report = csv.writer(report_file)
+        report.writerow(EXCEPTION_FIELDS)
+        importer = _Importer(db, result, index, recorded_by, batch_size, report)
+        try:
+            for line in parser(stream):
+                importer.add(line)
+            importer.flush()
+        except Exception:
+            db.rollback()
+            raise
+
+    result.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return result
@@ -0,0 +1,145 @@
+"""
+Moving documents to the sharded storage layout
+
+New blobs are keyed `<prefix>/ab/cd/<name>` (see `storage.new_key`), but
+documents uploaded before STORAGE_SHARD_LEVELS existed sit in one flat
+directory. `shard_documents` moves them while the API keeps serving: each
+batch copies the blobs (a hard link on local storage, a server-side copy on
+S3) together with their preview derivatives, points the documents at the
+new keys with guarded UPDATEs in one transaction, and removes the old blobs
+once that is committed. A document that changed meanwhile - a new version,
+tiering, encryption - fails its guard, keeps its key and has its copy
+removed. Only documents not yet sharded are selected, so an interrupted run
+simply continues on the next one; `max_per_second` throttles the moves.
+Run `python shard_documents.py`.
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.services.previews import derivative_file
+from app.services.storage import storage
+from app.services.tiering import CODEC_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ShardingResult:
+    moved: int = 0
+    missing: int = 0
+    conflicts: int = 0
+    batches: int = 0
+
+def _blob_key(file_path: str, codec: Optional[str]) -> str:
+    return file_path + CODEC_SUFFIXES[codec] if codec else file_path
+
+def _derivatives(old_path: str, new_path: str) -> List[Tuple[str, str]]:
+    pairs = []
+    for kind in ("thumb", "preview"):
+        old, new = derivative_file(old_path, kind), derivative_file(new_path, kind)
+        if old and os.path.exists(old):
+            pairs.append((old, new))
+    return pairs
+
+def _link(source: str, target: str):
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    if os.path.exists(target):
+        os.remove(target)
+    os.link(source, target)
+
+def _remove(key: str, files: List[str]):
+    """Best effort - a blob still open for a download cannot be removed on Windows"""
+    try:
+        storage.delete(key)
+    except OSError as e:
+        logger.warning(f"Could not remove {key}: {e}")
+    for path in files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def unsharded(db: Session, after_id: int, batch_size: int):
+    """The next documents by id; the caller skips those already sharded"""
+    return db.query(Document.document_id, Document.file_path, Document.storage_codec).filter(
+        Document.document_id > after_id, Document.file_path.isnot(None)
+    ).order_by(Document.document_id).limit(batch_size).all()
+
+def _move_batch(db: Session, rows, result: ShardingResult):
+    copies = []
+    for document_id, old_path, codec in rows:
+        new_path = storage.sharded_key(old_path)
+        try:
+            storage.copy(_blob_key(old_path, codec), _blob_key(new_path, codec))
+        except FileNotFoundError:
+            result.missing += 1
+            continue
+        derivatives = _derivatives(old_path, new_path)
+        for old, new in derivatives:
+            _link(old, new)
+        copies.append((document_id, old_path, new_path, codec, derivatives))
+
+    try:
+        updated = set()
+        for document_id, old_path, new_path, codec, _ in copies:
+            # Guarded: the blob copied must still be the document's current one
+            if db.execute(update(Document).where(
+                Document.document_id == document_id,
+                Document.file_path == old_path,
+                Document.storage_codec.is_(None) if codec is None else Document.storage_codec == codec,
+            ).values(file_path=new_path)).rowcount:
+                updated.add(document_id)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        for _, _, new_path, codec, derivatives in copies:
+            _remove(_blob_key(new_path, codec), [new for _, new in derivatives])
+        raise
+
+    for document_id, old_path, new_path, codec, derivatives in copies:
+        if document_id in updated:
+            _remove(_blob_key(old_path, codec), [old for old, _ in derivatives])
+            result.moved += 1
+        else:
+            _remove(_blob_key(new_path, codec), [new for _, new in derivatives])
+            result.conflicts += 1
+
+def shard_documents(db: Session, batch_size: int = 200, max_per_second: float = 0,
+                    limit: Optional[int] = None) -> ShardingResult:
+    """Move flat-layout documents to sharded keys, committing after each batch"""
+    result = ShardingResult()
+    if not storage.shard_levels:
+        return result
+    after_id = 0
+    remaining = limit
+    while remaining is None or remaining > 0:
+        rows = unsharded(db, after_id, batch_size)
+        if not rows:
+            break
+        after_id = rows[-1].document_id
+        flat = [row for row in rows if not storage.is_sharded(row.file_path)]
+        if remaining is not None:
+            flat = flat[:remaining]
+            remaining -= len(flat)
+        if not flat:
+            continue
+        began = time.perf_counter()
+        _move_batch(db, flat, result)
+        result.batches += 1
+        if max_per_second:
+            # Leaves I/O and row locks for the requests being served meanwhile
+            time.sleep(max(len(flat) / max_per_second - (time.perf_counter() - began), 0))
+    logger.info(f"Sharded {result.moved} documents ({result.conflicts} changed meanwhile, {result.missing} missing)")
+    return result
+
+def sharding_stats(db: Session) -> dict:
+    flat = sum(1 for (file_path,) in db.query(Document.file_path).filter(Document.file_path.isnot(None)).yield_per(5000)
+               if not storage.is_sharded(file_path))
+    return {"shard_levels": storage.shard_levels, "flat_documents": flat}
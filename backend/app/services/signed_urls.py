@@ -0,0 +1,133 @@
+"""
+Signed, short-lived download URLs
+
+After one permission check the documents router issues a token that carries
+everything needed to serve the file - blob path, codec, name, type, size,
+and who it was issued to - authenticated with HMAC-SHA256 and an expiry.
+The /api/files route verifies the token and streams the blob without
+opening a database session, or hands the transfer to the front proxy with
+X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd). On object
+storage a plain blob is redirected to a presigned URL of the bucket that
+expires with the link.
+
+A link cannot be revoked before it expires, so DOWNLOAD_URL_TTL_SECONDS is
+kept short; changing the signing secret invalidates every outstanding link.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from app.core.config import settings
+from app.models.document import Document
+from app.services import tiering
+from app.services.storage import storage
+
+class SignedUrlError(Exception):
+    """Token is malformed, tampered with or expired"""
+
+class LinkExpired(SignedUrlError):
+    pass
+
+@dataclass(frozen=True)
+class SignedDownload:
+    document_id: int
+    case_id: int
+    user_id: int
+    file_path: str
+    storage_codec: Optional[str]
+    document_name: str
+    mime_type: Optional[str]
+    file_size: Optional[int]
+    is_encrypted: bool
+    expires: int
+
+    def as_document(self) -> Document:
+        """Transient (never added to a session) Document for the tiering readers"""
+        return Document(document_id=self.document_id, file_path=self.file_path,
+                        storage_codec=self.storage_codec, is_encrypted=self.is_encrypted,
+                        document_name=self.document_name, mime_type=self.mime_type, file_size=self.file_size)
+
+def _key() -> bytes:
+    secret = settings.DOWNLOAD_URL_SECRET or settings.SECRET_KEY
+    # Derived so a leaked link key is not also the JWT signing key
+    return hmac.new(secret.encode(), b"document-download-url", hashlib.sha256).digest()
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def issue(document: Document, user_id: int, ttl_seconds: Optional[int] = None) -> Tuple[str, int]:
+    """Token for downloading the document's current content; returns (token, expiry epoch seconds)"""
+    ttl = min(ttl_seconds or settings.DOWNLOAD_URL_TTL_SECONDS, settings.DOWNLOAD_URL_TTL_SECONDS)
+    expires = int(time.time()) + ttl
+    payload = json.dumps({
+        "d": document.document_id, "c": document.case_id, "u": user_id,
+        "p": document.file_path, "z": document.storage_codec,
+        "n": document.document_name, "m": document.mime_type, "s": document.file_size,
+        "e": bool(document.is_encrypted), "x": expires,
+    }, separators=(",", ":")).encode()
+    signature = hmac.new(_key(), payload, hashlib.sha256).digest()
+    return f"{_b64encode(payload)}.{_b64encode(signature)}", expires
+
+def verify(token: str) -> SignedDownload:
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except ValueError:
+        raise SignedUrlError("Malformed download link")
+    if not hmac.compare_digest(signature, hmac.new(_key(), payload, hashlib.sha256).digest()):
+        raise SignedUrlError("Invalid download link")
+    claims = json.loads(payload)
+    if claims["x"] < time.time():
+        raise LinkExpired("Download link has expired")
+    return SignedDownload(
+        document_id=claims["d"], case_id=claims["c"], user_id=claims["u"],
+        file_path=claims["p"], storage_codec=claims["z"], document_name=claims["n"],
+        mime_type=claims["m"], file_size=claims["s"], is_encrypted=claims["e"], expires=claims["x"],
+    )
+
+def resolve_blob(download: SignedDownload) -> Optional[SignedDownload]:
+    """The signed blob, or the same content moved into the compressed tier or its shard after signing"""
+    file_paths = [download.file_path]
+    if not storage.is_sharded(download.file_path):
+        file_paths.append(storage.sharded_key(download.file_path))
+    for file_path in file_paths:
+        candidate = replace(download, file_path=file_path)
+        if tiering.blob_exists(candidate.as_document()):
+            return candidate
+        if download.storage_codec is None and not download.is_encrypted:
+            for codec, suffix in tiering.CODEC_SUFFIXES.items():
+                if storage.exists(file_path + suffix):
+                    return replace(candidate, storage_codec=codec)
+    return None
+
+def offload_headers(download: SignedDownload) -> Optional[dict]:
+    """Headers handing the transfer to the front proxy, or None to stream from Python"""
+    mode = settings.DOWNLOAD_OFFLOAD.lower()
+    if not mode or download.storage_codec or download.is_encrypted or not storage.local:
+        # Tiered and encrypted blobs are decoded on the way out, which the proxy cannot do
+        return None
+    path = storage.local_path(download.file_path)
+    if mode == "x-accel-redirect":
+        relative = os.path.relpath(path, settings.DOWNLOAD_OFFLOAD_ROOT).replace(os.sep, "/")
+        return {"X-Accel-Redirect": settings.DOWNLOAD_OFFLOAD_PREFIX.rstrip("/") + "/" + quote(relative)}
+    if mode == "x-sendfile":
+        return {"X-Sendfile": os.path.abspath(path)}
+    raise ValueError(f"Unknown DOWNLOAD_OFFLOAD mode: {settings.DOWNLOAD_OFFLOAD}")
+
+def presigned_url(download: SignedDownload) -> Optional[str]:
+    """Bucket URL for a plain blob on object storage, valid until the link expires"""
+    if download.storage_codec or download.is_encrypted:
+        return None
+    expires_in = max(int(download.expires - time.time()), 1)
+    return storage.presigned_url(download.file_path, expires_in, download.document_name, download.mime_type)
@@ -0,0 +1,407 @@
+"""
+Document blob storage
+
+Blobs are addressed by key - a '/'-separated path such as the value kept in
+`Document.file_path` - and reached only through a `StorageBackend`, so the
+API can run on several servers against shared object storage:
+
+- `LocalStorage` keeps blobs as files under STORAGE_LOCAL_ROOT (the working
+  directory by default, so existing `uploads/documents/...` keys stay valid).
+  Writes go to a temporary file that is renamed into place on success.
+- `S3Storage` keeps them in an S3-compatible bucket (AWS, MinIO, Ceph...)
+  through one shared boto3 client with a pooled HTTP connection set. Writes
+  are streamed as multipart uploads of S3_PART_SIZE_MB parts, reads are
+  ranged GETs, and a failed write aborts its multipart upload.
+
+New keys are sharded into STORAGE_SHARD_LEVELS directory levels named by a
+hash of the blob's name (`uploads/documents/ab/cd/<uuid>.pdf`), so no
+directory - or listing prefix - grows past a few thousand entries; see
+`app.services.sharding` for moving blobs stored under the flat layout.
+
+Both return seekable file objects from `open`, so decompression,
+decryption and byte ranges work the same way on either. Features that hand
+files to worker processes (previews, scan normalization) need `local` paths
+and are skipped on object storage.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import quote
+
+from app.core.config import settings
+
+try:
+    import boto3
+    from botocore.config import Config
+except ImportError:  # optional - only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1024 * 1024
+
+class ObjectStat(NamedTuple):
+    size: int
+    modified: Optional[datetime]
+
+class StorageBackend(ABC):
+    """Put, get, range-get, stat and delete blobs by key"""
+
+    # True when keys map to files that worker processes can open directly
+    local = False
+
+    def __init__(self, prefix: str, shard_levels: int = 0):
+        self.prefix = prefix.strip("/")
+        self.shard_levels = shard_levels
+
+    def _shards(self, name: str) -> list:
+        # By the stem, so a scan normalized from .png to .jpg stays in its shard
+        digest = hashlib.sha256(os.path.splitext(name)[0].encode()).hexdigest()
+        return [digest[2 * level:2 * level + 2] for level in range(self.shard_levels)]
+
+    def new_key(self, filename: str) -> str:
+        """Unique, sharded key for a new blob, keeping the upload's extension"""
+        name = f"{uuid.uuid4()}{os.path.splitext(filename)[1].lower()}"
+        return "/".join([self.prefix, *self._shards(name), name])
+
+    def sharded_key(self, key: str) -> str:
+        """Where a blob stored under the flat layout belongs (in the same parent directory)"""
+        directory, _, name = key.rpartition("/")
+        return "/".join([*([directory] if directory else []), *self._shards(name), name])
+
+    def is_sharded(self, key: str) -> bool:
+        parts = key.split("/")
+        return len(parts) > self.shard_levels and parts[len(parts) - 1 - self.shard_levels:-1] == self._shards(parts[-1])
+
+    @abstractmethod
+    @contextmanager
+    def open_write(self, key: str) -> Iterator[BinaryIO]:
+        """Writable file whose content replaces `key` when the block exits without an error"""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Seekable, readable file for the blob (FileNotFoundError if it does not exist)"""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        """Size and modification time of the blob, or None if it does not exist"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove the blob; a missing blob is not an error"""
+
+    def put_stream(self, key: str, blocks: Iterable[bytes]) -> int:
+        size = 0
+        with self.open_write(key) as f:
+            for block in blocks:
+                f.write(block)
+                size += len(block)
+        return size
+
+    def put_file(self, path: str, key: str, move: bool = False) -> int:
+        """Store a local file under `key` (and remove the file when `move`)"""
+        with open(path, "rb") as f:
+            size = self.put_stream(key, iter(lambda: f.read(BLOCK_SIZE), b""))
+        if move:
+            os.remove(path)
+        return size
+
+    def get_stream(self, key: str, start: int = 0, end: Optional[int] = None,
+                   block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+        """Blob bytes [start, end) in blocks"""
+        with self.open(key) as f:
+            if start:
+                f.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                block = f.read(block_size if remaining is None else min(block_size, remaining))
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                yield block
+
+    def copy(self, source: str, destination: str):
+        """Store the blob `source` under `destination` as well"""
+        self.put_stream(destination, self.get_stream(source))
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of the blob, for drivers that have one"""
+        return None
+
+    def presigned_url(self, key: str, expires_in: int, filename: str, mime_type: Optional[str]) -> Optional[str]:
+        """URL the client can download the blob from directly, for drivers that support it"""
+        return None
+
+class LocalStorage(StorageBackend):
+    local = True
+
+    def __init__(self, root: str, prefix: str, shard_levels: int = 0):
+        super().__init__(prefix, shard_levels)
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        # Absolute keys (rows written before storage was configurable) are used as they are
+        if ".." in key.split("/"):
+            raise ValueError(f"Invalid storage key: {key}")
+        return os.path.join(self.root, key)
+
+    def key_for(self, path: str) -> str:
+        """Key of a file already under the root (e.g. one rewritten by scan normalization)"""
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    @contextmanager
+    def open_write(self, key: str) -> Iterator[BinaryIO]:
+        path = self.local_path(key)
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def put_file(self, path: str, key: str, move: bool = False) -> int:
+        if not move:
+            return super().put_file(path, key)
+        target = self.local_path(key)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        # A rename when both are on one volume
+        shutil.move(path, target)
+        return os.path.getsize(target)
+
+    def copy(self, source: str, destination: str):
+        target = self.local_path(destination)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        temp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            # A hard link: no bytes are copied and both keys stay readable
+            os.link(self.local_path(source), temp_path)
+        except OSError as e:
+            if isinstance(e, FileNotFoundError):
+                raise
+            shutil.copyfile(self.local_path(source), temp_path)
+        os.replace(temp_path, target)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), "rb")
+
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        try:
+            result = os.stat(self.local_path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectStat(result.st_size, datetime.utcfromtimestamp(result.st_mtime))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+def _is_missing(error: Exception) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+class _MultipartWriter(io.RawIOBase):
+    """Buffers one part at a time; small blobs become a single PUT"""
+
+    def __init__(self, client, bucket: str, key: str, part_size: int):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = part_size
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self._part_size:
+            with memoryview(self._buffer) as view:
+                part = bytes(view[:self._part_size])
+            del self._buffer[:self._part_size]
+            self._upload_part(part)
+        return len(data)
+
+    def _upload_part(self, body: bytes):
+        if self._upload_id is None:
+            self._upload_id = self._client.create_multipart_upload(Bucket=self._bucket, Key=self._key)["UploadId"]
+        number = len(self._parts) + 1
+        response = self._client.upload_part(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+                                            PartNumber=number, Body=body)
+        self._parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def commit(self):
+        if self._upload_id is None:
+            self._client.put_object(Bucket=self._bucket, Key=self._key, Body=bytes(self._buffer))
+            return
+        if self._buffer or not self._parts:
+            self._upload_part(bytes(self._buffer))
+        self._client.complete_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+                                               MultipartUpload={"Parts": self._parts})
+
+    def abort(self):
+        if self._upload_id is not None:
+            try:
+                self._client.abort_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id)
+            except Exception as e:
+                # The bucket's lifecycle rule for incomplete uploads cleans up what is left
+                logger.error(f"Aborting multipart upload of {self._key} failed: {e}")
+
+class _ObjectReader(io.RawIOBase):
+    """Sequential reads share one ranged GET; a seek starts the next read at the new offset"""
+
+    def __init__(self, client, bucket: str, key: str, size: int):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._size = size
+        self._position = 0
+        self._body = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        position = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._size}[whence] + offset
+        if position != self._position:
+            self._close_body()
+            self._position = max(position, 0)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self._size:
+            return 0
+        if self._body is None:
+            self._body = self._client.get_object(Bucket=self._bucket, Key=self._key,
+                                                 Range=f"bytes={self._position}-")["Body"]
+        data = self._body.read(len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def _close_body(self):
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+    def close(self):
+        self._close_body()
+        super().close()
+
+class S3Storage(StorageBackend):
+    def __init__(self, client, bucket: str, prefix: str, part_size: int = 8 * 1024 * 1024, shard_levels: int = 0):
+        super().__init__(prefix, shard_levels)
+        self.client = client
+        self.bucket = bucket
+        # S3 requires parts of at least 5MB (except the last)
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+
+    @contextmanager
+    def open_write(self, key: str) -> Iterator[BinaryIO]:
+        writer = _MultipartWriter(self.client, self.bucket, key, self.part_size)
+        try:
+            yield writer
+            writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+    def open(self, key: str) -> BinaryIO:
+        stat = self.stat(key)
+        if stat is None:
+            raise FileNotFoundError(key)
+        return io.BufferedReader(_ObjectReader(self.client, self.bucket, key, stat.size), buffer_size=BLOCK_SIZE)
+
+    def get_stream(self, key: str, start: int = 0, end: Optional[int] = None,
+                   block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+        # One ranged GET, no HEAD first
+        byte_range = f"bytes={start}-" if end is None else f"bytes={start}-{end - 1}"
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=key, Range=byte_range)["Body"]
+        except Exception as e:
+            if _is_missing(e):
+                raise FileNotFoundError(key)
+            raise
+        try:
+            while block := body.read(block_size):
+                yield block
+        finally:
+            body.close()
+
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if _is_missing(e):
+                return None
+            raise
+        return ObjectStat(response["ContentLength"], response.get("LastModified"))
+
+    def copy(self, source: str, destination: str):
+        # Server-side; no bytes pass through the API server
+        try:
+            self.client.copy_object(Bucket=self.bucket, Key=destination,
+                                    CopySource={"Bucket": self.bucket, "Key": source})
+        except Exception as e:
+            if _is_missing(e):
+                raise FileNotFoundError(source)
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def presigned_url(self, key: str, expires_in: int, filename: str, mime_type: Optional[str]) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": key,
+                  "ResponseContentDisposition": f"attachment; filename*=utf-8''{quote(filename)}"}
+        if mime_type:
+            params["ResponseContentType"] = mime_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+def create_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        if boto3 is None:
+            raise RuntimeError("boto3 is required for STORAGE_BACKEND=s3")
+        # One client per process: thread-safe, and its connection pool is shared by every request
+        client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION or None,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                          retries={"max_attempts": 5, "mode": "standard"}),
+        )
+        return S3Storage(client, settings.S3_BUCKET, settings.STORAGE_PREFIX,
+                         part_size=settings.S3_PART_SIZE_MB * 1024 * 1024,
+                         shard_levels=settings.STORAGE_SHARD_LEVELS)
+    return LocalStorage(settings.STORAGE_LOCAL_ROOT, settings.STORAGE_PREFIX, settings.STORAGE_SHARD_LEVELS)
+
+# Application-wide storage
+storage = create_storage()
@@ -0,0 +1,310 @@
+"""
+Compression tier for aged documents
+
+Documents older than TIERING_AGE_DAYS, or belonging to cases in one of
+TIERING_CASE_STATUSES, are rarely read again. `tier_documents` compresses
+their blobs (zstd when the `zstandard` package is installed, gzip otherwise)
+to the storage key `<file_path>.zst` / `.gz` and removes the raw blob;
+`Document.file_path` keeps naming the logical blob, so preview derivatives
+stay where they are.
+`iter_content` streams a document's bytes, decompressing tiered blobs on the
+fly (and encrypted blobs by decrypting them), and times those cold reads so
+the added latency can be reported. Formats that are already compressed (JPEG,
+PNG, GIF, DOCX) and encrypted documents are never candidates, and blobs that
+shrink by less than TIERING_MIN_SAVING are marked as visited and left raw.
+"""
+
+import gzip
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.case import Case
+from app.models.document import Document
+from app.services import encryption
+from app.services.storage import storage
+
+try:
+    import zstandard
+except ImportError:  # optional - gzip is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+INCOMPRESSIBLE_TYPES = {
+    "image/jpeg", "image/png", "image/gif",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+CHUNK_SIZE = 64 * 1024
+
+def resolve_codec(preferred: str) -> str:
+    if preferred == "zstd" and zstandard is None:
+        return "gzip"
+    return preferred
+
+def blob_path(document: Document) -> str:
+    """Storage key of the document's bytes (compressed or not)"""
+    if document.storage_codec:
+        return document.file_path + CODEC_SUFFIXES[document.storage_codec]
+    return document.file_path
+
+def blob_exists(document: Document) -> bool:
+    return storage.exists(blob_path(document))
+
+def _compress(src: str, dst: str, size: int, codec: str, level: int) -> int:
+    """Compress blob `src` into `dst`; returns the compressed size"""
+    with storage.open(src) as source, storage.open_write(dst) as target:
+        if codec == "zstd":
+            _, written = zstandard.ZstdCompressor(level=level).copy_stream(source, target, size=size)
+            return written
+        written = _Counter(target)
+        with gzip.GzipFile(fileobj=written, mode="wb", compresslevel=level, mtime=0) as compressed:
+            while chunk := source.read(CHUNK_SIZE):
+                compressed.write(chunk)
+        return written.size
+
+class _Counter:
+    """Counts what gzip writes through to the target"""
+
+    def __init__(self, f):
+        self._f = f
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._f.write(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+def _open_decompressed(key: str, codec: Optional[str]):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-tiered documents")
+        return zstandard.ZstdDecompressor().stream_reader(storage.open(key), closefd=True)
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=storage.open(key), mode="rb")
+    return storage.open(key)
+
+class ColdReadStats:
+    """Time-to-first-byte and throughput of reads served from the compressed tier"""
+
+    def __init__(self, window: int = 1000):
+        self.reads = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        # Recent reads only: (time to first byte, total seconds, bytes)
+        self._recent = deque(maxlen=window)
+
+    def record(self, first_byte: float, seconds: float, size: int):
+        with self._lock:
+            self.reads += 1
+            self.bytes += size
+            self._recent.append((first_byte, seconds, size))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            recent = list(self._recent)
+        if not recent:
+            return {"cold_reads": self.reads, "first_byte_ms_avg": None, "first_byte_ms_p95": None,
+                    "throughput_mb_s": None}
+        first_byte = sorted(sample[0] for sample in recent)
+        seconds = sum(sample[1] for sample in recent)
+        size = sum(sample[2] for sample in recent)
+        return {
+            "cold_reads": self.reads,
+            "first_byte_ms_avg": round(1000 * sum(first_byte) / len(first_byte), 2),
+            "first_byte_ms_p95": round(1000 * first_byte[int(0.95 * (len(first_byte) - 1))], 2),
+            "throughput_mb_s": round(size / seconds / 1024 / 1024, 1) if seconds else None,
+        }
+
+cold_reads = ColdReadStats()
+
+def attachment_headers(document_name: str, file_size: Optional[int]) -> dict:
+    """Content-Disposition as FileResponse would send it, for streamed downloads"""
+    filename = quote(document_name)
+    if filename != document_name:
+        disposition = f"attachment; filename*=utf-8''{filename}"
+    else:
+        disposition = f'attachment; filename="{document_name}"'
+    headers = {"Content-Disposition": disposition}
+    if file_size is not None:
+        headers["Content-Length"] = str(file_size)
+    return headers
+
+def iter_content(document: Document, chunk_size: int = CHUNK_SIZE,
+                 start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Stream a document's original bytes [start, end); tiered blobs are decompressed as they are read"""
+    if document.is_encrypted:
+        with storage.open(document.file_path) as f:
+            yield from encryption.iter_decrypted_file(f, start, end)
+        return
+    codec = document.storage_codec
+    if not codec:
+        yield from storage.get_stream(document.file_path, start, end, chunk_size)
+        return
+    began = time.perf_counter()
+    first_byte = None
+    size = 0
+    remaining = None if end is None else end - start
+    with _open_decompressed(blob_path(document), codec) as f:
+        if start:
+            f.seek(start)  # decompressing readers skip forward by reading
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if first_byte is None:
+                first_byte = time.perf_counter() - began
+            size += len(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    cold_reads.record(first_byte or 0.0, time.perf_counter() - began, size)
+
+def byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """[start, end) of a single-range `Range: bytes=...` header; None serves the whole file
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:
+            start, end = max(size - int(last), 0), size
+        else:
+            start, end = int(first), min(int(last) + 1, size) if last else size
+    except ValueError:
+        return None
+    if start >= size or start >= end:
+        raise ValueError(f"Range not satisfiable for {size} bytes")
+    return start, end
+
+def content_response(document: Document, range_header: Optional[str] = None,
+                     headers: Optional[dict] = None) -> Response:
+    """Stream a tiered or encrypted document, honouring a single byte range"""
+    response_headers = attachment_headers(document.document_name, None)
+    response_headers["Accept-Ranges"] = "bytes"
+    response_headers.update(headers or {})
+    size = document.file_size
+    if size is None:
+        return StreamingResponse(iter_content(document), media_type=document.mime_type, headers=response_headers)
+    try:
+        requested = byte_range(range_header, size)
+    except ValueError:
+        return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                        headers={"Content-Range": f"bytes */{size}"})
+    start, end = requested or (0, size)
+    response_headers["Content-Length"] = str(end - start)
+    if requested:
+        response_headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    return StreamingResponse(
+        iter_content(document, start=start, end=end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if requested else status.HTTP_200_OK,
+        media_type=document.mime_type,
+        headers=response_headers
+    )
+
+@dataclass
+class TieringResult:
+    compressed: int = 0
+    incompressible: int = 0
+    missing: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+def candidates(db: Session, older_than_days: int, case_statuses: Iterable[str], limit: Optional[int] = None):
+    """Raw, compressible documents that are old or belong to closed cases"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    closed_cases = select(Case.case_id).where(Case.case_status.in_(list(case_statuses)))
+    query = db.query(Document.document_id, Document.file_path).filter(
+        Document.tiered_at.is_(None),
+        # Ciphertext does not compress
+        or_(Document.is_encrypted.is_(None), Document.is_encrypted == False),
+        or_(Document.mime_type.is_(None), Document.mime_type.notin_(INCOMPRESSIBLE_TYPES)),
+        or_(Document.created_at < cutoff, Document.case_id.in_(closed_cases)),
+    ).order_by(Document.document_id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+def tier_documents(db: Session, older_than_days: int, case_statuses: Iterable[str],
+                   codec: str = "zstd", level: int = 10, min_saving: float = 0.1,
+                   limit: Optional[int] = None) -> TieringResult:
+    """Move eligible blobs to the compressed tier, committing after each document"""
+    codec = resolve_codec(codec)
+    result = TieringResult()
+    for document_id, src in candidates(db, older_than_days, case_statuses, limit):
+        stat = storage.stat(src)
+        if stat is None:
+            result.missing += 1
+            continue
+        size = stat.size
+        # Readers keep using the raw blob until the commit below points them at the compressed one
+        dst = src + CODEC_SUFFIXES[codec]
+        stored_size = _compress(src, dst, size, codec, level)
+        values = {"tiered_at": datetime.utcnow()}
+        worthwhile = stored_size <= size * (1 - min_saving)
+        if worthwhile:
+            values.update(storage_codec=codec, stored_size=stored_size)
+        # The guarded UPDATE holds the row until commit, so a concurrent run waits and then skips it
+        try:
+            updated = db.execute(update(Document).where(
+                Document.document_id == document_id, Document.file_path == src, Document.tiered_at.is_(None)
+            ).values(**values)).rowcount
+            db.commit()
+        except BaseException:
+            db.rollback()
+            storage.delete(dst)
+            raise
+        if not updated:
+            # A concurrent run tiered it first (its compressed blob may be the same key),
+            # or a new version or the sharding migration moved the document meanwhile
+            published = db.query(Document.file_path, Document.storage_codec) \
+                .filter(Document.document_id == document_id).first()
+            if published != (src, codec):
+                storage.delete(dst)
+            continue
+        if not worthwhile:
+            storage.delete(dst)
+            result.incompressible += 1
+            continue
+        storage.delete(src)
+        result.compressed += 1
+        result.bytes_before += size
+        result.bytes_after += stored_size
+    logger.info(f"Tiered {result.compressed} documents, reclaimed {result.bytes_reclaimed} bytes")
+    return result
+
+def tiering_stats(db: Session) -> dict:
+    documents, logical, stored = db.query(
+        func.count(Document.document_id),
+        func.coalesce(func.sum(Document.file_size), 0),
+        func.coalesce(func.sum(Document.stored_size), 0),
+    ).filter(Document.storage_codec.isnot(None)).one()
+    return {
+        "tiered_documents": documents,
+        "logical_bytes": int(logical),
+        "stored_bytes": int(stored),
+        "bytes_reclaimed": int(logical - stored),
+        "codec": resolve_codec(settings.TIERING_CODEC),
+        **cold_reads.metrics(),
+    }
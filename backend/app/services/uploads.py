@@ -0,0 +1,243 @@
+"""
+Resumable chunked uploads
+
+A client creates a session declaring the file's size (and optionally its
+SHA-256), PUTs chunks at explicit offsets, asks for the committed offset
+after a dropped connection, and finalizes once every byte is in. Chunks are
+streamed from the request body straight into a part file under
+UPLOAD_SESSION_DIR, so neither a chunk nor the file is ever held in memory;
+the committed offset is advanced with a guarded UPDATE, which also turns
+concurrent writers to the same offset into a conflict. Bytes received
+before a disconnect are committed too, so a retry resumes mid-chunk.
+Sessions idle past UPLOAD_SESSION_TTL_HOURS are removed with their part
+files by `sweep_expired`, which session creation runs at most once a minute.
+"""
+
+import hashlib
+import logging
+import os
+import secrets
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+from app.models.document import UploadSession
+from app.services import encryption
+from app.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+OPEN, FINALIZING, COMPLETED = "open", "finalizing", "completed"
+SWEEP_INTERVAL_SECONDS = 60
+
+class UploadError(Exception):
+    """Base class for upload protocol violations"""
+
+class OffsetMismatch(UploadError):
+    def __init__(self, expected: int):
+        super().__init__(f"Upload offset is {expected}")
+        self.expected = expected
+
+class ChunkTooLarge(UploadError):
+    pass
+
+class SessionClosed(UploadError):
+    pass
+
+class IncompleteUpload(UploadError):
+    pass
+
+class ChecksumMismatch(UploadError):
+    pass
+
+class PartMissing(UploadError):
+    """The part file is on another server - requests of a session must reach the same one"""
+
+def part_path(upload_id: str) -> str:
+    return os.path.join(settings.UPLOAD_SESSION_DIR, f"{upload_id}.part")
+
+def _expiry() -> datetime:
+    return datetime.utcnow() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+
+def open_session_count(db: Session, user_id: int) -> int:
+    return db.query(UploadSession).filter(
+        UploadSession.created_by == user_id, UploadSession.status == OPEN,
+        UploadSession.expires_at > datetime.utcnow()
+    ).count()
+
+def create_session(db: Session, created_by: int, **values) -> UploadSession:
+    sweep_expired(db)
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    session = UploadSession(upload_id=secrets.token_hex(16), created_by=created_by,
+                            received=0, status=OPEN, expires_at=_expiry(), **values)
+    open(part_path(session.upload_id), "wb").close()
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+def _check_open(session: UploadSession):
+    if session.status != OPEN or session.expires_at <= datetime.utcnow():
+        raise SessionClosed(f"Upload session is {session.status if session.status != OPEN else 'expired'}")
+
+def _commit_offset(db: Session, session: UploadSession, offset: int, position: int) -> int:
+    updated = db.execute(update(UploadSession).where(
+        UploadSession.upload_id == session.upload_id,
+        UploadSession.received == offset,
+        UploadSession.status == OPEN,
+    ).values(received=position, expires_at=_expiry())).rowcount
+    db.commit()
+    db.refresh(session)
+    if not updated:
+        raise OffsetMismatch(session.received)
+    return position
+
+def _write_at(f, position: int, block: bytes):
+    f.seek(position)
+    f.write(block)
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+async def write_chunk(db: Session, session: UploadSession, offset: int, body: AsyncIterator[bytes]) -> int:
+    """Stream a request body into the part file at `offset`; returns the new committed offset"""
+    _check_open(session)
+    if offset != session.received:
+        raise OffsetMismatch(session.received)
+    limit = min(settings.UPLOAD_CHUNK_MAX_MB * 1024 * 1024, session.total_size - offset)
+    if limit == 0:
+        raise ChunkTooLarge(f"All {session.total_size} bytes were already received")
+
+    position = offset
+    with _open_part(session.upload_id, "r+b") as f:
+        try:
+            async for block in body:
+                if position - offset + len(block) > limit:
+                    raise ChunkTooLarge(f"Chunk exceeds {limit} bytes allowed at offset {offset}")
+                await run_in_threadpool(_write_at, f, position, block)
+                position += len(block)
+        except ClientDisconnect:
+            # Keep what arrived - the client resumes from the committed offset
+            await run_in_threadpool(_sync, f)
+            _commit_offset(db, session, offset, position)
+            raise
+        await run_in_threadpool(_sync, f)
+    return _commit_offset(db, session, offset, position)
+
+def _open_part(upload_id: str, mode: str):
+    try:
+        return open(part_path(upload_id), mode)
+    except FileNotFoundError:
+        raise PartMissing(f"Upload {upload_id} is not stored on this server; UPLOAD_SESSION_DIR must be "
+                          f"shared, or the session's requests routed to the server that created it")
+
+def _sha256(upload_id: str) -> str:
+    digest = hashlib.sha256()
+    with _open_part(upload_id, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+async def claim_file(db: Session, session: UploadSession, destination: str, encrypt: bool = False):
+    """Move a complete part file to the storage key `destination` (or write it there encrypted)
+
+    The session is claimed (open -> finalizing) first so two finalize calls
+    cannot both take the file. The caller creates the Document and then
+    calls `complete`; a copy (encrypted, or uploaded to object storage)
+    leaves the part file for `remove_part` to delete once the document is
+    committed.
+    """
+    _check_open(session)
+    if session.received != session.total_size:
+        raise IncompleteUpload(f"Received {session.received} of {session.total_size} bytes")
+    path = part_path(session.upload_id)
+    if not os.path.exists(path):
+        _open_part(session.upload_id, "rb")  # raises PartMissing
+    if session.sha256:
+        actual = await run_in_threadpool(_sha256, session.upload_id)
+        if actual != session.sha256.lower():
+            raise ChecksumMismatch(f"SHA-256 mismatch: received content hashes to {actual}")
+    claimed = db.execute(update(UploadSession).where(
+        UploadSession.upload_id == session.upload_id, UploadSession.status == OPEN
+    ).values(status=FINALIZING)).rowcount
+    db.commit()
+    db.refresh(session)
+    if not claimed:
+        raise SessionClosed(f"Upload session is {session.status}")
+    try:
+        if encrypt:
+            await run_in_threadpool(_encrypt_part, path, destination)
+        else:
+            # A rename on local storage (when both directories are on one volume), an upload otherwise
+            await run_in_threadpool(storage.put_file, path, destination, storage.local)
+    except Exception:
+        release(db, session, destination)
+        raise
+
+def _encrypt_part(path: str, destination: str):
+    with storage.open_write(destination) as f:
+        encryption.encrypt_to(encryption.iter_file(path), f)
+
+def release(db: Session, session: UploadSession, destination: str):
+    """Undo `claim_file` after a failed finalize so the client can retry it"""
+    db.rollback()
+    if os.path.exists(part_path(session.upload_id)):
+        # Copied (encrypted, or to object storage) - the part file is still in place
+        storage.delete(destination)
+        session.status = OPEN
+        db.commit()
+    elif storage.local and storage.exists(destination):
+        shutil.move(storage.local_path(destination), part_path(session.upload_id))
+        session.status = OPEN
+        db.commit()
+    else:
+        # The file was already transformed in place; nothing left to resume from
+        abort(db, session)
+
+def complete(session: UploadSession, document_id: int):
+    """Record the created document (in the caller's transaction)"""
+    session.status = COMPLETED
+    session.document_id = document_id
+
+def abort(db: Session, session: UploadSession):
+    db.delete(session)
+    db.commit()
+    remove_part(session.upload_id)
+
+def remove_part(upload_id: str):
+    try:
+        os.remove(part_path(upload_id))
+    except OSError:
+        pass
+
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+def sweep_expired(db: Session, force: bool = False) -> int:
+    """Delete expired unfinished sessions and their part files; returns how many were removed"""
+    global _last_sweep
+    with _sweep_lock:
+        if not force and time.monotonic() - _last_sweep < SWEEP_INTERVAL_SECONDS:
+            return 0
+        _last_sweep = time.monotonic()
+    expired = db.query(UploadSession.upload_id).filter(
+        UploadSession.status.in_([OPEN, FINALIZING]), UploadSession.expires_at <= datetime.utcnow()
+    ).limit(500).all()
+    if not expired:
+        return 0
+    ids = [upload_id for (upload_id,) in expired]
+    db.query(UploadSession).filter(UploadSession.upload_id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    for upload_id in ids:
+        remove_part(upload_id)
+    logger.info(f"Removed {len(ids)} abandoned upload sessions")
+    return len(ids)
@@ -0,0 +1,245 @@
+"""
+Document version history
+
+A document's current content stays at `Document.file_path`, where downloads,
+previews and tiering expect it. Uploading a new version archives the old
+content into the content-addressed chunk store (see `chunking`) and points
+the document at the new file, so only superseded versions pay the chunking
+cost and revisions of the same form share every chunk they did not change.
+Chunking is CPU-bound pure Python, so it runs in a spawn-based process pool;
+the worker streams the old blob from a local file (decrypting it itself), so
+no version is ever held in memory whole.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.document import ContentChunk, Document, DocumentVersion, DocumentVersionChunk
+from app.services import encryption, tiering
+from app.services.chunking import iter_chunks, store_file
+from app.services.previews import initial_status, remove_derivatives
+from app.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+# Stay well under SQL Server's 2100 parameters per statement
+_IN_BATCH = 500
+
+class VersionConflict(Exception):
+    """Another version of the document was stored concurrently"""
+
+class VersionStore:
+    """Archive superseded document content into the chunk store"""
+
+    def __init__(self, prefix: str, workers: int):
+        self.prefix = prefix
+        self.workers = workers or os.cpu_count() or 1
+        self.archived = 0
+        self.bytes_archived = 0
+        self.bytes_new = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs server threads is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def chunk_file(self, path: str, encrypted: bool = False) -> Tuple[str, List[Tuple[str, int]]]:
+        """Write the chunks of a local blob off the event loop; returns its hash and chunk list
+
+        An encrypted blob is decrypted by the worker and its chunks are sealed again.
+        """
+        executor = self._pool()
+        key, keys = (encryption.master_key(), encryption.keyring()) if encrypted else (None, None)
+        try:
+            return await asyncio.wrap_future(executor.submit(store_file, path, encrypted, self.prefix, key, keys))
+        except BrokenProcessPool:
+            self._discard_pool(executor)
+            raise
+
+    def iter_version(self, db: Session, version: DocumentVersion) -> Iterator[bytes]:
+        hashes = [chunk_hash for (chunk_hash,) in db.query(DocumentVersionChunk.chunk_hash)
+                  .filter(DocumentVersionChunk.version_id == version.version_id)
+                  .order_by(DocumentVersionChunk.sequence)]
+        return iter_chunks(self.prefix, hashes, encryption.keyring() if version.is_encrypted else None)
+
+    def _discard_pool(self, executor: ProcessPoolExecutor):
+        """A worker died; the next archive starts a fresh pool"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "versions_archived": self.archived,
+            "bytes_archived": self.bytes_archived,
+            "bytes_stored": self.bytes_new,
+        }
+
+# Application-wide store
+version_store = VersionStore(settings.VERSION_STORE_DIR, settings.VERSION_WORKERS)
+
+def register_chunks(db: Session, chunks: List[Tuple[str, int]], attempts: int = 3) -> int:
+    """Record chunks not yet in content_chunks (committed on its own); returns the new bytes"""
+    sizes = dict(chunks)
+    for attempt in range(attempts):
+        hashes = list(sizes)
+        known = set()
+        for start in range(0, len(hashes), _IN_BATCH):
+            known.update(chunk_hash for (chunk_hash,) in db.query(ContentChunk.chunk_hash)
+                         .filter(ContentChunk.chunk_hash.in_(hashes[start:start + _IN_BATCH])))
+        missing = [{"chunk_hash": chunk_hash, "size": size, "created_at": datetime.utcnow()}
+                   for chunk_hash, size in sizes.items() if chunk_hash not in known]
+        if not missing:
+            return 0
+        try:
+            db.execute(insert(ContentChunk), missing)
+            db.commit()
+            return sum(row["size"] for row in missing)
+        except IntegrityError:
+            # Another upload registered one of the same chunks first - look again
+            db.rollback()
+            if attempt == attempts - 1:
+                raise
+    return 0
+
+def _local_blob(document: Document) -> Tuple[str, bool]:
+    """A local file with the document's content for the chunker, and whether it is a temporary copy
+
+    Blobs on local disk are read in place. Tiered blobs are decompressed, and blobs
+    on remote storage downloaded, into a temporary file - encrypted ones still sealed.
+    """
+    if storage.local and not document.storage_codec:
+        return os.path.abspath(storage.local_path(document.file_path)), False
+    blocks = tiering.iter_content(document) if document.storage_codec else storage.get_stream(document.file_path)
+    fd, path = tempfile.mkstemp(suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for block in blocks:
+                f.write(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, True
+
+def create_initial_version(db: Session, document: Document, comment: Optional[str] = None):
+    """History row for a freshly uploaded document (call before commit)"""
+    db.add(DocumentVersion(
+        document_id=document.document_id,
+        version=document.version or 1,
+        document_name=document.document_name,
+        mime_type=document.mime_type,
+        file_size=document.file_size,
+        comment=comment,
+        uploaded_by=document.uploaded_by,
+    ))
+
+async def add_version(db: Session, document: Document, upload: dict, uploaded_by: int,
+                      comment: Optional[str] = None) -> DocumentVersion:
+    """Archive the current content and make the stored `upload` the new current version
+
+    `upload` holds the Document column values of the new file (document_name,
+    file_path, file_size, mime_type, original_size, original_path).
+    """
+    current_version = document.version or 1
+    old_blob = tiering.blob_path(document)
+    old_file_path = document.file_path
+
+    path, temporary = await run_in_threadpool(_local_blob, document)
+    try:
+        # Confidential history stays encrypted in the chunk store
+        content_hash, chunks = await version_store.chunk_file(path, encrypted=bool(document.is_encrypted))
+    finally:
+        if temporary:
+            os.remove(path)
+    size = sum(chunk_size for _, chunk_size in chunks)
+    new_bytes = register_chunks(db, chunks)
+
+    # Guarded on the version (and blob) we archived: a concurrent upload or move makes this a no-op
+    updated = db.execute(update(Document).where(
+        Document.document_id == document.document_id, Document.version == current_version,
+        Document.file_path == old_file_path
+    ).values(
+        version=current_version + 1,
+        file_path=upload["file_path"],
+        file_size=upload["file_size"],
+        mime_type=upload["mime_type"],
+        original_size=upload.get("original_size"),
+        original_path=upload.get("original_path"),
+        preview_status=initial_status(upload["mime_type"], upload.get("is_encrypted")),
+        is_encrypted=upload.get("is_encrypted", False),
+        storage_codec=None,
+        stored_size=None,
+        tiered_at=None,
+    )).rowcount
+    if not updated:
+        db.rollback()
+        raise VersionConflict(f"Document {document.document_id} changed while the new version was stored")
+
+    archived = db.query(DocumentVersion).filter(
+        DocumentVersion.document_id == document.document_id, DocumentVersion.version == current_version
+    ).first()
+    if archived is None:
+        # Uploaded before history was kept and not backfilled
+        archived = DocumentVersion(document_id=document.document_id, version=current_version,
+                                   document_name=document.document_name, uploaded_by=document.uploaded_by)
+        db.add(archived)
+    archived.mime_type = archived.mime_type or document.mime_type
+    archived.file_size = size
+    archived.content_hash = content_hash
+    archived.is_encrypted = bool(document.is_encrypted)
+    archived.archived_at = datetime.utcnow()
+    db.flush()
+    db.execute(insert(DocumentVersionChunk), [
+        {"version_id": archived.version_id, "sequence": sequence, "chunk_hash": chunk_hash}
+        for sequence, (chunk_hash, _) in enumerate(chunks)
+    ])
+
+    version = DocumentVersion(
+        document_id=document.document_id,
+        version=current_version + 1,
+        document_name=upload["document_name"],
+        mime_type=upload["mime_type"],
+        file_size=upload["file_size"],
+        comment=comment,
+        uploaded_by=uploaded_by,
+    )
+    db.add(version)
+    db.commit()
+    db.refresh(document)
+
+    version_store.archived += 1
+    version_store.bytes_archived += size
+    version_store.bytes_new += new_bytes
+
+    # The old content now lives in the chunk store
+    storage.delete(old_blob)
+    remove_derivatives(old_file_path)
+    return version
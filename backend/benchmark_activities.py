@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Activity time-entry benchmark - looped single creates vs. bulk create
+Runs the database work of POST /api/activities/ once per entry and compares
+it with POST /api/activities/bulk on a temporary SQLite database (or
+--database-url).
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade
+from app.models import User, Lawyer, Client, Case, Activity
+from app.routers.activities import bulk_create_activities
+from app.schemas.activity import ActivityCreate
+
+def seed(Session, case_count):
+    db = Session()
+    user = User(email="bench.lawyer@lawfirm.com", password_hash="x", first_name="Bench",
+                last_name="Lawyer", user_type="lawyer")
+    db.add(user)
+    db.flush()
+    db.add(Lawyer(user_id=user.user_id, bar_number="BENCH-1", hourly_rate=Decimal("250.00")))
+    client = Client(client_number="BENCH-C1")
+    db.add(client)
+    db.flush()
+    db.add_all([
+        Case(client_id=client.client_id, primary_lawyer_id=user.user_id, case_number=f"BENCH-{i}",
+             case_type="H1B", case_status="active", priority_level="medium")
+        for i in range(case_count)
+    ])
+    db.commit()
+    case_ids = [case_id for (case_id,) in db.query(Case.case_id).all()]
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+    return user, case_ids
+
+def make_entries(lawyer_user, case_ids, count):
+    start = datetime(2024, 1, 1, 9, 0)
+    return [
+        ActivityCreate(
+            case_id=case_ids[i % len(case_ids)],
+            lawyer_id=lawyer_user.user_id,
+            activity_type="research",
+            title=f"Time entry {i}",
+            description="Imported time entry",
+            activity_date=start + timedelta(minutes=15 * i),
+            hours_spent=Decimal("0.25"),
+        )
+        for i in range(count)
+    ]
+
+def single_creates(Session, current_user, entries):
+    """Same queries and commits as create_activity, once per entry"""
+    db = Session()
+    for entry in entries:
+        case = db.query(Case).filter(Case.case_id == entry.case_id).first()
+        if current_user.role == "lawyer" and case.primary_lawyer_id != current_user.id:
+            raise RuntimeError("Access denied")
+        activity_dict = entry.model_dump()
+        activity_dict['lawyer_id'] = current_user.id
+        activity = Activity(**activity_dict)
+        db.add(activity)
+        db.commit()
+        db.refresh(activity)
+    db.close()
+
+def bulk_create(Session, current_user, entries):
+    db = Session()
+    response = bulk_create_activities(db, current_user, entries)
+    assert response.created == len(entries), response.failed
+    db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single and bulk activity creation")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--cases", type=int, default=50)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    temp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'activities_benchmark.db')}"
+
+    engine = create_engine(database_url)
+    upgrade(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    current_user, case_ids = seed(Session, args.cases)
+    entries = make_entries(current_user, case_ids, args.entries)
+
+    print("🚀 Activity creation benchmark")
+    print(f"📍 Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"📝 Entries: {args.entries} across {args.cases} cases")
+    print("-" * 50)
+
+    timings = {}
+    for label, func in (("looped single creates", single_creates), ("bulk create", bulk_create)):
+        start = time.perf_counter()
+        func(Session, current_user, entries)
+        elapsed = time.perf_counter() - start
+        timings[label] = elapsed
+        print(f"  {label:<24} {elapsed:8.3f} s   {args.entries / elapsed:10.0f} entries/s")
+
+    print("-" * 50)
+    print(f"⚡ Speedup: {timings['looped single creates'] / timings['bulk create']:.1f}x")
+
+    engine.dispose()
+    if temp_dir:
+        temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
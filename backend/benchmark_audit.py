@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Document access audit benchmark
+Compares the per-request cost of a synchronous audit insert with the
+buffered audit log, then checks that a database outage (events spill to
+disk) followed by a graceful shutdown loses nothing.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade
+from app.models.audit import DocumentAccessLog
+from app.services.audit import AuditLog
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def synchronous(Session, events):
+    """One insert and commit per download - what an inline audit row costs"""
+    latencies = []
+    db = Session()
+    for i in range(events):
+        start = time.perf_counter()
+        db.add(DocumentAccessLog(document_id=i % 500 + 1, user_id=i % 40 + 1, action="download",
+                                 occurred_at=datetime.utcnow(), ip_address="10.0.0.1"))
+        db.commit()
+        latencies.append(time.perf_counter() - start)
+    db.close()
+    return latencies
+
+def buffered(audit, events, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def downloads(count, offset):
+        local = []
+        for i in range(offset, offset + count):
+            start = time.perf_counter()
+            audit.record(i % 500 + 1, i % 40 + 1, "download", ip_address="10.0.0.1")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    per_thread = events // threads
+    workers = [threading.Thread(target=downloads, args=(per_thread, n * per_thread)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies
+
+def row_count(Session):
+    db = Session()
+    count = db.query(func.count(DocumentAccessLog.log_id)).scalar()
+    db.close()
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark buffered document access auditing")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--sync-events", type=int, default=2000, help="events for the synchronous baseline")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent request threads recording events")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.getLogger("app.services.audit").setLevel(logging.ERROR)  # the outage below is deliberate
+    temp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(temp_dir.name, 'audit_benchmark.db')}")
+    upgrade(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    print("🚀 Document access audit benchmark")
+    print("-" * 58)
+    print(f"  {'mode':<22} {'events':>8} {'mean us':>9} {'p99 us':>9}")
+
+    latencies = synchronous(Session, args.sync_events)
+    print(f"  {'synchronous insert':<22} {args.sync_events:>8} "
+          f"{sum(latencies) / len(latencies) * 1e6:>9.1f} {percentile(latencies, 0.99) * 1e6:>9.1f}")
+    baseline = row_count(Session)
+
+    audit = AuditLog(Session, batch_size=args.batch_size, flush_interval=0.5,
+                     spill_dir=os.path.join(temp_dir.name, "spill"))
+    audit.start()
+    start = time.perf_counter()
+    latencies = buffered(audit, args.events, args.threads)
+    recorded = len(latencies)
+    print(f"  {'buffered record()':<22} {recorded:>8} "
+          f"{sum(latencies) / len(latencies) * 1e6:>9.1f} {percentile(latencies, 0.99) * 1e6:>9.1f}")
+    audit.flush()
+    elapsed = time.perf_counter() - start
+    print("-" * 58)
+    print(f"💾 Flushed {audit.written} events in {audit.batches} batches "
+          f"({audit.written / elapsed:,.0f} events/s end to end)")
+
+    # Database outage: batches spill to segment files, then replay once it is back
+    healthy = audit.session_factory
+    def unavailable():
+        raise ConnectionError("database unavailable")
+    audit.session_factory = unavailable
+    buffered(audit, 1000, 1)
+    audit.flush()
+    print(f"⚠️  Outage: {audit.spilled} events spilled to disk")
+    audit.session_factory = healthy
+    buffered(audit, 1000, 1)
+    audit.stop()
+
+    expected = baseline + recorded + 2000
+    stored = row_count(Session)
+    print(f"🛑 After shutdown: {stored - baseline} of {recorded + 2000} recorded events stored "
+          f"({'no loss' if stored == expected else 'LOST EVENTS'})")
+    engine.dispose()
+    temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
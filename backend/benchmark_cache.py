@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Cache backend check and benchmark
+Exercises every cache backend (TTL, tags, LRU bound, hit/miss metrics) and
+measures get/set latency. The redis backend runs against REDIS_URL when given,
+otherwise against a local in-process fake speaking the Redis protocol.
+"""
+
+import argparse
+import fnmatch
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.core.cache import MemoryCache, RedisCache, SQLiteCache
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Implements the handful of commands RedisCache uses"""
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            try:
+                self.wfile.write(self.server.execute(command))
+            except Exception as e:
+                self.wfile.write(b"-ERR %s\r\n" % str(e).encode())
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def execute(self, args):
+        name = args[0].upper()
+        with self.lock:
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"GET":
+                if not self._alive(args[1]):
+                    return b"$-1\r\n"
+                return _bulk(self.data[args[1]])
+            if name == b"SET":
+                self.data[args[1]] = args[2]
+                self.expires.pop(args[1], None)
+                if len(args) > 4 and args[3].upper() == b"PX":
+                    self.expires[args[1]] = time.time() + int(args[4]) / 1000
+                return b"+OK\r\n"
+            if name == b"DEL":
+                removed = sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+                return b":%d\r\n" % removed
+            if name == b"SADD":
+                members = self.data.setdefault(args[1], set())
+                before = len(members)
+                members.update(args[2:])
+                return b":%d\r\n" % (len(members) - before)
+            if name == b"SMEMBERS":
+                members = self.data.get(args[1], set())
+                return b"*%d\r\n" % len(members) + b"".join(_bulk(m) for m in members)
+            if name == b"SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+                keys = [k for k in list(self.data) if self._alive(k) and fnmatch.fnmatch(k.decode(), pattern)]
+                return b"*2\r\n" + _bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(_bulk(k) for k in keys)
+        return b"-ERR unknown command\r\n"
+
+
+def _bulk(value: bytes) -> bytes:
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def check_backend(cache):
+    """Functional checks shared by all backends"""
+    cache.clear()
+    cache.set("user:1", {"name": "Maria"}, tags=["user:1", "users"])
+    cache.set("user:2", {"name": "John"}, tags=["users"])
+    assert cache.get("user:1") == {"name": "Maria"}
+    assert cache.delete_tag("users") == 2
+    assert cache.get("user:1") is None and cache.get("user:2") is None
+
+    cache.set("short", 1, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+
+    cache.set("gone", 1)
+    cache.delete("gone")
+    assert cache.get("gone") is None
+    cache.clear()
+
+
+def benchmark_backend(cache, operations):
+    cache.clear()
+    start = time.perf_counter()
+    for i in range(operations):
+        cache.set(f"key:{i % 1000}", {"id": i, "payload": "x" * 100}, tags=[f"tag:{i % 10}"])
+    set_us = (time.perf_counter() - start) / operations * 1e6
+
+    start = time.perf_counter()
+    for i in range(operations):
+        cache.get(f"key:{i % 2000}")
+    get_us = (time.perf_counter() - start) / operations * 1e6
+
+    info = cache.info()
+    print(f"  {info['backend']:<8} set {set_us:8.1f} us   get {get_us:8.1f} us   "
+          f"hits {info['hits']:6d}   misses {info['misses']:6d}   "
+          f"hit ratio {info['hit_ratio']:.2f}   evictions {info['evictions']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark cache backends")
+    parser.add_argument("--operations", type=int, default=5000)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    fake_server = None
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        fake_server = FakeRedisServer()
+        threading.Thread(target=fake_server.serve_forever, daemon=True).start()
+        redis_url = fake_server.url
+
+    backends = [
+        MemoryCache(max_entries=500),
+        SQLiteCache(os.path.join(temp_dir.name, "cache.db"), max_entries=500),
+        RedisCache(redis_url, prefix="benchmark:"),
+    ]
+
+    print("🧪 Cache backend checks")
+    for cache in backends:
+        check_backend(cache)
+        print(f"  ✅ {cache.backend}")
+
+    print(f"\n🚀 Cache benchmark ({args.operations} operations per phase)")
+    for cache in backends:
+        benchmark_backend(cache, args.operations)
+
+    if fake_server:
+        fake_server.shutdown()
+    temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
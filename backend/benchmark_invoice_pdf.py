@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Invoice PDF rendering benchmark
+Renders a month-end batch of invoices inline on the event loop and through
+the render process pool, reporting throughput and the longest event-loop
+stall seen by a 10 ms ticker, then re-requests the batch to show cache hits.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.services.invoices import InvoiceRenderer
+from app.services.pdf import render_invoice_pdf
+
+def make_payload(billing_id, line_count):
+    return {
+        "firm_name": "Immigration Law Office",
+        "billing_id": billing_id,
+        "invoice_number": f"INV-2024-{billing_id:05d}",
+        "invoice_date": "2024-01-31",
+        "due_date": "2024-03-01",
+        "client_name": f"Client {billing_id}",
+        "client_number": f"C{billing_id:05d}",
+        "case_number": f"CASE-{billing_id:05d}",
+        "case_type": "H1B",
+        "description": "",
+        "hours_worked": f"{line_count * 0.5:,.2f}",
+        "hourly_rate": "250.00",
+        "subtotal": f"{line_count * 125:,.2f}",
+        "tax_amount": "0.00",
+        "total_amount": f"{line_count * 125:,.2f}",
+        "amount_paid": "0.00",
+        "balance_due": f"{line_count * 125:,.2f}",
+        "line_items": [
+            {"date": f"2024-01-{i % 28 + 1:02d}", "description": f"Prepared filing section {i}",
+             "hours": "0.50", "rate": "250.00", "amount": "125.00"}
+            for i in range(line_count)
+        ],
+    }
+
+async def ticker(stop, stalls):
+    """Record how late each 10 ms tick fires - the event loop's responsiveness"""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        stalls.append(now - last - 0.01)
+        last = now
+
+async def timed(work):
+    stop, stalls = asyncio.Event(), []
+    tick = asyncio.create_task(ticker(stop, stalls))
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, max(stalls) * 1000
+
+async def run(args):
+    payloads = [make_payload(i, args.lines) for i in range(1, args.invoices + 1)]
+
+    async def inline():
+        for payload in payloads:
+            render_invoice_pdf(payload)
+
+    with tempfile.TemporaryDirectory() as directory:
+        renderer = InvoiceRenderer(directory, args.workers)
+        # Start the pool outside the measurement
+        await renderer.render(make_payload(0, 1))
+
+        async def pooled():
+            # One submission per loop iteration, like separate send/download requests
+            pending = []
+            for payload in payloads:
+                pending.append(asyncio.wrap_future(renderer.submit(payload)))
+                await asyncio.sleep(0)
+            await asyncio.gather(*pending)
+
+        print("🚀 Invoice PDF rendering benchmark")
+        print(f"🧾 Invoices: {args.invoices} x {args.lines} lines, pool workers: {renderer.workers}")
+        print("-" * 58)
+        print(f"  {'mode':<22} {'seconds':>8} {'invoices/s':>11} {'max stall ms':>13}")
+        for label, work in (("inline on event loop", inline), ("process pool", pooled),
+                            ("cached artifacts", pooled)):
+            elapsed, stall = await timed(work)
+            print(f"  {label:<22} {elapsed:>8.2f} {args.invoices / elapsed:>11.0f} {stall:>13.1f}")
+
+        metrics = renderer.metrics()
+        files = len(os.listdir(directory))
+        renderer.shutdown()
+    print("-" * 58)
+    print(f"📦 Renders: {metrics['renders']}, cache hits: {metrics['cache_hits']}, artifacts: {files}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark invoice PDF rendering")
+    parser.add_argument("--invoices", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=60, help="line items per invoice")
+    parser.add_argument("--workers", type=int, default=0, help="pool size (0 = one per CPU core)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
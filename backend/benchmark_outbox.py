@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Email outbox benchmark with a local SMTP stand-in
+Queues a burst of invoice emails, drains them with the outbox worker against
+an in-process SMTP server that injects transient (451) and permanent (550)
+failures, and reports throughput, queue lag, retries and dead letters.
+`--serve` runs only the SMTP stand-in, for pointing a dev server's SMTP_HOST at.
+"""
+
+import argparse
+import logging
+import os
+import random
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade
+from app.models.notification import OutboxEmail
+from app.services.outbox import OutboxWorker, outbox_stats
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough ESMTP for smtplib: EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line: str):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with server.lock:
+            server.connections += 1
+        self.reply("220 localhost ESMTP outbox stand-in")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-localhost\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                if "bounce" in command.lower():
+                    self.reply("550 5.1.1 Mailbox does not exist")
+                else:
+                    recipients.append(command)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                if random.random() < server.transient_rate:
+                    self.reply("451 4.3.0 Try again later")
+                else:
+                    with server.lock:
+                        server.accepted += 1
+                    self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, transient_rate=0.0):
+        super().__init__((host, port), SMTPHandler)
+        self.transient_rate = transient_rate
+        self.connections = 0
+        self.accepted = 0
+        self.lock = threading.Lock()
+
+def serve(args):
+    server = FakeSMTPServer(port=args.port or 2525, transient_rate=args.transient_rate)
+    print(f"📮 SMTP stand-in listening on 127.0.0.1:{server.server_address[1]} "
+          f"(set SMTP_HOST=127.0.0.1 SMTP_PORT={server.server_address[1]})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📬 Accepted {server.accepted} message(s) over {server.connections} connection(s)")
+
+def run(args):
+    logging.getLogger("app.services.outbox").setLevel(logging.ERROR)  # dead letters are reported below
+    server = FakeSMTPServer(transient_rate=args.transient_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(temp_dir.name, 'outbox_benchmark.db')}")
+    upgrade(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    worker = OutboxWorker(
+        Session, "127.0.0.1", server.server_address[1], sender="billing@lawfirm.com",
+        batch_size=args.batch_size, poll_interval=0.01, max_attempts=args.max_attempts,
+        backoff_seconds=args.backoff,
+    )
+
+    print("🚀 Email outbox benchmark")
+    print(f"📨 Emails: {args.emails} ({args.bounces} to bouncing mailboxes), "
+          f"transient failure rate {args.transient_rate:.0%}, batch {args.batch_size}")
+    print("-" * 58)
+
+    worker.start()
+    start = time.perf_counter()
+    db = Session()
+    # Arrive in bursts like request commits, while the worker is already draining
+    for offset in range(0, args.emails, 500):
+        db.execute(insert(OutboxEmail), [
+            {
+                "to_address": f"bounce{i}@example.com" if i < args.bounces else f"client{i}@example.com",
+                "subject": f"Invoice INV-2024-{i:05d}",
+                "body_text": "Please find attached your invoice.\n" * 20,
+                "category": "invoice",
+                "related_id": i,
+            }
+            for i in range(offset, min(offset + 500, args.emails))
+        ])
+        db.commit()
+        worker.wake()
+
+    while True:
+        stats = outbox_stats(db)
+        if stats["pending"] == 0 and stats["sending"] == 0:
+            break
+        if time.perf_counter() - start > args.timeout:
+            print("⚠️  Timed out with messages still queued")
+            break
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    worker.stop()
+    db.close()
+
+    metrics = worker.metrics()
+    lag = metrics["queue_lag_ms"]
+    print(f"  delivered:          {stats['sent']} in {elapsed:.2f}s ({stats['sent'] / elapsed:.0f}/s end to end)")
+    print(f"  worker throughput:  {metrics['sent_per_second']}/s over {metrics['batches']} batches")
+    print(f"  queue lag ms:       p50 {lag.get('p50', 0)}, p99 {lag.get('p99', 0)}, max {lag.get('max', 0)}")
+    print(f"  retries:            {metrics['retries']}")
+    print(f"  dead letters:       {stats['dead']}")
+    print(f"  SMTP connections:   {server.connections} (server accepted {server.accepted})")
+    print("-" * 58)
+
+    server.shutdown()
+    engine.dispose()
+    temp_dir.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the email outbox against a local SMTP stand-in")
+    parser.add_argument("--serve", action="store_true", help="only run the SMTP stand-in")
+    parser.add_argument("--port", type=int, default=0, help="stand-in port for --serve (default 2525)")
+    parser.add_argument("--emails", type=int, default=5000)
+    parser.add_argument("--bounces", type=int, default=25, help="emails addressed to a rejecting mailbox")
+    parser.add_argument("--transient-rate", type=float, default=0.02, help="share of messages answered with 451")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=0.05, help="base retry delay in seconds")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        run(args)
+
+if __name__ == "__main__":
+    main()
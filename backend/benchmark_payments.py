@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Payment concurrency check
+Fires thousands of parallel payments (plus gateway-style retries that reuse
+an idempotency key) at a single invoice and verifies that the balance equals
+the sum of the distinct payments. The old read-modify-write path is run the
+same way for comparison to show how many updates it loses.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade
+from app.models import User, Lawyer, Client, Case, Billing, Payment
+from app.schemas.billing import PaymentCreate
+from app.services.payments import apply_payment
+
+PAYMENT_AMOUNT = Decimal("1.00")
+
+def seed_invoice(Session, total):
+    db = Session()
+    user = User(email=f"bench.{time.time_ns()}@lawfirm.com", password_hash="x", first_name="Bench",
+                last_name="Lawyer", user_type="lawyer")
+    db.add(user)
+    db.flush()
+    lawyer = Lawyer(user_id=user.user_id, bar_number=f"BENCH-{user.user_id}", hourly_rate=Decimal("250.00"))
+    client = Client(client_number=f"BENCH-C{user.user_id}")
+    db.add_all([lawyer, client])
+    db.flush()
+    case = Case(client_id=client.client_id, primary_lawyer_id=user.user_id, case_number=f"BENCH-{user.user_id}",
+                case_type="H1B", case_status="active", priority_level="medium")
+    db.add(case)
+    db.flush()
+    billing = Billing(case_id=case.case_id, lawyer_id=lawyer.lawyer_id, client_id=client.client_id,
+                      invoice_number=f"BENCH-INV-{user.user_id}", invoice_date=date.today(),
+                      due_date=date.today(), hourly_rate=Decimal("250.00"), subtotal=total,
+                      total_amount=total, amount_paid=Decimal("0.00"), status="sent")
+    db.add(billing)
+    db.commit()
+    billing_id = billing.billing_id
+    db.close()
+    return billing_id
+
+def with_retries(call, *args):
+    """Retry only on lock timeouts, so both paths are measured on the same terms"""
+    for attempt in range(50):
+        try:
+            return call(*args)
+        except OperationalError:
+            time.sleep(0.01 * (attempt + 1))
+    raise RuntimeError("database stayed locked")
+
+def atomic_payment(Session, billing_id, key):
+    db = Session()
+    try:
+        payment_data = PaymentCreate(billing_id=billing_id, payment_amount=PAYMENT_AMOUNT,
+                                     payment_date=date.today(), payment_method="bank_transfer",
+                                     reference_number=key)
+        return with_retries(apply_payment, db, payment_data, None, key).replayed
+    finally:
+        db.close()
+
+def legacy_payment(Session, billing_id, key):
+    """The previous record_payment body: read the balance, add in Python, commit"""
+    def attempt():
+        db = Session()
+        try:
+            billing = db.query(Billing).filter(Billing.billing_id == billing_id).first()
+            db.add(Payment(billing_id=billing_id, payment_amount=PAYMENT_AMOUNT, payment_date=date.today(),
+                           payment_method="bank_transfer", reference_number=key))
+            billing.amount_paid += PAYMENT_AMOUNT
+            if billing.amount_paid >= billing.total_amount:
+                billing.status = "paid"
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    with_retries(attempt)
+    return False
+
+def run(label, pay, Session, payments, retries, threads):
+    billing_id = seed_invoice(Session, PAYMENT_AMOUNT * payments)
+    keys = [f"gw-{billing_id}-{i}" for i in range(payments)]
+    # Gateway retries: some keys are delivered more than once, interleaved with the originals
+    calls = keys + random.Random(42).sample(keys, retries)
+    random.Random(7).shuffle(calls)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        replays = sum(executor.map(lambda key: pay(Session, billing_id, key), calls))
+    elapsed = time.perf_counter() - start
+
+    db = Session()
+    billing = db.get(Billing, billing_id)
+    recorded = db.query(func.count(Payment.payment_id)).filter(Payment.billing_id == billing_id).scalar()
+    expected = PAYMENT_AMOUNT * payments
+    print(f"  {label}")
+    print(f"    calls        {len(calls)} ({retries} retries) in {elapsed:.2f} s, {len(calls) / elapsed:.0f}/s")
+    print(f"    payments     {recorded} rows, {replays} replays")
+    print(f"    amount_paid  {billing.amount_paid} (expected {expected}) status={billing.status}")
+    ok = billing.amount_paid == expected and billing.status == "paid" and recorded == payments
+    print(f"    {'✅ consistent' if ok else '❌ inconsistent'}")
+    db.close()
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire parallel payments at one invoice")
+    parser.add_argument("--payments", type=int, default=2000)
+    parser.add_argument("--retries", type=int, default=200, help="duplicate deliveries of existing keys")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    temp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'payments_benchmark.db')}"
+
+    connect_args = {"timeout": 30} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, pool_size=args.threads, max_overflow=0, connect_args=connect_args)
+    upgrade(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    print("🚀 Payment concurrency check")
+    print(f"📍 Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"🧵 Threads: {args.threads}, payments: {args.payments}")
+    print("-" * 50)
+
+    ok = run("atomic UPDATE + idempotency keys", atomic_payment, Session, args.payments, args.retries, args.threads)
+    if not args.skip_legacy:
+        # Without keys, every retry of the legacy path is another payment - measure only the races
+        run("legacy read-modify-write (no retries)", legacy_payment, Session, args.payments, 0, args.threads)
+
+    engine.dispose()
+    if temp_dir:
+        temp_dir.cleanup()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Document preview benchmark
+Generates thumbnails and previews for a batch of phone-camera sized scans
+inline on the event loop and through the preview process pool, reporting
+throughput and the longest event-loop stall seen by a 10 ms ticker.
+Requires Pillow.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade
+from app.services.imaging import render_derivatives
+from app.services.previews import PreviewGenerator
+
+def make_scans(directory, count, width, height):
+    """Noisy JPEG scans - flat colour would compress (and decode) unrealistically fast"""
+    from PIL import Image
+
+    noise = Image.effect_noise((width, height), 64).convert("RGB")
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"scan-{i}.jpg")
+        noise.rotate(i % 4 * 90 if width == height else i % 2 * 180).save(path, "JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+async def ticker(stop, stalls):
+    """Record how late each 10 ms tick fires - the event loop's responsiveness"""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        stalls.append(now - last - 0.01)
+        last = now
+
+async def timed(work):
+    stop, stalls = asyncio.Event(), []
+    tick = asyncio.create_task(ticker(stop, stalls))
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, max(stalls) * 1000
+
+async def run(args, directory):
+    scans = make_scans(directory, args.scans, args.width, args.height)
+    scan_mb = sum(os.path.getsize(path) for path in scans) / len(scans) / 1024 / 1024
+
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'previews.db')}")
+    upgrade(engine)
+    generator = PreviewGenerator(sessionmaker(bind=engine), args.workers)
+    # Start the pool outside the measurement
+    await asyncio.wrap_future(generator.submit(0, scans[0], "image/jpeg"))
+
+    async def inline():
+        for path in scans:
+            render_derivatives(path, "image/jpeg", generator.thumb_size, generator.preview_size)
+
+    async def pooled():
+        pending = []
+        for document_id, path in enumerate(scans, start=1):
+            pending.append(asyncio.wrap_future(generator.submit(document_id, path, "image/jpeg")))
+            await asyncio.sleep(0)
+        await asyncio.gather(*pending)
+
+    print("🚀 Document preview benchmark")
+    print(f"🖼️  Scans: {args.scans} x {args.width}x{args.height} JPEG ({scan_mb:.1f} MB avg), "
+          f"pool workers: {generator.workers}")
+    print("-" * 58)
+    print(f"  {'mode':<22} {'seconds':>8} {'scans/s':>9} {'max stall ms':>13}")
+    for label, work in (("inline on event loop", inline), ("process pool", pooled)):
+        elapsed, stall = await timed(work)
+        print(f"  {label:<22} {elapsed:>8.2f} {args.scans / elapsed:>9.1f} {stall:>13.1f}")
+    print("-" * 58)
+    thumb = os.path.getsize(scans[0] + ".thumb.jpg") / 1024
+    preview = os.path.getsize(scans[0] + ".preview.jpg") / 1024
+    print(f"📦 Derivatives per scan: thumbnail {thumb:.0f} KB, preview {preview:.0f} KB")
+    generator.shutdown()
+    engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document preview generation")
+    parser.add_argument("--scans", type=int, default=20)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--workers", type=int, default=0, help="pool size (0 = one per CPU core)")
+    args = parser.parse_args()
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("❌ Pillow is not installed - previews fall back to placeholders (pip install Pillow)")
+        sys.exit(1)
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, directory))
+
+if __name__ == "__main__":
+    main()
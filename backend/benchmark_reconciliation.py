@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Bank reconciliation import benchmark
+Generates CSV and OFX bank files of increasing size against a set of open
+invoices, imports them with the streaming importer and reports throughput and
+peak Python memory. Peak memory should stay flat as the file grows; timings
+include tracemalloc overhead, so real imports run several times faster.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade
+from app.models import User, Lawyer, Client, Case, Billing, Payment
+from app.services import reconciliation
+
+def seed_invoices(Session, count):
+    db = Session()
+    user = User(email="bench.recon@lawfirm.com", password_hash="x", first_name="Bench",
+                last_name="Lawyer", user_type="lawyer")
+    db.add(user)
+    db.flush()
+    lawyer = Lawyer(user_id=user.user_id, bar_number="BENCH-R1", hourly_rate=Decimal("250.00"))
+    client = Client(client_number="BENCH-RC1")
+    db.add_all([lawyer, client])
+    db.flush()
+    case = Case(client_id=client.client_id, primary_lawyer_id=user.user_id, case_number="BENCH-R1",
+                case_type="H1B", case_status="active", priority_level="medium")
+    db.add(case)
+    db.flush()
+    db.execute(insert(Billing), [
+        {
+            "case_id": case.case_id, "lawyer_id": lawyer.lawyer_id, "client_id": client.client_id,
+            "invoice_number": f"INV-{i:07d}", "invoice_date": date(2024, 1, 1), "due_date": date(2024, 1, 31),
+            "hourly_rate": Decimal("250.00"), "subtotal": Decimal("1000000.00"),
+            "total_amount": Decimal("1000000.00"), "amount_paid": Decimal("0.00"), "status": "sent",
+        }
+        for i in range(count)
+    ])
+    db.commit()
+    db.close()
+
+def write_csv(path, lines, invoices, seed):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("date,amount,invoice_number,reference,transaction_id,memo\n")
+        for i in range(lines):
+            invoice = f"INV-{rng.randrange(invoices):07d}"
+            roll = rng.random()
+            posted = (date(2024, 2, 1) + timedelta(days=i % 28)).isoformat()
+            if roll < 0.90:
+                f.write(f"{posted},125.00,{invoice},,{seed}-{i},Lockbox deposit\n")
+            elif roll < 0.95:
+                f.write(f"{posted},125.00,,,{seed}-{i},PAYMENT FOR {invoice} THANK YOU\n")
+            else:
+                f.write(f"{posted},125.00,,UNKNOWN-{i},{seed}-{i},Unidentified wire\n")
+
+def write_ofx(path, lines, invoices, seed):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n")
+        for i in range(lines):
+            invoice = f"INV-{rng.randrange(invoices):07d}"
+            posted = (date(2024, 2, 1) + timedelta(days=i % 28)).strftime("%Y%m%d")
+            f.write(f"<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>{posted}120000<TRNAMT>125.00"
+                    f"<FITID>{seed}-{i}<NAME>ACH CREDIT<MEMO>REF {invoice}</STMTTRN>\n")
+        f.write("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+def run_import(Session, path, file_format):
+    db = Session()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, "rb") as stream:
+        result = reconciliation.import_bank_file(db, stream, file_format)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+    os.remove(reconciliation.report_path(result.import_id, None))
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming bank reconciliation imports")
+    parser.add_argument("--invoices", type=int, default=5000)
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated line counts")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(temp_dir.name, 'recon_benchmark.db')}"
+    engine = create_engine(database_url)
+    upgrade(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    seed_invoices(Session, args.invoices)
+
+    print("🚀 Bank reconciliation import benchmark")
+    print(f"📍 Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"🧾 Open invoices: {args.invoices}")
+    print("-" * 78)
+    print(f"  {'format':<6} {'lines':>8} {'file MB':>8} {'seconds':>8} {'lines/s':>9} {'payments':>9} "
+          f"{'except.':>8} {'peak MB':>8}")
+
+    for seed, lines in enumerate(int(size) for size in args.sizes.split(",")):
+        for file_format, writer in (("csv", write_csv), ("ofx", write_ofx)):
+            path = os.path.join(temp_dir.name, f"bank-{lines}.{file_format}")
+            writer(path, lines, args.invoices, f"{file_format}{seed}")
+            result, elapsed, peak = run_import(Session, path, file_format)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"  {file_format:<6} {lines:>8} {size_mb:>8.1f} {elapsed:>8.2f} {lines / elapsed:>9.0f} "
+                  f"{result.payments_created:>9} {result.exception_lines:>8} {peak / 1024 / 1024:>8.1f}")
+
+            # Re-importing the same file must not apply anything twice
+            if file_format == "csv" and seed == 0:
+                again, _, _ = run_import(Session, path, file_format)
+                print(f"  {'':<6} re-import: {again.payments_created} payments, "
+                      f"{again.duplicate_lines} duplicates skipped")
+
+    db = Session()
+    paid = db.query(func.sum(Billing.amount_paid)).scalar()
+    recorded = db.query(func.sum(Payment.payment_amount)).scalar()
+    print("-" * 78)
+    print(f"{'✅' if paid == recorded else '❌'} Invoice balances {paid} match recorded payments {recorded}")
+    db.close()
+
+    engine.dispose()
+    temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
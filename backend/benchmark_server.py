@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Server throughput benchmark - development launcher vs. production launcher
+Starts each launcher on a free port and drives concurrent keep-alive clients
+against a lightweight endpoint.
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_ready(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def drive_load(port: int, path: str, concurrency: int, duration: float) -> dict:
+    """Run keep-alive clients for `duration` seconds and count responses"""
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    stop_at = time.time() + duration
+
+    def client(index: int):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        while time.time() < stop_at:
+            try:
+                conn.request("GET", path)
+                conn.getresponse().read()
+                counts[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {"requests": sum(counts), "errors": sum(errors), "rps": sum(counts) / duration}
+
+def run_launcher(label: str, command: list, env: dict, port: int, args) -> dict:
+    process = subprocess.Popen(command, cwd=current_dir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port)
+        drive_load(port, args.path, args.concurrency, 1.0)  # warm up
+        result = drive_load(port, args.path, args.concurrency, args.duration)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    print(f"  {label:<28} {result['rps']:10.1f} req/s   "
+          f"{result['requests']:8d} requests   {result['errors']:4d} errors")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare launcher throughput")
+    parser.add_argument("--path", default="/api/health")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=0, help="production workers (0 = CPU cores)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./benchmark_server.db")
+    env["AUTO_MIGRATE"] = "true"
+
+    print("🚀 Server throughput benchmark")
+    print(f"📍 Endpoint: {args.path}, concurrency {args.concurrency}, {args.duration:.0f}s per launcher")
+    print("-" * 50)
+
+    # Same settings as run_server.py, on a free port so both runs are comparable
+    dev_port = free_port()
+    development = run_launcher(
+        "run_server.py (reload, 1 proc)",
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(dev_port), "--reload", "--reload-dir", "app"],
+        env, dev_port, args,
+    )
+
+    prod_port = free_port()
+    prod_env = dict(env, HOST="127.0.0.1", PORT=str(prod_port), WORKERS=str(args.workers))
+    production = run_launcher(
+        "run_production.py",
+        [sys.executable, "run_production.py"],
+        prod_env, prod_port, args,
+    )
+
+    print("-" * 50)
+    if development["rps"]:
+        print(f"⚡ Throughput ratio: {production['rps'] / development['rps']:.1f}x")
+
+if __name__ == "__main__":
+    main()
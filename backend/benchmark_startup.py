@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark - legacy create_all vs. schema version check
+Measures the per-worker schema work done in the application lifespan
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine
+
+from app.core.database import Base
+from app.core.migrations import check_schema_version, upgrade
+import app.models  # noqa: F401
+
+def legacy_startup(engine):
+    """What main.lifespan used to do: one create_all per model module"""
+    for _ in range(8):
+        Base.metadata.create_all(bind=engine)
+
+def version_check_startup(engine):
+    """Current lifespan: a single schema version read"""
+    check_schema_version(engine)
+
+def measure(label, func, engine, iterations):
+    """Run func repeatedly on a fresh connection pool and report timings"""
+    timings = []
+    for _ in range(iterations):
+        engine.dispose()
+        start = time.perf_counter()
+        func(engine)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"  {label:<24} median {statistics.median(timings):8.2f} ms   "
+          f"min {min(timings):8.2f} ms   max {max(timings):8.2f} ms")
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark schema work at application startup")
+    parser.add_argument("--database-url", default=None,
+                        help="database to benchmark against (default: temporary SQLite file)")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    temp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'startup_benchmark.db')}"
+
+    engine = create_engine(database_url)
+    upgrade(engine)
+
+    print("🚀 Startup schema benchmark")
+    print(f"📍 Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"🔁 Iterations: {args.iterations}")
+    print("-" * 50)
+
+    legacy = measure("8 x create_all", legacy_startup, engine, args.iterations)
+    current = measure("schema version check", version_check_startup, engine, args.iterations)
+
+    print("-" * 50)
+    print(f"⚡ Speedup per worker boot: {legacy / current:.1f}x")
+
+    engine.dispose()
+    if temp_dir:
+        temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Document storage benchmark
+Writes and reads documents through the local and S3 storage drivers. The S3
+driver talks to an in-memory stand-in for the bucket that adds a fixed
+round-trip latency to every request, so the numbers show what the driver's
+request pattern costs: multipart parts per write, one ranged GET per range
+read, and the memory a streamed write holds (one part, not the document).
+Point --endpoint at MinIO (with S3_* credentials set) to measure a real one.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.services.storage import LocalStorage, S3Storage
+
+BLOCK = 1024 * 1024
+
+class FakeS3Error(Exception):
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+class FakeBody:
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._data) if size < 0 else self._position + size
+        chunk = bytes(self._data[self._position:end])
+        self._position += len(chunk)
+        return chunk
+
+    def close(self):
+        pass
+
+class FakeS3Client:
+    """The subset of the boto3 S3 client the driver uses, with a fixed latency per request"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+        self.objects = {}
+        self._uploads = {}
+
+    def _request(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def put_object(self, Bucket, Key, Body):
+        self._request()
+        self.objects[Key] = [bytes(Body)]
+        return {"ETag": '"put"'}
+
+    def create_multipart_upload(self, Bucket, Key):
+        self._request()
+        upload_id = uuid.uuid4().hex
+        self._uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._request()
+        self._uploads[UploadId][PartNumber] = bytes(Body)
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self._request()
+        parts = self._uploads.pop(UploadId)
+        # Joined on first read, so a write's peak memory is the driver's own
+        self.objects[Key] = [parts[part["PartNumber"]] for part in MultipartUpload["Parts"]]
+
+    def _object(self, Key) -> bytes:
+        if Key not in self.objects:
+            raise FakeS3Error("NoSuchKey")
+        if isinstance(self.objects[Key], list):
+            self.objects[Key] = b"".join(self.objects[Key])
+        return self.objects[Key]
+
+    def stored_bytes(self) -> int:
+        held = list(self.objects.values()) + [part for parts in self._uploads.values() for part in parts.values()]
+        return sum(sum(map(len, value)) if isinstance(value, list) else len(value) for value in held)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._request()
+        self._uploads.pop(UploadId, None)
+
+    def head_object(self, Bucket, Key):
+        self._request()
+        if Key not in self.objects:
+            raise FakeS3Error("404")
+        return {"ContentLength": len(self._object(Key)), "LastModified": None}
+
+    def get_object(self, Bucket, Key, Range=None):
+        self._request()
+        data = self._object(Key)
+        if Range:
+            first, _, last = Range[6:].partition("-")
+            data = memoryview(data)[int(first):int(last) + 1 if last else len(data)]
+        return {"Body": FakeBody(data)}
+
+    def copy_object(self, Bucket, Key, CopySource):
+        self._request()
+        self.objects[Key] = self._object(CopySource["Key"])
+
+    def delete_object(self, Bucket, Key):
+        self._request()
+        self.objects.pop(Key, None)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}.example/{Params['Key']}?expires={ExpiresIn}"
+
+def blocks(data):
+    for start in range(0, len(data), BLOCK):
+        yield data[start:start + BLOCK]
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def measure(storage, data, requests=lambda: 0, held=lambda: 0):
+    """(write s, peak write KB, requests per write, read s, range s, requests per range)"""
+    key = storage.new_key("document.pdf")
+    tracemalloc.start()
+    before = requests()
+    write, _ = timed(lambda: storage.put_stream(key, blocks(data)))
+    write_requests = requests() - before
+    # Less what the stand-in bucket itself holds
+    peak = (tracemalloc.get_traced_memory()[1] - held()) / 1024
+    tracemalloc.stop()
+    read, size = timed(lambda: sum(len(block) for block in storage.get_stream(key)))
+    assert size == len(data)
+    middle = len(data) // 2
+    before = requests()
+    ranged, chunk = timed(lambda: b"".join(storage.get_stream(key, middle, middle + 65536)))
+    assert chunk == data[middle:middle + 65536]
+    range_requests = requests() - before
+    storage.delete(key)
+    return write, peak, write_requests, read, ranged, range_requests
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the document storage drivers")
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated S3 round trip")
+    parser.add_argument("--part-mb", default="5,8,16", help="multipart part sizes to compare")
+    parser.add_argument("--endpoint", help="S3-compatible endpoint (e.g. http://localhost:9000) instead of the stand-in")
+    parser.add_argument("--bucket", default="documents")
+    args = parser.parse_args()
+
+    data = random.Random(42).randbytes(args.size_mb * 1024 * 1024)
+    mb = args.size_mb
+    print("🚀 Document storage benchmark")
+    target = args.endpoint or f"in-memory S3 with {args.latency_ms:.0f} ms per request"
+    print(f"📄 {mb} MB document streamed in {BLOCK // 1024} KB blocks; S3: {target}")
+    print("-" * 84)
+    print(f"  {'driver':<14} {'write MB/s':>11} {'peak KB':>8} {'requests':>9} {'read MB/s':>10} "
+          f"{'64KB range ms':>14} {'requests':>9}")
+
+    def report(name, result):
+        write, peak, write_requests, read, ranged, range_requests = result
+        print(f"  {name:<14} {mb / write:>11.0f} {peak:>8.0f} {write_requests or '-':>9} {mb / read:>10.0f} "
+              f"{ranged * 1000:>14.2f} {range_requests or '-':>9}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        report("local", measure(LocalStorage(directory, "documents"), data))
+
+    for part_mb in (int(value) for value in args.part_mb.split(",")):
+        if args.endpoint:
+            import boto3
+            client = boto3.client("s3", endpoint_url=args.endpoint)
+            requests = held = lambda: 0
+        else:
+            client = FakeS3Client(args.latency_ms / 1000)
+            requests, held = (lambda: client.requests), client.stored_bytes
+        storage = S3Storage(client, args.bucket, "documents", part_size=part_mb * 1024 * 1024)
+        report(f"S3 {part_mb} MB parts", measure(storage, data, requests, held))
+    print("-" * 84)
+
+if __name__ == "__main__":
+    main()
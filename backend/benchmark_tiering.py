@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Document compression tier benchmark
+Tiers a batch of synthetic documents on a closed case with each codec, then
+compares reading them back raw (hot) and decompressed on the fly (cold):
+space reclaimed, time to first byte and full-read latency.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade
+from app.models.case import Case
+from app.models.document import Document
+from app.services import tiering
+
+WORDS = ("petition beneficiary employer visa status adjustment form evidence employment "
+         "passport travel record approval notice receipt filing fee section page attorney "
+         "signature date address country birth certify penalty perjury").split()
+
+def synthetic_document(rng, size):
+    """Form-like text with a stream of binary noise - roughly what a scanned-and-OCRed filing holds"""
+    lines = []
+    total = 0
+    while total < size * 0.8:
+        line = " ".join(rng.choice(WORDS) for _ in range(12)) + f" {rng.randint(0, 99999):05d}\n"
+        lines.append(line)
+        total += len(line)
+    return "".join(lines).encode("ascii") + rng.randbytes(int(size * 0.2))
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def read_all(document):
+    start = time.perf_counter()
+    first_byte = None
+    for _ in tiering.iter_content(document):
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+    return first_byte, time.perf_counter() - start
+
+def run_codec(codec, level, args, directory):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, codec + '.db')}")
+    upgrade(engine)
+    Session = sessionmaker(bind=engine)
+    rng = random.Random(42)
+    db = Session()
+    db.add(Case(case_id=1, client_id=1, primary_lawyer_id=1, case_number="C-1", case_type="H1B",
+                case_status="completed", priority_level="medium"))
+    blob_dir = os.path.join(directory, codec)
+    os.makedirs(blob_dir)
+    for i in range(args.documents):
+        path = os.path.join(blob_dir, f"{i}.pdf")
+        content = synthetic_document(rng, args.size_kb * 1024)
+        with open(path, "wb") as f:
+            f.write(content)
+        db.add(Document(case_id=1, uploaded_by=1, document_name=f"{i}.pdf", document_type="form",
+                        file_path=path, file_size=len(content), mime_type="application/pdf"))
+    db.commit()
+
+    hot = [read_all(document) for document in db.query(Document).all()]
+    start = time.perf_counter()
+    result = tiering.tier_documents(db, 36500, ["completed"], codec=codec, level=level)
+    tier_seconds = time.perf_counter() - start
+    cold = [read_all(document) for document in db.query(Document).all()]
+    db.close()
+    engine.dispose()
+    return result, tier_seconds, hot, cold
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the document compression tier")
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--level", type=int, default=10, help="compression level (gzip is capped at 9)")
+    args = parser.parse_args()
+
+    codecs = ["gzip"] + (["zstd"] if tiering.zstandard is not None else [])
+    print("🚀 Document compression tier benchmark")
+    print(f"📄 Documents: {args.documents} x {args.size_kb} KB, codecs: {', '.join(codecs)}")
+    if tiering.zstandard is None:
+        print("ℹ️ zstandard is not installed - only gzip is measured (pip install zstandard)")
+    print("-" * 78)
+    print(f"  {'codec':<6} {'ratio':>6} {'reclaimed MB':>13} {'tier s':>7} "
+          f"{'TTFB p50 ms':>12} {'read p50 ms':>12} {'read p95 ms':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in codecs:
+            level = min(args.level, 9) if codec == "gzip" else args.level
+            result, tier_seconds, hot, cold = run_codec(codec, level, args, directory)
+            if codec == codecs[0]:
+                print(f"  {'raw':<6} {'1.00':>6} {'-':>13} {'-':>7} "
+                      f"{percentile([h[0] for h in hot], 0.5) * 1000:>12.2f} "
+                      f"{percentile([h[1] for h in hot], 0.5) * 1000:>12.2f} "
+                      f"{percentile([h[1] for h in hot], 0.95) * 1000:>12.2f}")
+            ratio = result.bytes_before / result.bytes_after if result.bytes_after else 0
+            print(f"  {codec:<6} {ratio:>6.2f} {result.bytes_reclaimed / 1024 / 1024:>13.1f} {tier_seconds:>7.1f} "
+                  f"{percentile([c[0] for c in cold], 0.5) * 1000:>12.2f} "
+                  f"{percentile([c[1] for c in cold], 0.5) * 1000:>12.2f} "
+                  f"{percentile([c[1] for c in cold], 0.95) * 1000:>12.2f}")
+    print("-" * 78)
+    print("📊 Cold-read metrics as reported by /api/documents/tiering/stats:")
+    print(f"   {tiering.cold_reads.metrics()}")
+
+if __name__ == "__main__":
+    main()
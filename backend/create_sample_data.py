@@ -9,6 +9,8 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
+from sqlalchemy import text
+
 from app.core.database import SessionLocal, engine
 from app.core.security import get_password_hash
 from app.models.user import User, UserRole
@@ -25,7 +27,7 @@ def create_sample_data():
     try:
         print("🧪 Testing database connection...")
         with engine.connect() as conn:
-            conn.execute("SELECT 1").fetchone()
+            conn.execute(text("SELECT 1")).fetchone()
         print("✅ Database connection successful!")
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Encrypt confidential documents stored in plaintext
+Run once after enabling encryption at rest (and again after bulk imports);
+new confidential uploads are encrypted as they are written
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.core.database import SessionLocal
+from app.services import confidential
+
+def main():
+    parser = argparse.ArgumentParser(description="Encrypt confidential documents at rest")
+    parser.add_argument("--limit", type=int, default=None, help="documents to process in this run")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("🔐 Encrypting confidential documents...")
+        try:
+            result = confidential.encrypt_confidential(db, limit=args.limit)
+        except Exception as e:
+            print(f"❌ Encryption failed: {e}")
+            sys.exit(1)
+
+        print(f"✅ Encrypted {result.encrypted} documents ({result.bytes_encrypted / 1024 / 1024:.1f} MB)")
+        if result.skipped:
+            print(f"ℹ️ {result.skipped} documents changed while running and were left for the next run")
+        if result.missing:
+            print(f"⚠️ {result.missing} documents have no file on disk")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Synthetic large-scale data generator for benchmarking
+Fills the database with a deterministic, firm-sized data set - by default
+100k cases, 1M activities and 500k documents (sparse placeholder files),
+with the invoices, line items and payments that go with them - using bulk
+inserts. The same --seed and --as-of always produce the same rows; --scale
+sizes every volume at once (e.g. 0.01 for a quick run) and the individual
+flags override one of them.
+
+Volumes are skewed the way a firm's are: a few partners carry most of the
+cases, some clients have several cases, activity and document counts per
+case are long-tailed, and a minority of clients pay late, partially or
+never.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from bisect import bisect
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal, engine
+from app.core.security import get_password_hash
+from app.models import User, Lawyer, Client, Case, Activity, Document, DocumentVersion, Billing, Payment, InvoiceLineItem
+from app.services import document_acl
+from app.services.imaging import UNSUPPORTED
+from app.services.storage import storage
+
+CASE_BLOCK = 1000  # cases generated and committed together
+PASSWORD = "synthetic123"
+
+CASE_TYPES = {
+    "H-1B Visa Application": 0.22, "Family-Based Green Card": 0.18, "I-485 Adjustment of Status": 0.14,
+    "Citizenship Application": 0.12, "Asylum": 0.1, "Employment-Based Green Card": 0.09,
+    "L-1 Visa Application": 0.05, "O-1 Visa Application": 0.04, "Removal Defense": 0.04, "DACA Renewal": 0.02,
+}
+OPEN_STATUSES = {"active": 0.45, "progress": 0.25, "pending": 0.15, "review": 0.15}
+CLOSED_STATUSES = {"completed": 0.75, "closed": 0.25}
+PRIORITIES = {"low": 0.25, "medium": 0.5, "high": 0.2, "urgent": 0.05}
+# Activity type: (weight, typical hours, description)
+ACTIVITY_TYPES = {
+    "call": (0.3, 0.3, "Client call"),
+    "email": (0.2, 0.2, "Correspondence"),
+    "meeting": (0.15, 1.2, "Client meeting"),
+    "research": (0.12, 2.0, "Legal research"),
+    "drafting": (0.12, 2.5, "Drafting petition materials"),
+    "filing": (0.07, 1.0, "Filing with USCIS"),
+    "court": (0.02, 4.0, "Court appearance"),
+}
+DOCUMENT_TYPES = {
+    "passport": 0.12, "visa": 0.08, "application": 0.2, "evidence": 0.25, "correspondence": 0.15,
+    "birth_certificate": 0.05, "tax_return": 0.07, "employment_letter": 0.08,
+}
+# MIME type: (weight, extension, median bytes)
+DOCUMENT_FORMATS = {
+    "application/pdf": (0.6, ".pdf", 400_000),
+    "image/jpeg": (0.2, ".jpg", 2_500_000),
+    "image/png": (0.05, ".png", 800_000),
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (0.1, ".docx", 60_000),
+    "text/plain": (0.05, ".txt", 8_000),
+}
+PAYMENT_METHODS = {"bank_transfer": 0.45, "credit_card": 0.35, "check": 0.2}
+# Payer profile: (weight, days until paid, chance of never paying in full)
+PAYERS = {"prompt": (0.8, 25, 0.0), "slow": (0.15, 110, 0.1), "bad": (0.05, 200, 0.5)}
+
+class Picker:
+    """Weighted choice from a fixed table, drawing from one seeded generator"""
+
+    def __init__(self, rng: random.Random, weights: dict):
+        self.rng = rng
+        self.values = list(weights)
+        self.cumulative = list(accumulate(weight if not isinstance(weight, tuple) else weight[0]
+                                          for weight in weights.values()))
+
+    def __call__(self):
+        return self.values[bisect(self.cumulative, self.rng.random() * self.cumulative[-1])]
+
+def split(total: int, weights) -> list:
+    """Integer counts proportional to the weights that add up to exactly `total`"""
+    scale = total / sum(weights)
+    counts, previous = [], 0
+    for cumulative in accumulate(weights):
+        rounded = round(cumulative * scale)
+        counts.append(rounded - previous)
+        previous = rounded
+    return counts
+
+def money(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def insert_returning(db, model, id_column, rows) -> list:
+    if not rows:
+        return []
+    return db.scalars(insert(model).returning(id_column, sort_by_parameter_order=True), rows).all()
+
+def insert_rows(db, model, rows):
+    if rows:
+        db.execute(insert(model), rows)
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.as_of = args.as_of
+        # People predate the oldest case, so every row's timestamp follows from the arguments
+        self.since = datetime.combine(args.as_of - timedelta(days=args.years * 365 + 30), datetime.min.time())
+        self.password_hash = get_password_hash(PASSWORD)
+        self.payment_method = self.pick(PAYMENT_METHODS)
+        self.counts = defaultdict(int)
+        self.directories = set()
+
+    def pick(self, weights: dict):
+        return Picker(self.rng, weights)
+
+    def new_uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def user_row(self, email: str, first_name: str, last_name: str, user_type: str) -> dict:
+        return {"email": email, "password_hash": self.password_hash, "first_name": first_name,
+                "last_name": last_name, "user_type": user_type, "is_active": True, "created_at": self.since}
+
+    # People
+
+    def create_people(self, db, lawyer_count: int, client_count: int):
+        rng = self.rng
+        # Lawyers first, so on a fresh database lawyer_id matches user_id as the routers expect
+        lawyer_users = insert_returning(db, User, User.user_id, [
+            self.user_row(f"syn.lawyer{i:04d}@example.com", "Lawyer", f"{i:04d}", "lawyer")
+            for i in range(lawyer_count)
+        ])
+        # A partner rate for the first tenth, associate rates for the rest
+        partners = max(1, lawyer_count // 10)
+        rates = [450 if i < partners else rng.choice((200, 250, 300, 350)) for i in range(lawyer_count)]
+        self.lawyer_ids = insert_returning(db, Lawyer, Lawyer.lawyer_id, [
+            {"user_id": user_id, "bar_number": f"SYN-{i:05d}", "license_state": "CA",
+             "specialization": "Immigration", "hourly_rate": money(rates[i]), "is_partner": i < partners,
+             "created_at": self.since}
+            for i, user_id in enumerate(lawyer_users)
+        ])
+        self.lawyer_users = dict(zip(self.lawyer_ids, lawyer_users))
+        self.lawyer_rates = dict(zip(self.lawyer_ids, rates))
+        self.admin_id = insert_returning(db, User, User.user_id,
+                                         [self.user_row("syn.admin@example.com", "Synthetic", "Admin", "admin")])[0]
+
+        # Most clients use the portal
+        portal = [i for i in range(client_count) if rng.random() < 0.6]
+        portal_users = dict(zip(portal, insert_returning(db, User, User.user_id, [
+            self.user_row(f"syn.client{i:06d}@example.com", "Client", f"{i:06d}", "client") for i in portal
+        ])))
+        payer = self.pick(PAYERS)
+        self.client_ids = insert_returning(db, Client, Client.client_id, [
+            {"user_id": portal_users.get(i), "client_number": f"SYN-C{i:06d}",
+             "country_of_origin": rng.choice(("India", "Mexico", "China", "Philippines", "Brazil", "Nigeria")),
+             "preferred_language": rng.choice(("English", "Spanish", "Mandarin", "Hindi", "Portuguese")),
+             "created_at": self.since}
+            for i in range(client_count)
+        ])
+        self.client_users = {client_id: portal_users.get(i) for i, client_id in enumerate(self.client_ids)}
+        self.client_payers = {client_id: payer() for client_id in self.client_ids}
+        db.commit()
+        self.counts["users"] = lawyer_count + 1 + len(portal)
+        self.counts["lawyers"] = lawyer_count
+        self.counts["clients"] = client_count
+
+    # Cases
+
+    def plan_cases(self, case_count: int, activity_count: int, document_count: int):
+        """Case attributes and per-case volumes, decided up front so the totals come out exact"""
+        rng = self.rng
+        span = self.args.years * 365
+        # Every client has a case; repeat clients take the rest, skewed toward a few
+        clients = self.client_ids[:case_count]
+        client_weights = [rng.paretovariate(1.5) for _ in self.client_ids]
+        clients += rng.choices(self.client_ids, weights=client_weights, k=case_count - len(clients))
+        rng.shuffle(clients)
+        # Partners and senior associates carry most of the caseload
+        lawyer_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(self.lawyer_ids))]
+        lawyers = rng.choices(self.lawyer_ids, weights=lawyer_weights, k=case_count)
+
+        case_type, open_status, closed_status, priority = (self.pick(CASE_TYPES), self.pick(OPEN_STATUSES),
+                                                           self.pick(CLOSED_STATUSES), self.pick(PRIORITIES))
+        self.cases = []
+        for i in range(case_count):
+            # The firm has grown, so recent filings outnumber old ones
+            filed = self.as_of - timedelta(days=int(span * (1 - math.sqrt(rng.random()))))
+            age_years = (self.as_of - filed).days / 365
+            closed = rng.random() < min(0.85, age_years * 0.3)
+            duration = timedelta(days=rng.randint(90, 900))
+            end = min(filed + duration, self.as_of) if closed else self.as_of
+            self.cases.append({
+                "number": f"SYN-{i:07d}", "client_id": clients[i], "lawyer_id": lawyers[i],
+                "type": case_type(), "status": closed_status() if closed else open_status(),
+                "priority": priority(), "filed": filed, "end": end,
+                "expected": filed + duration,
+            })
+        weights = [rng.lognormvariate(0, 0.9) * (1 + (case["end"] - case["filed"]).days / 365) for case in self.cases]
+        self.activity_counts = split(activity_count, weights)
+        self.document_counts = split(document_count, [weight ** 0.7 * rng.lognormvariate(0, 0.5) for weight in weights])
+
+    def create_cases(self, db, block):
+        rng = self.rng
+        return insert_returning(db, Case, Case.case_id, [
+            {"client_id": case["client_id"], "primary_lawyer_id": case["lawyer_id"], "case_number": case["number"],
+             "case_type": case["type"], "case_status": case["status"], "priority_level": case["priority"],
+             "filing_date": case["filed"], "expected_completion": case["expected"],
+             "estimated_cost": money(rng.choice((2500, 5000, 7500, 12000, 20000))),
+             "case_summary": f"{case['type']} matter",
+             "created_at": datetime.combine(case["filed"], datetime.min.time())}
+            for case in block
+        ])
+
+    # Time entries and billing
+
+    def activities_for(self, case, case_id, count, activity_type):
+        rng = self.rng
+        days = max((case["end"] - case["filed"]).days, 1)
+        rows = []
+        for _ in range(count):
+            kind = activity_type()
+            _, typical_hours, description = ACTIVITY_TYPES[kind]
+            # Mostly the case's own lawyer; colleagues help out now and then
+            lawyer_id = case["lawyer_id"] if rng.random() < 0.9 else rng.choice(self.lawyer_ids)
+            when = datetime.combine(case["filed"] + timedelta(days=rng.randrange(days)), datetime.min.time()) \
+                + timedelta(hours=rng.randint(8, 18), minutes=rng.choice((0, 15, 30, 45)))
+            hours = max(0.1, round(rng.lognormvariate(math.log(typical_hours), 0.5) * 4) / 4)
+            rows.append({
+                "case_id": case_id, "lawyer_id": lawyer_id, "activity_type": kind,
+                "title": description, "description": f"{description} - {case['type']}",
+                "start_time": when, "end_time": when + timedelta(hours=hours),
+                "hours_spent": money(hours), "is_billable": rng.random() < 0.85,
+                "hourly_rate": money(self.lawyer_rates[lawyer_id]), "billed_amount": None,
+                "billing_status": "unbilled", "status": "completed",
+                "activity_date": when, "created_at": when,
+            })
+        return rows
+
+    def bill(self, case, case_id, activities):
+        """Monthly invoices for billable time before the current month; marks the activities billed"""
+        rng = self.rng
+        months = defaultdict(list)
+        current = month_start(self.as_of)
+        for activity in activities:
+            month = month_start(activity["activity_date"].date())
+            if activity["is_billable"] and month < current:
+                months[month].append(activity)
+        payer_days, payer_default = PAYERS[self.client_payers[case["client_id"]]][1:]
+        invoices = []
+        for month, billed in sorted(months.items()):
+            invoice_date = next_month(month)
+            due_date = invoice_date + timedelta(days=30)
+            hours = sum(activity["hours_spent"] for activity in billed)
+            total = sum(activity["hours_spent"] * activity["hourly_rate"] for activity in billed)
+            # When this client would have paid, and whether they ever pay in full
+            paid_on = invoice_date + timedelta(days=int(rng.expovariate(1 / payer_days)))
+            defaulted = rng.random() < payer_default
+            if paid_on <= self.as_of and not defaulted:
+                status, amount_paid = "paid", total
+            else:
+                partial = defaulted and rng.random() < 0.5 and paid_on <= self.as_of
+                amount_paid = money(float(total) * rng.uniform(0.2, 0.8)) if partial else Decimal("0.00")
+                status = "overdue" if due_date < self.as_of else "sent"
+            for activity in billed:
+                activity["billing_status"] = "paid" if status == "paid" else "billed"
+                activity["billed_amount"] = activity["hours_spent"] * activity["hourly_rate"]
+            self.counts["invoices"] += 1
+            invoices.append(({
+                "case_id": case_id, "lawyer_id": case["lawyer_id"], "client_id": case["client_id"],
+                "invoice_number": f"SYN-INV-{self.counts['invoices']:08d}",
+                "invoice_date": invoice_date, "due_date": due_date, "hours_worked": hours,
+                "hourly_rate": money(self.lawyer_rates[case["lawyer_id"]]), "subtotal": total,
+                "tax_amount": Decimal("0.00"), "total_amount": total, "amount_paid": amount_paid,
+                "status": status, "payment_date": paid_on if status == "paid" else None,
+                "payment_method": self.payment_method() if amount_paid else None,
+                "description": f"Legal services for {month:%B %Y}",
+                "created_at": datetime.combine(invoice_date, datetime.min.time()),
+            }, billed, paid_on))
+        return invoices
+
+    def payments_for(self, billing_id, invoice, paid_on):
+        """One payment for most invoices, installments for some"""
+        rng = self.rng
+        amount = invoice["amount_paid"]
+        if not amount:
+            return []
+        installments = 1 if rng.random() < 0.7 else rng.choice((2, 3))
+        span = max((paid_on - invoice["invoice_date"]).days, installments)
+        shares = split(int(amount * 100), [1] * installments)
+        rows = []
+        for i, cents in enumerate(shares):
+            self.counts["payments"] += 1
+            paid = min(invoice["invoice_date"] + timedelta(days=span * (i + 1) // installments), self.as_of)
+            rows.append({
+                "billing_id": billing_id, "payment_amount": Decimal(cents) / 100, "payment_date": paid,
+                "payment_method": invoice["payment_method"], "reference_number": f"SYN-PAY-{self.counts['payments']:08d}",
+                "recorded_by": self.admin_id, "created_at": datetime.combine(paid, datetime.min.time()),
+            })
+        return rows
+
+    # Documents
+
+    def documents_for(self, case, case_id, count, document_type, document_format):
+        rng = self.rng
+        days = max((case["end"] - case["filed"]).days, 1)
+        rows = []
+        for _ in range(count):
+            mime_type = document_format()
+            _, extension, median = DOCUMENT_FORMATS[mime_type]
+            size = int(min(max(rng.lognormvariate(math.log(median), 0.8), 1024), 50 * 1024 * 1024))
+            uploaded = datetime.combine(case["filed"] + timedelta(days=rng.randrange(days)), datetime.min.time()) \
+                + timedelta(hours=rng.randint(8, 18))
+            client_user = self.client_users[case["client_id"]]
+            uploader = client_user if client_user and rng.random() < 0.2 else self.lawyer_users[case["lawyer_id"]]
+            kind = document_type()
+            rows.append({
+                "case_id": case_id, "uploaded_by": uploader, "document_name": f"{kind}{extension}",
+                "document_type": kind, "file_path": storage.sharded_key(f"{storage.prefix}/{self.new_uuid()}{extension}"),
+                "file_size": size, "mime_type": mime_type, "access_level": "case",
+                "is_confidential": False, "is_encrypted": False, "version": 1,
+                "preview_status": UNSUPPORTED, "status": "active", "created_at": uploaded,
+            })
+        return rows
+
+    def write_placeholder(self, key: str, size: int):
+        """A sparse file of the document's size - no blocks are written where the filesystem allows"""
+        path = storage.local_path(key)
+        directory = os.path.dirname(path)
+        if directory not in self.directories:
+            os.makedirs(directory, exist_ok=True)
+            self.directories.add(directory)
+        with open(path, "wb") as f:
+            f.truncate(size)
+
+    # Run
+
+    def create_block(self, db, block, activity_counts, document_counts, pickers):
+        activity_type, document_type, document_format = pickers
+        case_ids = self.create_cases(db, block)
+        activities, invoices, documents = [], [], []
+        for case, case_id, activity_count, document_count in zip(block, case_ids, activity_counts, document_counts):
+            case_activities = self.activities_for(case, case_id, activity_count, activity_type)
+            invoices.extend(self.bill(case, case_id, case_activities))
+            activities.extend(case_activities)
+            documents.extend(self.documents_for(case, case_id, document_count, document_type, document_format))
+
+        activity_ids = insert_returning(db, Activity, Activity.activity_id, activities)
+        activity_id_of = {id(activity): activity_id for activity, activity_id in zip(activities, activity_ids)}
+        billing_ids = insert_returning(db, Billing, Billing.billing_id, [invoice for invoice, _, _ in invoices])
+        payments, line_items = [], []
+        for billing_id, (invoice, billed, paid_on) in zip(billing_ids, invoices):
+            payments.extend(self.payments_for(billing_id, invoice, paid_on))
+            line_items.extend({
+                "billing_id": billing_id, "activity_id": activity_id_of[id(activity)],
+                "description": activity["title"], "hours": activity["hours_spent"],
+                "rate": activity["hourly_rate"], "amount": activity["billed_amount"],
+            } for activity in billed)
+        insert_rows(db, Payment, payments)
+        insert_rows(db, InvoiceLineItem, line_items)
+
+        document_ids = insert_returning(db, Document, Document.document_id, documents)
+        insert_rows(db, DocumentVersion, [
+            {"document_id": document_id, "version": 1, "document_name": document["document_name"],
+             "mime_type": document["mime_type"], "file_size": document["file_size"],
+             "uploaded_by": document["uploaded_by"], "created_at": document["created_at"]}
+            for document_id, document in zip(document_ids, documents)
+        ])
+        db.commit()
+
+        if self.args.files:
+            for document in documents:
+                self.write_placeholder(document["file_path"], document["file_size"])
+        self.counts["cases"] += len(block)
+        self.counts["activities"] += len(activities)
+        self.counts["line items"] += len(line_items)
+        self.counts["documents"] += len(documents)
+        self.counts["document bytes"] += sum(document["file_size"] for document in documents)
+
+    def run(self, db):
+        args = self.args
+        self.create_people(db, args.lawyers, args.clients)
+        self.plan_cases(args.cases, args.activities, args.documents)
+        pickers = self.pick(ACTIVITY_TYPES), self.pick(DOCUMENT_TYPES), self.pick(DOCUMENT_FORMATS)
+        started = time.perf_counter()
+        for start in range(0, len(self.cases), CASE_BLOCK):
+            end = start + CASE_BLOCK
+            self.create_block(db, self.cases[start:end], self.activity_counts[start:end],
+                              self.document_counts[start:end], pickers)
+            elapsed = time.perf_counter() - started
+            print(f"   {self.counts['cases']:>9,} cases, {self.counts['activities']:>10,} activities, "
+                  f"{self.counts['documents']:>9,} documents ({elapsed:.0f}s)")
+
+        # One INSERT ... SELECT instead of indexing each document
+        with engine.begin() as connection:
+            document_acl.rebuild_index(connection)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large, deterministic data set for benchmarking")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every default volume")
+    parser.add_argument("--cases", type=int, default=None, help="default 100,000 x scale")
+    parser.add_argument("--activities", type=int, default=None, help="default 1,000,000 x scale")
+    parser.add_argument("--documents", type=int, default=None, help="default 500,000 x scale")
+    parser.add_argument("--lawyers", type=int, default=None, help="default one per 500 cases")
+    parser.add_argument("--clients", type=int, default=None, help="default 70%% of cases")
+    parser.add_argument("--years", type=int, default=6, help="history covered by the cases")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date(2026, 1, 1),
+                        help="the generated firm's 'today' (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-files", dest="files", action="store_false",
+                        help="insert document rows without placeholder files")
+    args = parser.parse_args()
+
+    args.cases = args.cases if args.cases is not None else max(1, round(100_000 * args.scale))
+    args.activities = args.activities if args.activities is not None else round(1_000_000 * args.scale)
+    args.documents = args.documents if args.documents is not None else round(500_000 * args.scale)
+    args.lawyers = args.lawyers or max(3, args.cases // 500)
+    args.clients = min(args.clients or max(1, round(args.cases * 0.7)), args.cases)
+    if args.files and not storage.local:
+        print("ℹ️ Placeholder files need the local storage driver; inserting document rows only")
+        args.files = False
+
+    db = SessionLocal()
+    try:
+        if db.query(Case.case_id).filter(Case.case_number.like("SYN-%")).first():
+            print("ℹ️ Synthetic data is already present. Clear the database to generate it again.")
+            return
+
+        print("🚀 Synthetic data generator")
+        print(f"📍 Database: {engine.url.render_as_string(hide_password=True)}")
+        print(f"🌱 Seed {args.seed}, as of {args.as_of}: {args.cases:,} cases, {args.activities:,} activities, "
+              f"{args.documents:,} documents, {args.lawyers:,} lawyers, {args.clients:,} clients")
+        started = time.perf_counter()
+        generator = Generator(args)
+        try:
+            generator.run(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Generation failed: {e}")
+            sys.exit(1)
+
+        counts = generator.counts
+        print(f"✅ Done in {time.perf_counter() - started:.0f}s")
+        for name in ("users", "lawyers", "clients", "cases", "activities", "invoices", "line items",
+                     "payments", "documents"):
+            print(f"   {name:<11} {counts[name]:>12,}")
+        if args.files:
+            print(f"📄 Placeholder files: {counts['document bytes'] / 1024 ** 3:.1f} GB apparent size (sparse)")
+        print(f"🔑 Every synthetic user's password is '{PASSWORD}' (e.g. syn.admin@example.com, syn.lawyer0000@example.com)")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Apply database schema migrations
+Run this script after deploying new code and before restarting the API workers
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.core.database import engine
+from app.core.migrations import MIGRATIONS, current_version, latest_version, upgrade
+
+def show_status():
+    """Print recorded and pending migrations"""
+
+    with engine.connect() as connection:
+        version = current_version(connection)
+
+    print(f"📊 Database schema version: {version} (latest: {latest_version()})")
+    for pending in MIGRATIONS:
+        marker = "✅" if pending.version <= version else "⏳"
+        print(f"  {marker} {pending.version:>4}  {pending.description}")
+
+def main():
+    """Apply pending migrations"""
+
+    parser = argparse.ArgumentParser(description="Immigration Law Dashboard schema migrations")
+    parser.add_argument("--status", action="store_true", help="show migration status and exit")
+    parser.add_argument("--target", type=int, default=None, help="migrate up to this version")
+    args = parser.parse_args()
+
+    if args.status:
+        show_status()
+        return
+
+    print("🏗️ Applying database migrations...")
+    try:
+        applied = upgrade(engine, target=args.target)
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
+
+    if not applied:
+        print("ℹ️ Database schema is already up to date.")
+    for migration in applied:
+        print(f"✅ {migration.version}: {migration.description}")
+    show_status()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Immigration Law Dashboard API - Production Server
+Multi-worker launcher configured from Settings (see .env.example)
+
+Uses gunicorn with uvicorn workers when available (app preloading, graceful
+restarts on SIGHUP, worker recycling). Falls back to uvicorn's own process
+manager elsewhere, e.g. on Windows where gunicorn does not run.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.core.config import settings
+
+APP_PATH = "app.main:app"
+
+def event_loop() -> str:
+    """Prefer uvloop when installed"""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+def http_protocol() -> str:
+    """Prefer the httptools parser when installed"""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+def gunicorn_options() -> dict:
+    """Gunicorn configuration derived from Settings"""
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": settings.worker_count,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": settings.PRELOAD_APP,
+        "backlog": settings.BACKLOG,
+        "keepalive": settings.KEEPALIVE_TIMEOUT,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "max_requests": settings.MAX_REQUESTS,
+        "max_requests_jitter": settings.MAX_REQUESTS_JITTER if settings.MAX_REQUESTS else 0,
+        "post_fork": _post_fork,
+        "loglevel": "info",
+    }
+
+def _post_fork(server, worker):
+    """Drop connections and per-process state inherited from the preloading master"""
+    from app.core.cache import cache
+    from app.core.database import engine, replica_engines
+    from app.core.invalidation import bus
+    for inherited in (engine, *replica_engines):
+        inherited.dispose(close=False)
+    cache.after_fork()
+    bus.after_fork()
+
+def run_gunicorn():
+    """Serve with gunicorn managing uvicorn workers"""
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionApplication(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    ProductionApplication(gunicorn_options()).run()
+
+def run_uvicorn():
+    """Serve with uvicorn's built-in multi-process supervisor"""
+    import uvicorn
+    from app.core.server import http_protocol_class
+
+    workers = settings.worker_count
+    # uvicorn's supervisor does not replace exited workers, so recycling would
+    # shrink the pool; only enable it for a single process.
+    limit_max_requests = settings.MAX_REQUESTS or None
+    if workers > 1 and limit_max_requests:
+        print("⚠️ Worker recycling needs gunicorn; MAX_REQUESTS ignored with uvicorn workers")
+        limit_max_requests = None
+
+    uvicorn.run(
+        APP_PATH,
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        loop=event_loop(),
+        http=http_protocol_class(),
+        backlog=settings.BACKLOG,
+        timeout_keep_alive=settings.KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT,
+        limit_max_requests=limit_max_requests,
+        reload=False,
+        access_log=False,
+        log_level="info"
+    )
+
+def main():
+    """Start the production server"""
+
+    use_gunicorn = sys.platform != "win32" and importlib.util.find_spec("gunicorn") is not None
+
+    from app.core.database import replica_router
+    problem = replica_router.worker_problem(settings.worker_count)
+    if problem:
+        print(f"❌ {problem}")
+        sys.exit(1)
+
+    print("🚀 Starting Immigration Law Dashboard API (production)...")
+    print(f"📍 Listening on: http://{settings.HOST}:{settings.PORT}")
+    print(f"👷 Workers: {settings.worker_count} via {'gunicorn' if use_gunicorn else 'uvicorn'}")
+    print(f"⚡ Event loop: {event_loop()}, HTTP parser: {http_protocol()}")
+    print("-" * 50)
+
+    if use_gunicorn:
+        run_gunicorn()
+    else:
+        run_uvicorn()
+
+if __name__ == "__main__":
+    main()
@@ -12,8 +12,8 @@ current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.models import user, lawyer, client, case
+from app.core.database import engine
+from app.core.migrations import upgrade
 
 def create_database():
     """Create the database if it doesn't exist"""
@@ -55,10 +55,10 @@ def create_database():
         cursor.close()
         conn.close()
         
-        # Now create tables using SQLAlchemy
-        print("🏗️ Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✅ Tables created successfully!")
+        # Now create tables by applying the schema migrations
+        print("🏗️ Applying database migrations...")
+        applied = upgrade(engine)
+        print(f"✅ Applied {len(applied)} migrations successfully!")
         
         print("\n🎉 SQL Server Express setup complete!")
         print(f"📊 Database URL: {settings.database_url}")
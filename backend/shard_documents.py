@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Move documents to the sharded storage layout
+Safe to run while the API is serving, and to interrupt: a rerun continues
+with the documents still stored under the flat layout
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.core.database import SessionLocal
+from app.services import sharding
+
+def show_stats(db):
+    stats = sharding.sharding_stats(db)
+    print(f"📊 Shard levels: {stats['shard_levels']}, documents still in the flat layout: {stats['flat_documents']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Move documents to the sharded storage layout")
+    parser.add_argument("--batch-size", type=int, default=200, help="documents per transaction")
+    parser.add_argument("--max-per-second", type=float, default=50, help="throttle (0 = as fast as possible)")
+    parser.add_argument("--limit", type=int, default=None, help="documents to move in this run")
+    parser.add_argument("--stats", action="store_true", help="show how many documents are left and exit")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.stats:
+            show_stats(db)
+            return
+
+        print(f"📁 Moving documents to the sharded layout, {args.batch_size} per batch...")
+        try:
+            result = sharding.shard_documents(db, batch_size=args.batch_size,
+                                              max_per_second=args.max_per_second, limit=args.limit)
+        except Exception as e:
+            print(f"❌ Sharding failed: {e}")
+            sys.exit(1)
+
+        print(f"✅ Moved {result.moved} documents in {result.batches} batches")
+        if result.conflicts:
+            print(f"ℹ️ {result.conflicts} documents changed during the run and were left for the next one")
+        if result.missing:
+            print(f"⚠️ {result.missing} documents have no file in storage")
+        show_stats(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
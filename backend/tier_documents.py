@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Move aged documents to the compressed storage tier
+Run nightly (cron / Task Scheduler); documents older than TIERING_AGE_DAYS or
+on closed cases are compressed and served decompressed on download
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the app directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services import tiering
+
+def show_stats(db):
+    stats = tiering.tiering_stats(db)
+    print(f"📊 Tiered documents: {stats['tiered_documents']} ({stats['codec']})")
+    print(f"💾 {stats['logical_bytes'] / 1024 / 1024:.1f} MB stored as {stats['stored_bytes'] / 1024 / 1024:.1f} MB, "
+          f"{stats['bytes_reclaimed'] / 1024 / 1024:.1f} MB reclaimed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress aged documents")
+    parser.add_argument("--older-than-days", type=int, default=settings.TIERING_AGE_DAYS)
+    parser.add_argument("--limit", type=int, default=None, help="documents to process in this run")
+    parser.add_argument("--stats", action="store_true", help="show tier statistics and exit")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.stats:
+            show_stats(db)
+            return
+
+        print(f"🗜️ Tiering documents older than {args.older_than_days} days "
+              f"or on {settings.TIERING_CASE_STATUSES} cases...")
+        try:
+            result = tiering.tier_documents(
+                db, args.older_than_days, settings.TIERING_CASE_STATUSES.split(","),
+                codec=settings.TIERING_CODEC, level=settings.TIERING_LEVEL,
+                min_saving=settings.TIERING_MIN_SAVING, limit=args.limit,
+            )
+        except Exception as e:
+            print(f"❌ Tiering failed: {e}")
+            sys.exit(1)
+
+        print(f"✅ Compressed {result.compressed} documents, "
+              f"reclaimed {result.bytes_reclaimed / 1024 / 1024:.1f} MB")
+        if result.incompressible:
+            print(f"ℹ️ {result.incompressible} documents did not compress enough and were left as they are")
+        if result.missing:
+            print(f"⚠️ {result.missing} documents have no file on disk")
+        show_stats(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()